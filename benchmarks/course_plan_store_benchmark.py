@@ -0,0 +1,151 @@
+"""
+Compares reading the existing course plans with `CoursePlanStore` to parsing the whole `course_plans.txt` like
+`save_course_plans` did before, on a synthetic file written by `save_course_plans`. Checks that the store gives
+the same plans as the old parser and that saving without any new plans writes the same file, then reports the
+time and the peak memory to read a single programme, the programmes a partial run merges, to index the file
+from scratch and to save a partial run.
+
+Usage: python benchmarks/course_plan_store_benchmark.py [-faculties 13] [-programmes 20] [-iterations 6]
+"""
+from time import perf_counter
+import argparse
+import copy
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from course_plan_store import CoursePlanStore
+from logger import Logger
+from run import save_course_plans
+from constants import *
+import fixtures
+
+
+def read_course_plans_legacy(path: str) -> dict:
+    """How `save_course_plans` read the existing course plans before the store."""
+    existing_data = {}
+    current_faculty = None
+    current_plan = None
+    current_iter = None
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+        for line in lines:
+            if line.startswith("# "):  # Faculty
+                current_faculty = line[2:].strip()
+                existing_data[current_faculty] = {}
+            elif line.startswith("## "):  # Plan
+                current_plan = line[3:].strip()
+                existing_data[current_faculty][current_plan] = {}
+            elif line.startswith("### "):  # Iteration
+                current_iter = line[4:].strip()
+                existing_data[current_faculty][current_plan][current_iter] = []
+            elif not line.strip():  # Empty line
+                continue
+            else:  # Semester data
+                if current_faculty and current_plan and current_iter:
+                    current_semester = existing_data[current_faculty][current_plan][current_iter]
+                    if len(current_semester) < 8:  # Only add if we haven't reached 8 semesters
+                        current_semester.append(line.strip().split("="))
+
+    return existing_data
+
+
+def get_random_plans(rng: random.Random, faculty_count: int, programme_count: int, iteration_count: int) -> dict:
+    plans = {}
+    for f in range(faculty_count):
+        faculty = plans.setdefault(f"{fixtures.FACULTIES[f % len(fixtures.FACULTIES)][1]} {f}", {})
+        for p in range(programme_count):
+            programme = faculty.setdefault(f"Program {f}-{p} Mühendisliği", {})
+            for i in range(iteration_count):
+                semesters = []
+                for _ in range(rng.randint(6, 8)):  # Some iterations have fewer semesters, they are padded.
+                    semester = [fixtures.course_code(rng) for _ in range(rng.randint(4, 8))]
+                    if rng.random() < .3:
+                        semester.append({"Seçmeli Ders": [fixtures.course_code(rng) for _ in range(rng.randint(0, 12))]})
+                    semesters.append(semester)
+                programme[f"{2000 + i}-{2001 + i} Güz Dönemi Sonrası"] = semesters
+
+    return plans
+
+
+def measure(name: str, func, repeat: int = 5) -> None:
+    """Prints the median duration of `func` and the peak memory it allocated in a separate run."""
+    durations = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        func()
+        durations.append(perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"    {name:<26}{sorted(durations)[repeat // 2] * 1000:>10.2f} ms{peak / 1024 / 1024:>10.2f} MB peak")
+
+
+def read_with_store(programmes: list[tuple[str, str]]) -> None:
+    with CoursePlanStore() as store:
+        for faculty, programme in programmes:
+            store.get_plans(faculty, programme)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the course plan store.")
+    parser.add_argument("-faculties", type=int, default=13)
+    parser.add_argument("-programmes", type=int, default=20, help="programmes per faculty.")
+    parser.add_argument("-iterations", type=int, default=6, help="iterations per programme.")
+    args = parser.parse_args()
+
+    Logger.log_level = 0
+    os.chdir(tempfile.mkdtemp(prefix="itu-course-plans-"))
+    os.makedirs("data")
+
+    plans = get_random_plans(random.Random(0), args.faculties, args.programmes, args.iterations)
+    save_course_plans(copy.deepcopy(plans))
+    with open(COURSE_PLANS_FILE_PATH, "rb") as f:
+        saved = f.read()
+
+    # The store must read the same plans as the old parser, so the merged plans are written the same.
+    legacy = read_course_plans_legacy(COURSE_PLANS_FILE_PATH)
+    with CoursePlanStore() as store:
+        assert list(store.faculties) == list(legacy)
+        for faculty in legacy:
+            assert store.get_programmes(faculty) == list(legacy[faculty])
+            for programme in legacy[faculty]:
+                assert store.get_plans(faculty, programme) == legacy[faculty][programme]
+
+    # Nothing new, everything is merged from the file.
+    save_course_plans({})
+    with open(COURSE_PLANS_FILE_PATH, "rb") as f:
+        assert f.read() == saved, "Merging all the plans from the file changed it."
+
+    # The index built by a scan must be the one written on save.
+    with CoursePlanStore() as store:
+        saved_index = store.faculties
+    os.remove(COURSE_PLANS_INDEX_FILE_PATH)
+    with CoursePlanStore() as store:
+        assert store.faculties == saved_index
+
+    faculties = list(legacy)
+    one_programme = [(faculties[0], next(iter(legacy[faculties[0]])))]
+    # A run that scraped all faculties but one merges that faculty's programmes.
+    partial_run = [(faculties[-1], programme) for programme in legacy[faculties[-1]]]
+
+    print(f"{len(saved) / 1024 / 1024:.1f} MB of course plans, {args.faculties * args.programmes} programmes:")
+    measure("parse the whole file", lambda: read_course_plans_legacy(COURSE_PLANS_FILE_PATH))
+    measure("store, one programme", lambda: read_with_store(one_programme))
+    measure("store, one faculty", lambda: read_with_store(partial_run))
+
+    def index_from_scratch():
+        os.remove(COURSE_PLANS_INDEX_FILE_PATH)
+        CoursePlanStore().close()
+
+    measure("index the file", index_from_scratch)
+    # The other faculties are streamed from the existing file.
+    measure("save, one faculty scraped", lambda: save_course_plans({faculties[0]: copy.deepcopy(plans[faculties[0]])}))
@@ -0,0 +1,85 @@
+"""
+Compares the web drivers with and without the scrape profile (see `DriverManager.create_driver`): a few drivers
+load the course, final exam and lesson pages of the mock ITU site in parallel, then the mean page load time,
+the requests the site got and the RSS of each driver's processes are reported.
+
+Usage: python benchmarks/driver_profile.py [-drivers 4] [-pages 30] [-latency 0.02]
+"""
+from time import perf_counter
+import argparse
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from driver_manager import DriverManager
+from scraper import Scraper
+from mock_itu_site import MockItuServer, MockItuSite
+
+
+def get_page_urls(base_url: str, page_count: int) -> list[str]:
+    urls = [
+        lambda i: f"{base_url}/TR/ogrenci/lisans/ders-bilgileri/ders-bilgileri.php?subj=BLG&numb={100 + i}",
+        lambda i: f"{base_url}/public/FinalTakvimi/FinalTakvimiByDersBransKodu",
+        lambda i: f"{base_url}/public/DersProgram",
+    ]
+    return [urls[i % len(urls)](i) for i in range(page_count)]
+
+
+def driver_routine(urls: list[str], rss_values: list, index: int) -> None:
+    driver = DriverManager.create_driver()
+    try:
+        scraper = Scraper(driver)
+        for url in urls:
+            scraper.load_page(url, driver)
+
+        rss_values[index] = DriverManager.get_rss(driver)
+    finally:
+        DriverManager.kill_driver(driver)
+
+
+def measure(server: MockItuServer, driver_count: int, page_count: int) -> dict:
+    for key in ("page_loads", "page_load_time"):
+        DriverManager.stats[key] = 0
+    server.reset_counts()
+
+    urls, rss_values = get_page_urls(server.base_url, page_count), [0.0] * driver_count
+    threads = [threading.Thread(target=driver_routine, args=(urls, rss_values, i)) for i in range(driver_count)]
+    t0 = perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    stats = DriverManager.stats
+    return {
+        "wall_time": perf_counter() - t0,  # Including the creation of the drivers.
+        "page_load_time": stats["page_load_time"] / max(stats["page_loads"], 1),
+        "requests_per_page": server.request_count / max(stats["page_loads"], 1),
+        "rss": rss_values,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the scrape profile of the web drivers.")
+    parser.add_argument("-drivers", type=int, default=4, help="drivers loading pages at the same time.")
+    parser.add_argument("-pages", type=int, default=30, help="pages loaded by each driver.")
+    parser.add_argument("-latency", type=float, default=.02, help="seconds added to every response.")
+    args = parser.parse_args()
+
+    server = MockItuServer(MockItuSite(), 0, args.latency)
+    server.start()
+
+    print(f"{args.drivers} drivers loading {args.pages} pages each:")
+    for name, enabled in [("default", False), ("scrape", True)]:
+        DriverManager.scrape_profile_enabled = enabled
+        result = measure(server, args.drivers, args.pages)
+        print(
+            f"    {name:<8} {result['page_load_time'] * 1000:>7.1f} ms per page load, "
+            f"{result['requests_per_page']:.1f} requests per page, {result['wall_time']:.2f} s in total"
+        )
+        print(
+            f"    {'':<8} RSS of each driver: {', '.join(f'{rss:.0f}' for rss in result['rss'])} MB "
+            f"(mean {sum(result['rss']) / len(result['rss']):.0f} MB)"
+        )
+
+    server.shutdown()
@@ -0,0 +1,139 @@
+"""
+Runs `run.py` for each scrap target against the mock ITU site (see `mock_itu_site.py`), and writes the wall time,
+items per second, WebDriver command count, HTTP request count and peak RSS of each run to a JSON report.
+Reports of different commits can be compared with `-compare`.
+
+The targets run in a temporary directory, in the given order. The later targets read the outputs of the earlier
+ones (e.g. `course` reads the lessons and the course plans), so keep them in the default order.
+
+Usage: python benchmarks/end_to_end.py [-targets misc lesson course_plan course final_exam] [-latency 0.02]
+                                       [-error_rate 0.01] [-no_scrape_profile] [-output report.json]
+                                       [-compare old_report.json]
+"""
+from datetime import datetime
+from time import perf_counter
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from mock_itu_site import MockItuServer, MockItuSite
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUN_SCRIPT = os.path.join(REPO_DIR, "src", "run.py")
+TARGETS = ["misc", "lesson", "course_plan", "course", "final_exam"]
+COMPARED_STATS = [
+    "wall_time", "items_per_second", "webdriver_commands", "http_requests", "peak_rss_mb", "mean_page_load_seconds",
+    "mean_driver_rss_mb",
+]
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_target(target: str, server: MockItuServer, work_dir: str, extra_args: list) -> dict:
+    stats_path = os.path.join(work_dir, f"{target}_stats.json")
+    env = dict(os.environ, ITU_OBS_BASE_URL=server.base_url, ITU_SIS_BASE_URL=server.base_url)
+    server.reset_counts()
+
+    t0 = perf_counter()
+    with open(os.path.join(work_dir, f"{target}.log"), "w", encoding="utf-8") as log:
+        process = subprocess.Popen(
+            [sys.executable, RUN_SCRIPT, "-scrap_target", target, "-stats_output", stats_path] + extra_args,
+            cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+        # wait4 gives the resource usage of this run alone, including the browsers it started.
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    result = {
+        "exit_code": process.returncode,
+        "total_time": perf_counter() - t0,  # Including the interpreter start up and the shutdown.
+        "server_requests": server.request_count,
+        "injected_errors": server.injected_error_count,
+        "peak_process_rss_mb": rusage.ru_maxrss / 1024,  # Of the largest process, e.g. a browser.
+    }
+
+    if process.returncode == 0 and os.path.exists(stats_path):
+        with open(stats_path, "r", encoding="utf-8") as f:
+            result.update(json.load(f))
+    else:
+        result["log"] = os.path.join(work_dir, f"{target}.log")
+
+    return result
+
+
+def print_report(report: dict, other: dict = None) -> None:
+    print(f"\n{'target':<14}{'stat':<22}{'value':>14}" + (f"{'before':>14}{'change':>10}" if other else ""))
+    for target, result in report["targets"].items():
+        if result["exit_code"] != 0:
+            print(f"{target:<14}failed with exit code {result['exit_code']}, see {result.get('log')}")
+            continue
+
+        other_result = (other or {}).get("targets", {}).get(target, {})
+        for stat in COMPARED_STATS:
+            value = result.get(stat)
+            if value is None:
+                continue
+
+            line = f"{target:<14}{stat:<22}{value:>14.2f}"
+            before = other_result.get(stat)
+            if other and before:
+                line += f"{before:>14.2f}{(value - before) / before:>+10.1%}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the scrap targets against a local mock of ITU's sites.")
+    parser.add_argument("-targets", nargs="+", default=TARGETS, choices=TARGETS)
+    parser.add_argument("-latency", type=float, default=.02, help="seconds added to every response.")
+    parser.add_argument("-jitter", type=float, default=.01, help="up to this many seconds are randomly added to the latency.")
+    parser.add_argument("-error_rate", type=float, default=0, help="ratio of the requests answered with 503.")
+    parser.add_argument("-seed", type=int, default=0)
+    parser.add_argument("-lesson_engine", type=str, default="http", choices=["http", "chrome"])
+    parser.add_argument("-no_scrape_profile", action="store_true", help="run the web drivers without the scrape profile.")
+    parser.add_argument("-output", type=str, help="path of the JSON report. (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("-compare", type=str, help="a previous report to compare with.")
+    args = parser.parse_args()
+
+    server = MockItuServer(MockItuSite(args.seed), 0, args.latency, args.jitter, args.error_rate, args.seed)
+    server.start()
+    print(f"Serving the mock ITU site at {server.base_url}")
+
+    commit = get_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "targets": {},
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="itu-benchmark-")
+    os.makedirs(os.path.join(work_dir, "data"))
+    for target in args.targets:
+        print(f"Running the \"{target}\" target...")
+        extra_args = ["-lesson_engine", args.lesson_engine] if target == "lesson" else []
+        if args.no_scrape_profile:
+            extra_args.append("-no_scrape_profile")
+        report["targets"][target] = run_target(target, server, work_dir, extra_args)
+    server.shutdown()
+
+    output_path = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{commit or 'report'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    other = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            other = json.load(f)
+
+    print_report(report, other)
+    print(f"\nThe report is written to {output_path}, the outputs and logs of the runs are in {work_dir}")
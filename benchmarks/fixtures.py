@@ -0,0 +1,88 @@
+"""
+Synthetic versions of ITU's pages, shaped like the real ones, for the benchmarks.
+"""
+import random
+
+SUBJECTS = ["BLG", "MAT", "FIZ", "KIM", "EHB", "ELK", "END", "INS", "MAK", "YZV", "HSS", "ING", "TUR", "ATA"]
+FACULTIES = [
+    ("BB", "Bilgisayar ve Bilişim Fakültesi"),
+    ("EE", "Elektrik - Elektronik Fakültesi"),
+    ("FE", "Fen - Edebiyat Fakültesi"),
+    ("IN", "İnşaat Fakültesi"),
+    ("MK", "Makina Fakültesi"),
+]
+DAYS = ["Pazartesi", "Salı", "Çarşamba", "Perşembe", "Cuma"]
+
+
+def page(body: str, title: str = "İTÜ OBS") -> str:
+    # The real pages come with a lot of markup around the tables.
+    navigation = "".join(f"<li class='nav-item'><a class='nav-link' href='/public/menu/{i}'>Menü {i}</a></li>" for i in range(40))
+    return (
+        "<!DOCTYPE html><html lang='tr'><head><meta charset='utf-8'>"
+        f"<title>{title}</title><link rel='stylesheet' href='/css/site.css'>"
+        "<script async src='/www.googletagmanager.com/gtag/js'></script>"
+        "<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>"
+        "</head><body><header><img src='/images/logo.png' alt='İTÜ'><nav><ul class='navbar-nav'>" + navigation + "</ul></nav></header>"
+        f"<main class='container'>{body}</main>"
+        "<footer><p>İstanbul Teknik Üniversitesi &copy; 2025</p></footer></body></html>"
+    )
+
+
+def course_code(rng: random.Random) -> str:
+    return f"{rng.choice(SUBJECTS)} {rng.randint(100, 499)}{rng.choice(['', 'E'])}"
+
+
+def iterations_page(programme_code: str, iteration_count: int = 6) -> str:
+    rows = "".join(
+        f"<tr><td><a class='btn' href='/public/DersPlan/DersPlanDetay/{programme_code}{i}'>Görüntüle</a></td>"
+        f"<td>{programme_code} Lisans Programı (%100 İngilizce) {2010 + i}-{2011 + i} / Güz Dönemi Sonrası</td></tr>"
+        for i in range(iteration_count)
+    )
+    return page(f"<table class='table'><thead><tr><th></th><th>Plan</th></tr></thead><tbody>{rows}</tbody></table>")
+
+
+def invalid_iterations_page() -> str:
+    return page("<h1 class='text-danger'>Program bulunamadı.</h1>")
+
+
+def iteration_page(seed: int = 0, semester_count: int = 8, course_count: int = 7) -> str:
+    rng = random.Random(seed)
+    tables = ""
+    for semester in range(semester_count):
+        rows = ""
+        for i in range(course_count):
+            if i == course_count - 1:
+                rows += (
+                    f"<tr><td><a class='btn btn-sm' href='/public/DersPlan/SecmeliDersler/{seed % 5}{semester}'>Dersler</a></td>"
+                    f"<td>\n  Seçmeli Ders Havuzu {semester % 3}\n</td><td>3</td><td>5</td></tr>"
+                )
+            else:
+                rows += f"<tr><td><a href='/public/DersPlan/Ders/{i}'>{course_code(rng)}</a></td><td>Ders Adı {i}</td><td>3</td><td>5</td></tr>"
+
+        tables += (
+            f"<h4>{semester + 1}. Yarıyıl</h4><table class='table table-bordered'><thead><tr><th>Ders Kodu</th>"
+            f"<th>Ders Adı</th><th>Kredi</th><th>AKTS</th></tr></thead><tbody>{rows}</tbody></table>"
+        )
+    return page(tables)
+
+
+def selective_page(seed: int = 0, course_count: int = 40) -> str:
+    rng = random.Random(seed)
+    rows = "".join(f"<tr><td><a href='/public/DersPlan/Ders/{i}'>\n{course_code(rng)} </a></td><td>Ders Adı</td></tr>" for i in range(course_count))
+    return page(f"<table class='table'><tr><th>Ders Kodu</th><th>Ders Adı</th></tr>{rows}</table>")
+
+
+def building_codes_page(building_count: int = 300) -> str:
+    rows = "".join(
+        f"<tr><td>B{i:03d}</td><td>Bina {i}{' (Maçka)' if i % 4 == 0 else ''}</td></tr>" for i in range(building_count)
+    )
+    return page(f"<table class='table'>{rows}</table>")
+
+
+def programme_codes_page(programmes_per_faculty: int = 20) -> str:
+    rows = ""
+    for faculty_code, faculty in FACULTIES:
+        rows += f"<tr><td colspan='2'>{faculty_code}-{faculty}</td></tr><tr></tr>"
+        for i in range(programmes_per_faculty):
+            rows += f"<tr><td>{faculty_code}{i:02d}</td><td>Program {i} Lisans Programı</td></tr>"
+    return page(f"<table class='table'>{rows}</table>")
@@ -0,0 +1,120 @@
+"""
+Checks that `parse_lesson_rows` gives the same lines as the row by row parser `run.py` used before, on random
+rows made of the tags, whitespace and characters that change its output, then compares their speeds on 10 and
+100 times the lessons of a semester. `tests/test_lesson_rows.py` runs the same check with the tests.
+
+Usage: python benchmarks/lesson_row_benchmark.py [-rows 6000] [-cases 20000] [-seed 0]
+"""
+from time import perf_counter
+import argparse
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from records import parse_lesson_rows
+from mock_itu_site import MockItuSite
+
+
+# === The row by row parser, as it was in run.py ===
+def extract_from_a(a):
+    if ">" not in a:
+        return a
+    return a.split(">")[1].split("<")[0].strip()
+
+
+def split_lesson_row(row):
+    return row.replace("<tr>", "").replace(
+        "</tr>", "").replace("</td>", "").replace("<br>", " ").replace("</br>", "").split("<td>")[1:]
+
+
+def process_lesson_row(row):
+    data = split_lesson_row(row)
+
+    processed_row = data[0] + "|"  # CRN
+    processed_row += extract_from_a(data[1]) + "|"  # Course Code
+    processed_row += data[3] + "|"  # Teaching Method
+    processed_row += data[4] + "|"  # Instructor
+    processed_row += extract_from_a(data[5]) + "|"  # Building
+    processed_row += data[6] + "|"  # Day
+    processed_row += data[7] + "|"  # Time
+    processed_row += data[8] + "|"  # Room
+    processed_row += data[9] + "|"  # Capacity
+    processed_row += data[10] + "|"  # Enrolled
+    processed_row += extract_from_a(data[12])  # Major Rest.
+
+    # Remove multiple spaces and tabs.
+    return re.sub(r'\s*\|\s*', '|', processed_row.replace("\n", "").replace("\t", "")).strip()
+
+
+# The pieces the random cells are made of, mostly the ones the parsers treat specially.
+CELL_PIECES = [
+    "<a href='/x'>", "<a>", "</a>", "<br>", "</br>", "<b>", "</b>", "<", ">", "|", " | ", " ", "  ", "\n", "\t", "\r",
+    "\xa0", " ", "\x1c", "<tr>", "</tr>", "</td>", "<t", "d>", "&amp;", "BLG 101E", "Ayazağa", "İ", "x", "",
+]
+
+
+def random_cell(rng: random.Random) -> str:
+    return "".join(rng.choice(CELL_PIECES) for _ in range(rng.randint(0, 6)))
+
+
+def random_row(rng: random.Random) -> str:
+    # Most rows have the 13 cells of the tables, some have fewer or more, or a start tag with attributes.
+    cell_count = rng.choice([13] * 8 + [12, 14, 20])
+    start = rng.choice(["<tr>", "<tr>", "<tr class='x'>", ""])
+    return start + "".join(f"<td>{random_cell(rng)}</td>" for _ in range(cell_count)) + rng.choice(["</tr>", "", "\n"])
+
+
+def legacy_parse(rows: list[str]):
+    try:
+        return [process_lesson_row(row) for row in rows]
+    except IndexError:
+        return IndexError
+
+
+def batch_parse(rows: list[str]):
+    try:
+        return parse_lesson_rows(rows)
+    except IndexError:
+        return IndexError
+
+
+def check_equivalence(rng: random.Random, case_count: int) -> None:
+    for case in range(case_count):
+        rows = [random_row(rng) for _ in range(rng.randint(0, 8))]
+        expected, output = legacy_parse(rows), batch_parse(rows)
+        assert output == expected, f"Case {case} differs:\nrows: {rows!r}\nexpected: {expected!r}\noutput: {output!r}"
+
+
+def get_semester_rows(row_count: int) -> list[str]:
+    # Rows like the real ones, from the mock site.
+    site = MockItuSite()
+    rows = [row for lessons in site.lessons.values() for row in lessons]
+    return [rows[i % len(rows)] for i in range(row_count)]
+
+
+def measure(func, rows: list[str]) -> float:
+    t0 = perf_counter()
+    func(rows)
+    return perf_counter() - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the lesson row parsers.")
+    parser.add_argument("-rows", type=int, default=6000, help="lessons of a semester, roughly.")
+    parser.add_argument("-cases", type=int, default=20000, help="random cases checked for the equivalence.")
+    parser.add_argument("-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_equivalence(random.Random(args.seed), args.cases)
+    print(f"parse_lesson_rows gave the same output as the row by row parser in {args.cases} random cases.\n")
+
+    print(f"{'rows':>10}{'row by row (ms)':>18}{'batch (ms)':>14}{'speed up':>10}")
+    for multiplier in (1, 10, 100):
+        rows = get_semester_rows(args.rows * multiplier)
+        assert legacy_parse(rows) == batch_parse(rows)
+
+        legacy_time, batch_time = measure(legacy_parse, rows), measure(batch_parse, rows)
+        print(f"{len(rows):>10}{legacy_time * 1000:>18.1f}{batch_time * 1000:>14.1f}{legacy_time / batch_time:>9.2f}x")
@@ -0,0 +1,75 @@
+"""
+Compares the time the scraper threads spend logging with the old synchronous `Logger`, which rendered and printed
+every message in the calling thread, and with the queue based one. The console output goes to /dev/null.
+
+Usage: python benchmarks/logger_benchmark.py [-threads 8] [-messages 2000]
+"""
+from contextlib import redirect_stdout
+from datetime import datetime
+from time import perf_counter
+import argparse
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rich import print as rprint
+
+from logger import Logger
+
+
+def legacy_log_info(message: str) -> None:
+    # The old `Logger.log`: the message is rendered and printed by the calling thread.
+    time_stamp = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}"
+    rprint(f"[#999999][{time_stamp}][INFO][/#999999][white] {message}[/white]")
+
+
+def legacy_worker(thread_no: int, message_count: int, durations: list) -> None:
+    prefix = f"[royal_blue1][Thread {str(thread_no).zfill(2)}][/royal_blue1]"
+    t0 = perf_counter()
+    for i in range(message_count):
+        legacy_log_info(f"{prefix} Scraping the iteration: [link=https://obs.itu.edu.tr/{i}][dark_magenta]2010-2011 / Güz[/dark_magenta][/link].")
+    durations[thread_no] = perf_counter() - t0
+
+
+def queued_worker(thread_no: int, message_count: int, durations: list) -> None:
+    Logger.set_context(thread=str(thread_no).zfill(2))
+    t0 = perf_counter()
+    for i in range(message_count):
+        Logger.log_info("Scraping the iteration: [link={}][dark_magenta]{}[/dark_magenta][/link].", f"https://obs.itu.edu.tr/{i}", "2010-2011 / Güz")
+    durations[thread_no] = perf_counter() - t0
+
+
+def measure(worker, thread_count: int, message_count: int) -> tuple[float, float, int]:
+    """Returns the mean time a thread spent logging, the wall time until everything was written and the dropped messages."""
+    durations = [0.0] * thread_count
+    t0 = perf_counter()
+    threads = [threading.Thread(target=worker, args=(i, message_count, durations)) for i in range(thread_count)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    dropped_count = Logger.dropped_count  # Reset by the flush.
+    Logger.flush()
+    return sum(durations) / thread_count, perf_counter() - t0, dropped_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the logger with multiple threads.")
+    parser.add_argument("-threads", type=int, default=8)
+    parser.add_argument("-messages", type=int, default=2000, help="messages logged by each thread.")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        legacy = measure(legacy_worker, args.threads, args.messages)
+        queued = measure(queued_worker, args.threads, args.messages)
+
+    message_count = args.threads * args.messages
+    print(f"{args.threads} threads logging {args.messages} messages each:")
+    for name, (thread_time, wall_time, _) in [("synchronous", legacy), ("queued", queued)]:
+        print(
+            f"    {name:<12} {thread_time * 1000:>9.1f} ms spent logging per thread "
+            f"({thread_time / args.messages * 1e6:.1f} µs per message), {wall_time:.2f} s until written"
+        )
+    print(f"    {queued[2]} of {message_count} messages were dropped because the queue stayed full.")
+    if queued[2] > 0:
+        sys.exit(1)  # The queued times would include messages that were never written.
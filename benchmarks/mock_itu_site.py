@@ -0,0 +1,302 @@
+"""
+A local stand-in for ITU's sites, serving synthetic versions of the pages the scrapers use, so that the scrapers
+can be benchmarked without hitting ITU's servers. Both the OBS and the SIS pages are served from the same host,
+point the scrapers to it with the `ITU_OBS_BASE_URL` and `ITU_SIS_BASE_URL` environment variables.
+
+Usage: python benchmarks/mock_itu_site.py [-port 8000] [-latency 0.05] [-jitter 0.02] [-error_rate 0.01]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+import fixtures
+
+MENU_LANG = "<a class='menu-lang' href='#'>ENGLISH</a>"
+LESSON_HEADER_ROW = "<tr class='table-baslik'><td>CRN</td><td>Ders Kodu</td><td>Ders Adı</td><td>Öğretim Yöntemi</td></tr>"
+
+LESSONS_PAGE_SCRIPT = """
+const level = document.getElementById("programSeviyeTipiAnahtari");
+const branch = document.getElementById("dersBransKoduId");
+const container = document.getElementById("dersProgramContainer");
+
+level.addEventListener("change", () => {
+    const xhr = new XMLHttpRequest();
+    xhr.open("GET", "/public/DersProgram/SearchBransKoduByProgramSeviye?programSeviyeTipiAnahtari=" + level.value);
+    xhr.onload = () => JSON.parse(xhr.responseText).forEach(b => branch.add(new Option(b.dersBransKodu, b.bransKoduId)));
+    xhr.send();
+});
+
+document.getElementById("submit").addEventListener("click", () => {
+    const xhr = new XMLHttpRequest();
+    xhr.open("GET", "/public/DersProgram/DersProgramSearch?programSeviyeTipiAnahtari=" + level.value + "&dersBransKoduId=" + branch.value);
+    xhr.onload = () => {
+        container.innerHTML = xhr.responseText;
+        if (container.querySelectorAll("tr:not(.table-baslik)").length === 0) alert("Kayıt bulunamadı.");
+    };
+    xhr.send();
+});
+"""
+
+FINAL_EXAM_PAGE_SCRIPT = """
+const container = document.getElementById("finalTakvimiTableContainer");
+
+document.getElementById("finalForm").addEventListener("submit", e => {
+    e.preventDefault();
+    const xhr = new XMLHttpRequest();
+    xhr.open("GET", "/public/FinalTakvimi/FinalTakvimiTable?dersBransKoduId=" + document.getElementById("DersBransKoduId").value);
+    xhr.onload = () => {
+        container.innerHTML = xhr.responseText;
+        container.style.display = "block";
+    };
+    xhr.send();
+});
+"""
+
+# The subresources of the pages, the scrapers don't read them but the browsers load them. The sizes are like the real ones'.
+ASSETS = {
+    "/css/site.css": ("text/css", "@font-face { font-family: Site; src: url('/fonts/site.woff2'); }\n" + "body { margin: 0; }\n" * 8000),
+    "/fonts/site.woff2": ("font/woff2", "F" * 90_000),
+    "/images/logo.png": ("image/png", "P" * 150_000),
+    "/www.googletagmanager.com/gtag/js": ("application/javascript", "window.gtagLoaded = true;\n" * 4000),
+}
+
+
+class MockItuSite:
+    """The synthetic data of the site, generated from `seed`, and the pages built from it."""
+
+    def __init__(self, seed: int = 0, lessons_per_subject: int = 40, programmes_per_faculty: int = 8) -> None:
+        self.seed = seed
+        self.programmes_per_faculty = programmes_per_faculty
+
+        rng = random.Random(seed)
+        self.branch_codes = [(i + 1, subject) for i, subject in enumerate(fixtures.SUBJECTS)]
+        self.lessons = {}  # Lesson rows by their branch code ids, some subjects have no lessons.
+        crn = 10000
+        for branch_code_id, subject in self.branch_codes:
+            self.lessons[branch_code_id] = []
+            if branch_code_id % 7 == 0:
+                continue
+
+            for _ in range(lessons_per_subject):
+                crn += 1
+                self.lessons[branch_code_id].append(self.lesson_row(rng, crn, subject))
+
+    @staticmethod
+    def lesson_row(rng: random.Random, crn: int, subject: str) -> str:
+        course_code = f"{subject} {rng.randint(100, 499)}{rng.choice(['', 'E'])}"
+        return (
+            f"<tr><td>{crn}</td><td><a href='/public/DersPlan/Ders/{crn}'>{course_code}</a></td><td>Ders Adı</td>"
+            f"<td>Yüz Yüze</td><td>Ad Soyad</td><td><a href='#'>EEB</a></td><td>{rng.choice(fixtures.DAYS)}</td>"
+            f"<td>0830/1129</td><td>{rng.randint(1000, 5999)}</td><td>60</td><td>{rng.randint(0, 60)}</td><td>-</td>"
+            f"<td>{subject}, BLG</td></tr>"
+        )
+
+    @staticmethod
+    def is_dead_course(code: str) -> bool:
+        # About one in ten course codes don't have a page, like the old codes in the course plans.
+        return int(hashlib.sha1(code.encode("utf-8")).hexdigest(), 16) % 10 == 0
+
+    # === OBS ===
+    def lessons_page(self) -> str:
+        return fixtures.page(
+            f"{MENU_LANG}<select id='programSeviyeTipiAnahtari'><option value=''>Seçiniz</option><option value='LS'>Lisans</option></select>"
+            "<select id='dersBransKoduId'><option value=''>Ders Kodu Seçiniz</option></select>"
+            "<button type='button' id='submit'>Göster</button><div id='dersProgramContainer'></div>"
+            f"<script>{LESSONS_PAGE_SCRIPT}</script>"
+        )
+
+    def branch_codes_json(self) -> str:
+        return json.dumps([{"bransKoduId": i, "dersBransKodu": subject} for i, subject in self.branch_codes])
+
+    def lesson_table(self, branch_code_id: str) -> str:
+        rows = self.lessons.get(int(branch_code_id or 0), [])
+        return f"<table class='table'>{LESSON_HEADER_ROW}{''.join(rows)}</table>"
+
+    def course_plan_iterations_page(self, programme_code: str, plan_type: str) -> str:
+        # Only the undergraduate plans exist, the scraper tries the others if these are missing.
+        if plan_type != "lisans":
+            return fixtures.invalid_iterations_page()
+
+        return fixtures.iterations_page(programme_code.split("_")[0], iteration_count=3)
+
+    def course_plan_page(self, plan_id: str) -> str:
+        # A few distinct plans, so that the course target has a few hundred course codes to scrap.
+        seed = int(hashlib.sha1(plan_id.encode("utf-8")).hexdigest(), 16) % 10
+        return fixtures.iteration_page(seed)
+
+    def selective_page(self, selective_id: str) -> str:
+        return fixtures.selective_page(int(selective_id), course_count=15)
+
+    def final_exam_page(self) -> str:
+        options = "".join(f"<option value='{i}'>{subject}</option>" for i, subject in self.branch_codes)
+        return fixtures.page(
+            f"{MENU_LANG}<form id='finalForm'><select id='DersBransKoduId' name='dersBransKoduId'>"
+            f"<option value=''>Seçiniz</option>{options}</select><button type='submit'>Ara</button></form>"
+            "<div id='finalTakvimiTableContainer' style='display: none'></div>"
+            f"<script>{FINAL_EXAM_PAGE_SCRIPT}</script>"
+        )
+
+    def final_exam_table(self, branch_code_id: str) -> str:
+        lessons = self.lessons.get(int(branch_code_id or 0), [])
+        if len(lessons) == 0:
+            return "<p>Final sınav takvimi henüz yayınlanmamıştır.</p>"
+
+        rng = random.Random(f"{self.seed}-{branch_code_id}")
+        subject = dict(self.branch_codes)[int(branch_code_id)]
+        rows = "".join(
+            f"<tr><td>{20000 + i}</td><td>{subject}</td><td>{rng.randint(100, 499)}</td><td>Ders Adı</td><td>Ad Soyad</td>"
+            f"<td>Final</td><td>EEB 5101<br>EEB 5102</td><td>{rng.choice(fixtures.DAYS)}</td><td>09:00</td><td>01.06.2025</td></tr>"
+            for i in range(len(lessons) // 2)
+        )
+        return f"<table class='table'><tr><th>CRN</th><th>Ders Kodu</th></tr>{rows}</table>"
+
+    # === SIS ===
+    def course_page(self, subject: str = None, number: str = None) -> str:
+        form = (
+            f"{MENU_LANG}<form method='get'><input name='subj'><input name='numb'><input type='submit' value='Göster'></form>"
+        )
+        if subject is None or self.is_dead_course(f"{subject} {number}"):
+            return fixtures.page(form)
+
+        cells = [
+            ["Ders Bilgileri"], ["Ders Kodu", "Ders Adı", "Dili"], [f"{subject} {number}", f"{subject} Dersi {number}", "İngilizce"],
+            ["Kredi", "AKTS"], ["3", "5"], ["Önşartlar"], ["Önşartlar", f"{subject} 101 MIN DD"],
+            ["Sınıf Önşartı", "Yok"], ["Ders Tanımı"], [f"{subject} {number} dersinin tanımı.\nİkinci satır."],
+        ]
+        rows = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in cells)
+        return fixtures.page(f"{form}<table class='table'><tbody>{rows}</tbody></table>")
+
+    def building_codes_page(self) -> str:
+        return fixtures.building_codes_page()
+
+    def programme_codes_page(self) -> str:
+        return fixtures.programme_codes_page(self.programmes_per_faculty)
+
+    def get_response(self, path: str, query: dict) -> tuple[int, str, str]:
+        """Returns the status, content type and body of a request."""
+        get = lambda name: query.get(name, [None])[0]
+
+        if path == "/public/DersProgram":
+            return 200, "text/html", self.lessons_page()
+        if path == "/public/DersProgram/SearchBransKoduByProgramSeviye":
+            return 200, "application/json", self.branch_codes_json()
+        if path == "/public/DersProgram/DersProgramSearch":
+            return 200, "text/html", self.lesson_table(get("dersBransKoduId"))
+        if path == "/public/DersPlan/DersPlanlariList":
+            return 200, "text/html", self.course_plan_iterations_page(get("programKodu") or "", get("planTipiKodu"))
+        if path.startswith("/public/DersPlan/DersPlanDetay/"):
+            return 200, "text/html", self.course_plan_page(path.rsplit("/", 1)[1])
+        if path.startswith("/public/DersPlan/SecmeliDersler/"):
+            return 200, "text/html", self.selective_page(path.rsplit("/", 1)[1])
+        if path == "/public/FinalTakvimi/FinalTakvimiByDersBransKodu":
+            return 200, "text/html", self.final_exam_page()
+        if path == "/public/FinalTakvimi/FinalTakvimiTable":
+            return 200, "text/html", self.final_exam_table(get("dersBransKoduId"))
+        if path == "/TR/ogrenci/lisans/ders-bilgileri/ders-bilgileri.php":
+            return 200, "text/html", self.course_page(get("subj"), get("numb"))
+        if path == "/TR/obs-hakkinda/bina-kodlari.php":
+            return 200, "text/html", self.building_codes_page()
+        if path == "/TR/obs-hakkinda/lisans-program-kodlari.php":
+            return 200, "text/html", self.programme_codes_page()
+        if path in ASSETS:
+            return 200, *ASSETS[path]
+
+        return 404, "text/html", fixtures.page("<h1>404</h1>")
+
+
+class MockItuServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, site: MockItuSite, port: int = 0, latency: float = 0, jitter: float = 0, error_rate: float = 0, seed: int = 0):
+        super().__init__(("127.0.0.1", port), MockItuRequestHandler)
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.injected_error_count = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            self.request_count += 1
+            if self.rng.random() >= self.error_rate:
+                return False
+
+            self.injected_error_count += 1
+            return True
+
+    def get_delay(self) -> float:
+        with self.lock:
+            return self.latency + self.rng.uniform(0, self.jitter)
+
+    def reset_counts(self) -> None:
+        with self.lock:
+            self.request_count = 0
+            self.injected_error_count = 0
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class MockItuRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like ITU's servers.
+
+    def do_GET(self) -> None:
+        time.sleep(self.server.get_delay())
+
+        if self.server.should_fail():
+            self.send_body(503, "text/html", "<h1>503 Service Unavailable</h1>")
+            return
+
+        url = urlparse(self.path)
+        status, content_type, body = self.server.site.get_response(url.path, parse_qs(url.query))
+        self.send_body(status, content_type, body)
+
+    def send_body(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode("utf-8")
+        etag = f"\"{hashlib.sha1(data).hexdigest()}\""
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:
+        pass  # Too noisy, the request counts are enough.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves a mock version of ITU's pages.")
+    parser.add_argument("-port", type=int, default=8000)
+    parser.add_argument("-latency", type=float, default=0, help="seconds added to every response.")
+    parser.add_argument("-jitter", type=float, default=0, help="up to this many seconds are randomly added to the latency.")
+    parser.add_argument("-error_rate", type=float, default=0, help="ratio of the requests answered with 503.")
+    parser.add_argument("-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockItuServer(MockItuSite(args.seed), args.port, args.latency, args.jitter, args.error_rate, args.seed)
+    print(f"Serving the mock ITU site at {server.base_url}, set ITU_OBS_BASE_URL and ITU_SIS_BASE_URL to it.")
+    server.serve_forever()
@@ -0,0 +1,134 @@
+"""
+Compares the HTML parser backends on each page type: checks that every backend gives the same output as
+the BeautifulSoup code the scrapers used before, then reports the parse time and the peak memory per page.
+`tests/test_html_parser.py` runs the same checks with the tests.
+
+Usage: python benchmarks/parser_benchmark.py [-repeat 20]
+"""
+from time import perf_counter
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bs4 import BeautifulSoup
+
+from course_plan_scraper import CoursePlanScraper
+from html_parser import BACKENDS, decode_markup, is_lxml_available, parse_html
+from misc_scraper import MiscScraper
+from records import to_psv_lines
+import fixtures
+
+
+# === The BeautifulSoup code the scrapers used before the parser backends ===
+def legacy_iteration(soup):
+    program_list = []
+    for table in soup.find_all("table"):
+        semester_program = []
+        for row in table.find("tbody").find_all("tr"):
+            cells = row.find_all("td")
+            cell0_a = cells[0].find("a")
+            course_code = cell0_a.get_text().strip()
+            if "Dersler" in course_code:
+                semester_program.append({"title": cells[1].get_text(), "url": f"https://obs.itu.edu.tr{cell0_a['href']}"})
+            else:
+                semester_program.append(course_code)
+        program_list.append(semester_program)
+    return program_list
+
+
+def legacy_selective(soup):
+    table = soup.find("table")
+    if table is None:
+        return {"has_table": False, "courses": []}
+    return {"has_table": True, "courses": [r.find("a").get_text().replace("\n", "").strip() for r in table.find_all("tr")[1:]]}
+
+
+def legacy_iterations(soup):
+    if soup.find('h1', class_='text-danger'):
+        return []
+    return [
+        (row.select("td")[1].get_text().strip(), f"https://obs.itu.edu.tr{row.select('td')[0].select('a')[0]['href']}")
+        for row in soup.select('tbody tr')
+    ]
+
+
+def legacy_building_codes(soup):
+    output = ""
+    for row in soup.find_all("tr"):
+        cells = [d.get_text().strip() for d in row.find_all("td")]
+        if "(" not in cells[1]:
+            cells[1] += " (Ayazağa)"
+        splitted_name = cells[1].split("(")
+        campus_name = splitted_name[len(splitted_name) - 1].strip().replace(")", "")
+        output += f"{cells[0].strip()}|{cells[1].replace(f'({campus_name})', '').strip()}|{campus_name}\n"
+    return output
+
+
+def legacy_programme_codes(soup):
+    output, current_faculty_code, current_faculty = "", "", ""
+    for row in soup.find_all("tr"):
+        cells = [d.get_text().strip() for d in row.find_all("td")]
+        if not cells:
+            continue
+        if len(cells) == 1:
+            current_faculty_code = cells[0].split("-")[0]
+            current_faculty = cells[0].replace(f"{current_faculty_code}-", "").strip()
+            continue
+        output += f"{cells[0].strip()}|{cells[1].strip()}|{current_faculty}|{current_faculty_code}\n"
+    return output
+
+
+PAGE_TYPES = [
+    ("iteration", fixtures.iteration_page(), legacy_iteration, CoursePlanScraper.parse_iteration_page),
+    ("selective", fixtures.selective_page(), legacy_selective, CoursePlanScraper.parse_selective_page),
+    ("iterations", fixtures.iterations_page("BLGE"), legacy_iterations, CoursePlanScraper.parse_iterations_page),
+    ("invalid_iterations", fixtures.invalid_iterations_page(), legacy_iterations, CoursePlanScraper.parse_iterations_page),
+    ("building_codes", fixtures.building_codes_page(), legacy_building_codes,
+     lambda document: "".join(to_psv_lines(MiscScraper.parse_building_codes(document)))),
+    ("programme_codes", fixtures.programme_codes_page(), legacy_programme_codes,
+     lambda document: "".join(to_psv_lines(MiscScraper.parse_programme_codes(document)))),
+]
+
+
+def measure(func, repeat: int) -> tuple[float, float]:
+    """Returns the mean duration in milliseconds and the peak memory in KBs of `func`."""
+    t0 = perf_counter()
+    for _ in range(repeat):
+        func()
+    duration = (perf_counter() - t0) / repeat * 1000
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the HTML parser backends.")
+    parser.add_argument("-repeat", type=int, default=20, help="number of parses per page and backend.")
+    args = parser.parse_args()
+
+    backends = [b for b in BACKENDS if b != "lxml" or is_lxml_available()]
+    if not is_lxml_available():
+        print("lxml is not installed, skipping its backend.\n")
+
+    print(f"{'page':<20}{'backend':<14}{'size (KB)':>10}{'time (ms)':>12}{'peak (KB)':>12}")
+    for name, html, legacy, parse in PAGE_TYPES:
+        markup = html.encode("utf-8")
+        expected = legacy(BeautifulSoup(markup, "html.parser"))
+
+        cases = [("legacy", lambda: legacy(BeautifulSoup(markup, "html.parser")))]
+        for backend in backends:
+            output = parse(parse_html(markup, backend))
+            assert output == expected, f"The output of the \"{backend}\" backend differs on the \"{name}\" page."
+            cases.append((backend, lambda backend=backend: parse(BACKENDS[backend](decode_markup(markup)))))
+
+        for backend, func in cases:
+            duration, peak = measure(func, args.repeat)
+            print(f"{name:<20}{backend:<14}{len(markup) / 1024:>10.1f}{duration:>12.2f}{peak:>12.1f}")
+
+    print("\nAll backends give the same output as the legacy parser.")
@@ -0,0 +1,123 @@
+"""
+Compares the records of `records.py` with the representations the scrapers used before them, on synthetic rows:
+per-row dicts (the final exams), pipe-joined strings re-split to read their fields (the courses), and the records.
+For each, reports the memory the rows read from PSV lines take with their fields, the time to build the rows and
+write them as PSV lines, and the time to read the lines back.
+
+Usage: python benchmarks/records_benchmark.py [-rows 100000]
+"""
+from time import perf_counter
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from records import Course, FinalExam, Lesson, to_psv_lines
+import fixtures
+
+
+def random_fields(rng: random.Random, record_type, index: int) -> tuple:
+    subject = rng.choice(fixtures.SUBJECTS)
+    words = lambda n: " ".join(rng.choice(["Ders", "Veri", "Sistem", "Analiz", "Yapı", "Giriş"]) for _ in range(n))
+    fields = [str(20000 + index), f"{subject} {rng.randint(100, 499)}E"]
+    fields += [words(rng.randint(1, 4)) for _ in range(len(record_type.__slots__) - 2)]
+    return tuple(fields)
+
+
+def build_dicts(record_type, rows: list[tuple]) -> list:
+    names = record_type.__slots__
+    return [dict(zip(names, fields)) for fields in rows]
+
+
+def write_dicts(record_type, dicts: list) -> list[str]:
+    names = record_type.__slots__
+    return ["|".join(d[name] for name in names) + "\n" for d in dicts]
+
+
+def read_dicts(record_type, lines: list[str]) -> list:
+    names = record_type.__slots__
+    return [dict(zip(names, line.rstrip("\n").split("|"))) for line in lines]
+
+
+def build_strings(record_type, rows: list[tuple]) -> list:
+    return ["|".join(fields) for fields in rows]
+
+
+def write_strings(record_type, strings: list) -> list[str]:
+    # The rows were re-split and re-joined to read and clean their fields before they were written.
+    return ["|".join(s.split("|")) + "\n" for s in strings]
+
+
+def read_strings(record_type, lines: list[str]) -> list:
+    return [line.rstrip("\n").split("|") for line in lines]
+
+
+def build_records(record_type, rows: list[tuple]) -> list:
+    return [record_type(*fields) for fields in rows]
+
+
+def write_records(record_type, records: list) -> list[str]:
+    return to_psv_lines(records)
+
+
+def read_records(record_type, lines: list[str]) -> list:
+    return [record_type.from_psv(line) for line in lines]
+
+
+REPRESENTATIONS = [
+    ("dict", build_dicts, write_dicts, read_dicts),
+    ("string", build_strings, write_strings, read_strings),
+    ("record", build_records, write_records, read_records),
+]
+
+
+def measure_memory(func) -> float:
+    """Returns the memory allocated for the result of `func` in MBs."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size / (1024 * 1024)
+
+
+def measure_time(func, repeat: int = 3) -> tuple[float, object]:
+    """Returns the median duration of `func` and its result, without the garbage collection like `timeit`."""
+    durations = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = perf_counter()
+            result = func()
+            durations.append(perf_counter() - t0)
+    finally:
+        gc.enable()
+
+    return sorted(durations)[repeat // 2], result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the record classes.")
+    parser.add_argument("-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{args.rows} rows of each type:")
+    print(f"{'type':<12}{'representation':<16}{'memory (MB)':>12}{'build+write (ms)':>18}{'read (ms)':>12}")
+    for record_type in (Lesson, Course, FinalExam):
+        rows = [random_fields(rng, record_type, i) for i in range(args.rows)]
+        expected = None
+        for name, build, write, read in REPRESENTATIONS:
+            write_time, lines = measure_time(lambda: write(record_type, build(record_type, rows)))
+            read_time, _ = measure_time(lambda: read(record_type, lines))
+            memory = measure_memory(lambda: read(record_type, lines))
+
+            # All of them must write the same lines.
+            expected = expected or lines
+            assert lines == expected, f"The {name} lines of {record_type.__name__} differ."
+            print(f"{record_type.__name__:<12}{name:<16}{memory:>12.1f}{write_time * 1000:>18.1f}{read_time * 1000:>12.1f}")
@@ -0,0 +1,63 @@
+"""
+Measures the startup of each target: the time `run.py` and the target's scrapers take to import, from the
+`-X importtime` output of a new interpreter, and the packages that take the most of it. The "all" row imports
+every scraper, like `run.py` did for every target before the scrapers were imported lazily. The targets that
+use a driver also import webdriver_manager when they create their first driver, it isn't measured here.
+
+Usage: python benchmarks/startup_benchmark.py [-repeat 5] [-top 5]
+"""
+from statistics import median
+from time import perf_counter
+import argparse
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# The scrapers each target imports, the names are the keys of `run.SCRAPERS`.
+TARGETS = {
+    "misc": ["misc"],
+    "course_plan": ["course_plan"],
+    "lesson": ["lesson"],
+    "course": ["course"],
+    "final_exam": ["final_exam"],
+    "all": ["lesson", "lesson_chrome", "course", "course_plan", "misc", "final_exam"],
+}
+
+
+def measure(scrapers: list[str]) -> tuple[float, float, dict]:
+    """Returns the import time and the wall time of a new interpreter in ms, and the import time of each package."""
+    code = f"import run\nfor name in {scrapers!r}: run.get_scraper(name)"
+    t0 = perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    wall_time = (perf_counter() - t0) * 1000
+
+    # The lines look like "import time:  self [us] | cumulative | module", nested imports are indented.
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, _, module = line[len("import time:"):].split("|")
+        package = module.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_time) / 1000
+
+    return sum(packages.values()), wall_time, packages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the startup time of each target.")
+    parser.add_argument("-repeat", type=int, default=5)
+    parser.add_argument("-top", type=int, default=5, help="number of the slowest packages to list for each target.")
+    args = parser.parse_args()
+
+    print(f"Median of {args.repeat} runs, the import time doesn't include the interpreter's own startup:")
+    for target, scrapers in TARGETS.items():
+        runs = [measure(scrapers) for _ in range(args.repeat)]
+        import_time, wall_time = median(r[0] for r in runs), median(r[1] for r in runs)
+        packages = {p: median(r[2].get(p, 0) for r in runs) for p in runs[0][2]}
+        slowest = sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]
+
+        print(f"    {target:<12} {import_time:>7.1f} ms importing, {wall_time:>7.1f} ms until ready")
+        print(f"    {'':<12} " + ", ".join(f"{p} {t:.1f} ms" for p, t in slowest))
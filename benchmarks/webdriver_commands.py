@@ -0,0 +1,112 @@
+"""
+Counts the WebDriver commands sent to read one page of each table, with the old per-element
+access pattern and with `Scraper.extract_rows`.
+
+Usage: python benchmarks/webdriver_commands.py [-rows 100]
+"""
+from urllib.parse import quote
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from selenium.webdriver.common.by import By
+
+from course_scraper import CourseScraper
+from driver_manager import DriverManager
+from scraper import Scraper
+
+
+def lesson_page(row_count):
+    rows = "".join(
+        f"<tr><td>{20000 + i}</td><td><a href='#'>MAT {100 + i}E</a></td><td>Ders</td><td>Yüz Yüze</td>"
+        "<td>Ad Soyad</td><td><a href='#'>EEB</a></td><td>Pazartesi</td><td>0830/1129</td><td>5101</td>"
+        "<td>60</td><td>59</td><td>-</td><td>BLG</td></tr>"
+        for i in range(row_count)
+    )
+    return f"<table><tr class='table-baslik'><td>CRN</td></tr>{rows}</table>"
+
+
+def course_page():
+    rows = "".join(f"<tr><td>Hücre {i}.0</td><td>Hücre {i}.1</td><td>Hücre {i}.2</td></tr>" for i in range(10))
+    return f"<table><tbody>{rows}</tbody></table>"
+
+
+def final_exam_page(row_count):
+    rows = "".join(
+        f"<tr><td>{20000 + i}</td><td>MAT</td><td>{100 + i}</td><td>Ders</td><td>Ad Soyad</td><td>Final</td>"
+        "<td>EEB 5101<br>EEB 5102</td><td>Pazartesi</td><td>09:00</td><td>01.01.2025</td></tr>"
+        for i in range(row_count)
+    )
+    return f"<div id='finalTakvimiTableContainer'><table><tr><th>CRN</th></tr>{rows}</table></div>"
+
+
+class CommandCounter:
+    def __init__(self, driver):
+        self.count = 0
+
+        # WebElements send their commands through their parent driver, so this counts those too.
+        execute = driver.execute
+        def counting_execute(driver_command, params=None):
+            self.count += 1
+            return execute(driver_command, params)
+        driver.execute = counting_execute
+
+    def measure(self, func):
+        count = self.count
+        func()
+        return self.count - count
+
+
+def legacy_lesson(driver):
+    rows = driver.find_elements(By.TAG_NAME, "tr")
+    return [r.get_attribute("outerHTML") for r in rows if r.get_attribute("class") != "table-baslik"]
+
+
+def legacy_course(driver):
+    rows = driver.find_elements(By.CSS_SELECTOR, "tbody tr")
+    cells = [(2, 0), (2, 1), (2, 2), (4, 0), (4, 1), (6, 1), (7, 1), (9, 0)]
+    return [rows[r].find_elements(By.CSS_SELECTOR, "td")[c].get_attribute("innerHTML") for r, c in cells]
+
+
+def legacy_final_exam(driver):
+    container = driver.find_element(By.ID, "finalTakvimiTableContainer")
+    if container.get_attribute("style"):
+        "display: none" in container.get_attribute("style")
+    container.get_attribute("innerHTML")
+    rows = container.find_element(By.TAG_NAME, "table").find_elements(By.TAG_NAME, "tr")
+
+    exams = []
+    for row in rows[1:]:
+        cells = row.find_elements(By.TAG_NAME, "td")
+        location = cells[6].get_attribute("innerHTML")
+        exams.append([cells[i].text for i in (0, 1, 2, 3, 4, 5, 7, 8, 9)] + [location])
+    return exams
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Counts WebDriver commands per page.")
+    parser.add_argument("-rows", type=int, default=100, help="row count of the lesson and final exam tables.")
+    args = parser.parse_args()
+
+    driver = DriverManager.create_driver()
+    counter = CommandCounter(driver)
+    scraper = Scraper(driver)
+    course_scraper = CourseScraper(driver)
+
+    cases = [
+        ("lesson", lesson_page(args.rows), legacy_lesson, lambda: scraper.extract_rows("tr")),
+        ("course", course_page(), legacy_course, lambda: course_scraper.scrap_current_table(driver)),
+        ("final_exam", final_exam_page(args.rows), legacy_final_exam,
+         lambda: scraper.extract_rows("table tr", driver, "#finalTakvimiTableContainer")),
+    ]
+
+    print(f"{'page':<12}{'before':>10}{'after':>10}")
+    for name, html, legacy, current in cases:
+        driver.get("data:text/html;charset=utf-8," + quote(html))
+        before = counter.measure(lambda: legacy(driver))
+        after = counter.measure(current)
+        print(f"{name:<12}{before:>10}{after:>10}")
+
+    DriverManager.kill_driver(driver)
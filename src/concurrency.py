@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+from time import perf_counter, sleep
+from urllib.parse import urlparse
+import threading
+
+from logger import Logger
+from metrics import Metrics
+from constants import *
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, and bursts of up to `capacity` requests."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = perf_counter()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Blocks until a request is allowed, returns how long it waited."""
+        t0 = perf_counter()
+        while True:
+            with self.lock:
+                now = perf_counter()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - t0
+
+                wait_dur = (1 - self.tokens) / self.rate
+
+            sleep(wait_dur)
+
+
+class ConcurrencyController:
+    """
+    Adapts the number of concurrent workers and the request rate of a host to what the host can sustain (AIMD).
+
+    The outcomes of the requests (or of the work items, for the scrapers that use a web driver) are collected in
+    windows of `CONCURRENCY_WINDOW_SIZE`. After a window with too many timeouts, 429 or 5xx responses (more than
+    `CONCURRENCY_MAX_FAILURE_RATIO` of its requests), or with a median latency over `CONCURRENCY_LATENCY_TOLERANCE`
+    times the best median seen so far, the limits are halved. After a healthy window in which all worker slots were
+    in use, one more worker is allowed, and after one in which requests waited for the rate limit,
+    `CONCURRENCY_RATE_STEP` more requests per second are allowed.
+    """
+
+    controllers = {}
+    controllers_lock = threading.Lock()
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.limit = float(MAX_THREAD_COUNT)
+        self.bucket = TokenBucket(CONCURRENCY_INITIAL_RATE, max(CONCURRENCY_INITIAL_RATE, 1))
+
+        self.condition = threading.Condition()
+        self.active_count = 0
+        self.max_active_count = 0  # In the current window, to tell whether the limit was what held the workers back.
+
+        self.latencies = []
+        self.failure_count = 0
+        self.rate_limited_count = 0
+        self.baseline_latency = None
+
+    @staticmethod
+    def for_host(host: str) -> "ConcurrencyController":
+        with ConcurrencyController.controllers_lock:
+            if host not in ConcurrencyController.controllers:
+                ConcurrencyController.controllers[host] = ConcurrencyController(host)
+            return ConcurrencyController.controllers[host]
+
+    @staticmethod
+    def for_url(url: str) -> "ConcurrencyController":
+        return ConcurrencyController.for_host(urlparse(url).hostname)
+
+    @property
+    def worker_limit(self) -> int:
+        return max(int(self.limit), CONCURRENCY_MIN_LIMIT)
+
+    def acquire_slot(self) -> None:
+        with self.condition:
+            while self.active_count >= self.worker_limit:
+                self.condition.wait()
+
+            self.active_count += 1
+            self.max_active_count = max(self.max_active_count, self.active_count)
+
+    def try_acquire_slot(self) -> bool:
+        """Takes a worker slot if one is free, without waiting for it."""
+        with self.condition:
+            if self.active_count >= self.worker_limit:
+                return False
+
+            self.active_count += 1
+            self.max_active_count = max(self.max_active_count, self.active_count)
+            return True
+
+    def release_slot(self) -> None:
+        with self.condition:
+            self.active_count -= 1
+            self.condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """Holds one of the worker slots of the host during the `with` block."""
+        self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    def wait_for_rate(self) -> None:
+        wait_dur = self.bucket.acquire()
+        if wait_dur > 0:
+            self.rate_limited_count += 1
+            Metrics.increment("rate_limit_wait_seconds_total", wait_dur, host=self.host)
+
+    def record(self, latency: float, failed: bool) -> None:
+        """Records the outcome of a request, `failed` being a timeout, a 429 or a 5xx response."""
+        with self.condition:
+            self.latencies.append(latency)
+            self.failure_count += failed
+            if len(self.latencies) >= CONCURRENCY_WINDOW_SIZE:
+                self.adjust()
+
+    def adjust(self) -> None:
+        latencies, failure_count = sorted(self.latencies), self.failure_count
+        is_limited, is_rate_limited = self.max_active_count >= self.worker_limit, self.rate_limited_count > 0
+        self.latencies, self.failure_count, self.rate_limited_count, self.max_active_count = [], 0, 0, self.active_count
+
+        median_latency = latencies[len(latencies) // 2]
+        if self.baseline_latency is None or median_latency < self.baseline_latency:
+            self.baseline_latency = median_latency
+
+        old_limit, old_rate = self.worker_limit, self.bucket.rate
+        if failure_count > len(latencies) * CONCURRENCY_MAX_FAILURE_RATIO:
+            reason = f"{failure_count} of {len(latencies)} requests failed"
+            self.decrease()
+        elif median_latency > self.baseline_latency * CONCURRENCY_LATENCY_TOLERANCE:
+            reason = f"median latency {median_latency:.2f}s, over {CONCURRENCY_LATENCY_TOLERANCE}x the best {self.baseline_latency:.2f}s"
+            self.decrease()
+        elif is_limited or is_rate_limited:
+            reason = f"healthy, median latency {median_latency:.2f}s"
+            if is_limited:
+                self.limit = min(self.limit + 1, CONCURRENCY_MAX_LIMIT)
+            if is_rate_limited:
+                self.bucket.rate = min(self.bucket.rate + CONCURRENCY_RATE_STEP, CONCURRENCY_MAX_RATE)
+        else:
+            return  # Healthy, but neither limit held the requests back, so raising them wouldn't help.
+
+        # More slots may be available now.
+        self.condition.notify_all()
+        Metrics.set_gauge("concurrency_limit", self.worker_limit, host=self.host)
+        Metrics.set_gauge("request_rate_limit", self.bucket.rate, host=self.host)
+        if self.worker_limit != old_limit or self.bucket.rate != old_rate:
+            Logger.log_info(
+                f"[{self.host}] Concurrency {old_limit} -> [green]{self.worker_limit}[/green] workers, "
+                f"rate {old_rate:.1f} -> [green]{self.bucket.rate:.1f}[/green] requests/s ({reason})."
+            )
+
+    def decrease(self) -> None:
+        self.limit = max(self.limit * CONCURRENCY_DECREASE_FACTOR, CONCURRENCY_MIN_LIMIT)
+        self.bucket.rate = max(self.bucket.rate * CONCURRENCY_DECREASE_FACTOR, CONCURRENCY_MIN_RATE)
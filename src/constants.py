@@ -1,22 +1,93 @@
+import os
+
 # === URLS ===
-LESSONS_URL = "https://obs.itu.edu.tr/public/DersProgram"
-COURSES_URL = "https://www.sis.itu.edu.tr/TR/ogrenci/lisans/ders-bilgileri/ders-bilgileri.php"
+# The hosts can be pointed to another server with environment variables, e.g. to `benchmarks/mock_itu_site.py`.
+ITU_OBS_BASE_URL = os.environ.get("ITU_OBS_BASE_URL", "https://obs.itu.edu.tr").rstrip("/")
+ITU_SIS_BASE_URL = os.environ.get("ITU_SIS_BASE_URL", "https://www.sis.itu.edu.tr").rstrip("/")
+
+LESSONS_URL = f"{ITU_OBS_BASE_URL}/public/DersProgram"
+LESSON_BRANCH_CODES_URL = f"{ITU_OBS_BASE_URL}/public/DersProgram/SearchBransKoduByProgramSeviye?programSeviyeTipiAnahtari={{0}}"
+LESSON_TABLE_URL = f"{ITU_OBS_BASE_URL}/public/DersProgram/DersProgramSearch?programSeviyeTipiAnahtari={{0}}&dersBransKoduId={{1}}"
+COURSES_URL = f"{ITU_SIS_BASE_URL}/TR/ogrenci/lisans/ders-bilgileri/ders-bilgileri.php"
 COURSE_PLAN_URLS = [
-    "https://obs.itu.edu.tr/public/DersPlan/DersPlanlariList?programKodu={0}_LS&planTipiKodu=lisans",       # Undergraduate
-    "https://obs.itu.edu.tr/public/DersPlan/DersPlanlariList?programKodu={0}_LS&planTipiKodu=uolp",         # UOLP
-    "https://obs.itu.edu.tr/public/DersPlan/DersPlanlariList?programKodu={0}_OL&planTipiKodu=on-lisans",    # Graduate
+    f"{ITU_OBS_BASE_URL}/public/DersPlan/DersPlanlariList?programKodu={{0}}_LS&planTipiKodu=lisans",       # Undergraduate
+    f"{ITU_OBS_BASE_URL}/public/DersPlan/DersPlanlariList?programKodu={{0}}_LS&planTipiKodu=uolp",         # UOLP
+    f"{ITU_OBS_BASE_URL}/public/DersPlan/DersPlanlariList?programKodu={{0}}_OL&planTipiKodu=on-lisans",    # Graduate
 ]
-BUILDING_CODES_URL = "https://www.sis.itu.edu.tr/TR/obs-hakkinda/bina-kodlari.php"
-PROGRAMME_CODES_URL = "https://www.sis.itu.edu.tr/TR/obs-hakkinda/lisans-program-kodlari.php"
-FINAL_EXAM_URL = "https://obs.itu.edu.tr/public/FinalTakvimi/FinalTakvimiByDersBransKodu"
+BUILDING_CODES_URL = f"{ITU_SIS_BASE_URL}/TR/obs-hakkinda/bina-kodlari.php"
+PROGRAMME_CODES_URL = f"{ITU_SIS_BASE_URL}/TR/obs-hakkinda/lisans-program-kodlari.php"
+FINAL_EXAM_URL = f"{ITU_OBS_BASE_URL}/public/FinalTakvimi/FinalTakvimiByDersBransKodu"
 
 # === FILE NAMES ===
 LESSONS_FILE_PATH = "data/lessons.psv"
+LESSONS_DELTA_FILE_PATH = "data/lessons_delta.json"
 COURSES_FILE_PATH = "data/courses.psv"
 COURSE_PLANS_FILE_PATH = "data/course_plans.txt"
+COURSE_PLANS_INDEX_FILE_PATH = "data/course_plans.index.json"  # Byte ranges of the plans, see `CoursePlanStore`.
 BUILDING_CODES_FILE_PATH = "data/building_codes.psv"
 PROGRAMME_CODES_FILE_PATH = "data/programme_codes.psv"
 FINAL_EXAMS_FILE_PATH = "data/final_exams.psv"
+HTTP_CACHE_DIR = ".cache/http"
+PROGRESS_JOURNAL_DIR = ".cache/journal"
+METRICS_DIR = ".cache/metrics"
+COURSE_CODE_INDEX_FILE_PATH = ".cache/course_codes.psv"
+NEGATIVE_CACHE_DIR = ".cache/negative"
 
 # === OTHER ===
 MAX_THREAD_COUNT = 4
+LESSON_PROGRAMME_LEVEL = "LS"  # Undergraduate
+LESSON_COURSE_RETRY_COUNT = 2  # The lesson scraper fails instead of skipping a course that doesn't load after this many retries.
+HTTP_TIMEOUT = 25  # ITU's network is usually slow, so the timeout is generous.
+HTTP_POOL_HOST_COUNT = 4  # Number of hosts to keep connection pools for.
+HTML_PARSER_BACKEND = "stream"  # options: [stream, html.parser, lxml]
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_MAX_SIZE_MB = 256
+HTTP_CACHE_MAX_AGE_DAYS = 60
+PARSE_CACHE_VERSION = 1  # Bump when a `parse_*` function or the shape of its result changes.
+DRIVER_POOL_ENABLED = True
+DRIVER_MAX_PAGE_LOADS = 500  # Pooled drivers are recycled after this many page loads,
+DRIVER_MAX_MEMORY_MB = 512  # or when their JS heap grows over this size.
+DRIVER_SCRAPE_PROFILE_ENABLED = True  # Lightweight drivers, only the HTML and the scripts of the pages are loaded.
+DRIVER_PAGE_LOAD_STRATEGY = "eager"  # options: [normal, eager], eager doesn't wait for the subresources.
+DRIVER_WINDOW_SIZE = "800,600"
+DRIVER_BLOCKED_EXTENSIONS = [  # The scrapers only read the tables, these are blocked by the scrape profile.
+    "css", "png", "jpg", "jpeg", "gif", "svg", "ico", "webp", "woff", "woff2", "ttf", "otf", "eot", "mp4", "webm"
+]
+DRIVER_BLOCKED_HOSTS = [  # Analytics and ads, also blocked by the scrape profile.
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net", "hotjar.com", "yandex.ru"
+]
+DRIVER_MEMORY_SWITCHES = [
+    "--disable-gpu", "--disable-background-networking", "--disable-component-update", "--disable-default-apps",
+    "--disable-sync", "--no-first-run", "--mute-audio", "--blink-settings=imagesEnabled=false",
+    "--disable-features=Translate,OptimizationHints,MediaRouter",
+]
+READINESS_TIMEOUT = 10  # Upper bound of the readiness waits, in seconds.
+READINESS_MIN_TIMEOUT = 1
+READINESS_MIN_SAMPLES = 10  # Once a wait was seen this many times, its timeout adapts to
+READINESS_TIMEOUT_MULTIPLIER = 3  # this many times its 95th percentile duration.
+READINESS_POLL_INTERVAL = .05
+PROGRESS_JOURNAL_MAX_AGE_HOURS = 24  # Older journals are not resumed, their results would be outdated.
+CONCURRENCY_MIN_LIMIT = 1  # Workers per host, the controllers start at MAX_THREAD_COUNT.
+CONCURRENCY_MAX_LIMIT = 12
+DRIVER_MAX_THREAD_COUNT = 6  # Of the scrapers that load the pages with web drivers, each thread runs a Chrome.
+HTTP_POOL_SIZE = CONCURRENCY_MAX_LIMIT  # Connections kept alive per host, for the most threads the HTTP scrapers run.
+CONCURRENCY_INITIAL_RATE = 50  # Requests per second per host.
+CONCURRENCY_MIN_RATE = 1
+CONCURRENCY_MAX_RATE = 200
+CONCURRENCY_RATE_STEP = 5
+CONCURRENCY_DECREASE_FACTOR = .5
+CONCURRENCY_LATENCY_TOLERANCE = 2  # A window slower than this many times the best one counts as congested.
+CONCURRENCY_WINDOW_SIZE = 20  # Requests per decision.
+CONCURRENCY_MAX_FAILURE_RATIO = .1  # Fewer failures than this are sporadic, they don't slow the scrapers down.
+PARSE_PROCESS_COUNT = (os.cpu_count() or 1) - 1  # Processes that parse the pages of the pipelines, 0 parses them in the fetching threads.
+PIPELINE_MAX_PENDING_PAGES = 64  # Pages fetched but not aggregated yet, the fetching threads wait when there are more.
+PIPELINE_MEMO_SIZE = 1024  # Parsed pages kept in memory per run, to not fetch the pages shared by many programmes again.
+PIPELINE_RETRY_COUNT = 4  # Times a page that couldn't be loaded or parsed is fetched again before it's given up on.
+NEGATIVE_CACHE_TTL_DAYS = 28  # The keys that had nothing to scrap are probed again after this many days.
+NEGATIVE_CACHE_MIN_MISSES = 2  # Times in a row a key must have nothing before it is skipped.
+DAEMON_SCHEDULES = {  # Cron expressions (UTC) of the targets in daemon mode, the same as the workflows'.
+    "lesson": "4/5 2/1 * * *",
+    "course": "0 0 * * 1",
+    "course_plan": "0 0 * * 2",
+    "misc": "55 23 * * *",
+}
@@ -0,0 +1,162 @@
+from datetime import datetime
+import hashlib
+import os
+import re
+import threading
+
+from file_utils import read_lines, write_lines_atomically
+from logger import Logger
+from constants import *
+
+
+class CourseCodeIndex:
+    """
+    Index of the known course codes, with the data files they are in and when they were last seen in them.
+
+    The save functions update it with the lines they write, so the course scraper gets its work list without
+    parsing the data files again. The index also keeps a fingerprint of each data file it was updated with,
+    a data file that was changed by something else (e.g. a newer clone of the data repository) is read again.
+    The fingerprints are the size, the modification time and the hash of the files: the files whose size and
+    modification time didn't change aren't read at all, and a fresh clone of unchanged files is only hashed.
+
+    Only the codes like "BLG 102E" are kept, the titles of the elective lists and the other junk in the
+    data files are not course codes.
+    """
+
+    SOURCES = {"lessons": LESSONS_FILE_PATH, "course_plans": COURSE_PLANS_FILE_PATH, "courses": COURSES_FILE_PATH}
+    COURSE_CODE_PATTERN = re.compile(r"[A-Z]{2,4} \d{3}[A-Z]{0,2}")
+
+    path = COURSE_CODE_INDEX_FILE_PATH
+    lock = threading.Lock()
+    entries = None  # Code -> {"sources": set of source names, "last_seen": ISO timestamp}
+    fingerprints = None  # Source name -> fingerprint of the data file the source's codes are from.
+
+    @staticmethod
+    def get_fingerprint(file_path: str) -> str:
+        if not os.path.exists(file_path):
+            return "-"
+
+        file_stat = os.stat(file_path)
+        with open(file_path, "rb") as f:
+            return f"{file_stat.st_size}-{file_stat.st_mtime_ns}-{hashlib.sha1(f.read()).hexdigest()}"
+
+    @staticmethod
+    def is_unchanged(source: str, file_path: str) -> bool:
+        """Whether the data file is the one the source's codes are from, its fingerprint is refreshed if it was only touched."""
+        fingerprint = CourseCodeIndex.fingerprints.get(source)
+        if not os.path.exists(file_path) or fingerprint in (None, "-"):
+            return fingerprint == CourseCodeIndex.get_fingerprint(file_path)
+
+        file_stat = os.stat(file_path)
+        size, mtime_ns, sha1 = (fingerprint.split("-") + ["", "", ""])[:3]
+        if size != str(file_stat.st_size):
+            return False
+        if mtime_ns == str(file_stat.st_mtime_ns):
+            return True
+
+        # The same size but a different modification time, e.g. a fresh clone of the data repository.
+        new_fingerprint = CourseCodeIndex.get_fingerprint(file_path)
+        if new_fingerprint.split("-")[2] != sha1:
+            return False
+
+        CourseCodeIndex.fingerprints[source] = new_fingerprint
+        return True
+
+    @staticmethod
+    def get_codes_from_lines(source: str, lines) -> set[str]:
+        """Returns the distinct course codes in the lines of a data file, including the invalid ones."""
+        if source == "lessons":
+            return {l.split("|")[1].strip() for l in lines if "|" in l}
+        if source == "courses":
+            return {l.split("|")[0].strip() for l in lines if "|" in l}
+
+        # Course plans, the semesters are the lines of the courses separated by "=", and the elective
+        # lists look like "[Title*(CODE 101|CODE 102)]". The same codes are in many plans, so they are
+        # collected in a set as they are read, not in a list as long as the file.
+        codes = set()
+        for line in lines:
+            if line.startswith("#"):
+                continue
+
+            for cell in line.strip().split("="):
+                if "[" in cell:
+                    codes.update(c.strip() for c in cell.split("*")[-1].replace("(", "").replace(")", "").replace("]", "").split("|"))
+                else:
+                    codes.add(cell.strip())
+
+        return codes
+
+    @staticmethod
+    def load() -> None:
+        CourseCodeIndex.entries, CourseCodeIndex.fingerprints = {}, {}
+        for line in read_lines(CourseCodeIndex.path):
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                source, fingerprint = line[1:].split("|")
+                CourseCodeIndex.fingerprints[source] = fingerprint
+            elif line.count("|") == 2:
+                code, sources, last_seen = line.split("|")
+                CourseCodeIndex.entries[code] = {"sources": set(sources.split(",")), "last_seen": last_seen}
+
+    @staticmethod
+    def save() -> None:
+        lines = [f"#{source}|{fingerprint}\n" for source, fingerprint in sorted(CourseCodeIndex.fingerprints.items())]
+        lines += [
+            f"{code}|{','.join(sorted(entry['sources']))}|{entry['last_seen']}\n"
+            for code, entry in sorted(CourseCodeIndex.entries.items())
+        ]
+        write_lines_atomically(CourseCodeIndex.path, lines)
+
+    @staticmethod
+    def set_source_codes(source: str, codes: set[str]) -> None:
+        """Makes `codes` the codes of the source, the codes that aren't in any source anymore are removed."""
+        valid_codes = {c for c in codes if CourseCodeIndex.COURSE_CODE_PATTERN.fullmatch(c)}
+        invalid_codes = {c for c in codes if len(c) > 0} - valid_codes
+        if len(invalid_codes) > 0:
+            Logger.log_info(f"Ignored {len(invalid_codes)} invalid course codes in {source}, e.g. \"{sorted(invalid_codes)[0]}\".")
+
+        now = datetime.now().isoformat(timespec="seconds")
+        for code in list(CourseCodeIndex.entries.keys()):
+            entry = CourseCodeIndex.entries[code]
+            if source in entry["sources"] and code not in valid_codes:
+                entry["sources"].remove(source)
+                if len(entry["sources"]) == 0:
+                    del CourseCodeIndex.entries[code]
+
+        for code in valid_codes:
+            entry = CourseCodeIndex.entries.setdefault(code, {"sources": set(), "last_seen": now})
+            entry["sources"].add(source)
+            entry["last_seen"] = now
+
+        CourseCodeIndex.fingerprints[source] = CourseCodeIndex.get_fingerprint(CourseCodeIndex.SOURCES[source])
+
+    @staticmethod
+    def sync() -> bool:
+        """Reads the data files that changed since the index was updated with them, returns whether the index changed."""
+        old_fingerprints = dict(CourseCodeIndex.fingerprints)
+        for source, file_path in CourseCodeIndex.SOURCES.items():
+            if not CourseCodeIndex.is_unchanged(source, file_path):
+                Logger.log_info(f"Updating the course code index from \"{file_path}\".")
+                CourseCodeIndex.set_source_codes(source, CourseCodeIndex.get_codes_from_lines(source, read_lines(file_path)))
+
+        return CourseCodeIndex.fingerprints != old_fingerprints
+
+    @staticmethod
+    def update(source: str, lines) -> None:
+        """Called after the data file of `source` is saved with `lines`, any iterable of its lines (e.g. the file)."""
+        with CourseCodeIndex.lock:
+            if CourseCodeIndex.entries is None:
+                CourseCodeIndex.load()
+
+            CourseCodeIndex.set_source_codes(source, CourseCodeIndex.get_codes_from_lines(source, lines))
+            CourseCodeIndex.save()
+
+    @staticmethod
+    def get_course_codes() -> list[str]:
+        with CourseCodeIndex.lock:
+            if CourseCodeIndex.entries is None:
+                CourseCodeIndex.load()
+            if CourseCodeIndex.sync():
+                CourseCodeIndex.save()
+
+            return sorted(CourseCodeIndex.entries.keys())
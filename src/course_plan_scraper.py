@@ -1,61 +1,36 @@
-from scraper import Scraper
 from logger import Logger
-from selenium.webdriver.common.by import By
-import threading
+from pipeline import FetchParsePipeline
 import re
 from time import perf_counter
-from selenium.webdriver.support import expected_conditions as EC
 from constants import *
 
-class CoursePlanScraper(Scraper):
+class CoursePlanScraper:
     DEFAULT_ITERATION_NAME = "Tüm Öğrenciler İçin"
 
-    def __init__(self, driver) -> None:
-        super().__init__(driver)
+    def __init__(self) -> None:
         self.faculty_course_plans = {}
+        self.plans = []  # The state of each programme while its pages go through the pipeline.
+        self.journal = None
 
-    def scrape_iteration_course_plan(self, url:str, log_prefix:str):
-        soup = self.get_soup_from_url(url)  # Read the page.
-
-        if soup is None:
-            Logger.log_error(f"{log_prefix} Failed to load the url {url}.")
-            return [[dict()]]
-
+    @staticmethod
+    def parse_iteration_page(document) -> list:
+        """Returns the semesters of an iteration, selective courses are dictionaries with their title and url."""
         program_list = []
-        tables = soup.find_all("table")  # Read all tables.
+        tables = document.tables  # Read all tables.
         
         for table in tables:
+            if not table.has_tbody:
+                raise ValueError("Found a semester table without a body.")
+
             semester_program = []
-            rows = table.find("tbody").find_all("tr")
-            for row in rows:
-                cells = row.find_all("td")
-                cell0_a = cells[0].find("a")
-                course_code = cell0_a.get_text().strip()
+            for row in table.body_rows:
+                cells = row.cells
+                cell0_a = cells[0].links[0]
+                course_code = cell0_a.text.strip()
 
                 # When a course is selective, the first cell becomes a button with text ("Dersler" or "Courses")
                 if ("Dersler" or "Courses") in course_code:
-                    selective_courses_title = cells[1].get_text()
-                    selective_soup = self.get_soup_from_url(f"https://obs.itu.edu.tr{cell0_a['href']}")
-
-                    selective_courses = []
-                    if selective_soup is not None:
-                        selective_course_table = selective_soup.find("table")
-
-                        if selective_course_table is not None:
-                            selective_course_rows = selective_course_table.find_all("tr")
-
-                            # First row is just the header.
-                            for selective_row in selective_course_rows[1:]:
-                                selective_courses.append(selective_row.find("a").get_text().replace("\n", "").strip())
-
-                            semester_program.append({selective_courses_title.replace("\n", "").strip(): selective_courses})
-                        else:
-                            # Because ITU changed their website, I have no fucking clue what the "selective courses like below" is
-                            # but the new UI might have fixed that issue. I'm leaving this here just in case
-                            # ---------------------------------------------------------------------------------------------------
-                            # TODO: Add support for selective courses like this:
-                            # https://www.sis.itu.edu.tr/TR/ogrenci/lisans/ders-planlari/plan/MAK/20031081.html
-                            semester_program.append({selective_courses_title: []})
+                    semester_program.append({"title": cells[1].text, "url": f"{ITU_OBS_BASE_URL}{cell0_a.href}"})
                 else:
                     semester_program.append(course_code)
 
@@ -63,122 +38,177 @@ class CoursePlanScraper(Scraper):
 
         return program_list
 
-    def scrap_iterations(self, program_name: str, iteration_url: str, log_prefix: str) -> dict:
-        program_iterations = dict()
-        soup = self.get_soup_from_url(iteration_url)  # Read the page
+    @staticmethod
+    def parse_selective_page(document) -> dict:
+        if len(document.tables) == 0:
+            return {"has_table": False, "courses": []}
 
-        if soup is None:
-            return dict()
+        # First row is just the header.
+        selective_course_rows = document.tables[0].rows
+        return {
+            "has_table": True,
+            "courses": [row.links[0].text.replace("\n", "").strip() for row in selective_course_rows[1:]],
+        }
 
+    @staticmethod
+    def parse_iterations_page(document) -> list:
         # If the URL is not valid
-        if soup.find('h1', class_='text-danger'): 
-            return dict()
+        if document.has_heading("h1", "text-danger"):
+            return []
 
-        # Cache the urls for the program iterations (they are usually date ranges like 2001-2002, 2021-2022 ve Sonrası, etc.).
+        # The urls for the program iterations (they are usually date ranges like 2001-2002, 2021-2022 ve Sonrası, etc.).
         iterations = []
-        for row in soup.select('tbody tr'):
-            cells = row.select("td")
-            iteration_url = cells[0].select("a")[0]["href"]
-            iteration_name = cells[1].get_text().strip()
-            iterations.append((iteration_name, f"https://obs.itu.edu.tr{iteration_url}"))
-
-        def scrap_iteration_and_save(key, url, retry_count=0):
-            if retry_count >= 5: 
-                program_iterations[key] = None
-                return
-            try:
-                program_iterations[key] = self.scrape_iteration_course_plan(url, log_prefix)
-            except Exception as e:
-                Logger.log_warning(f"{log_prefix} The following error was thrown while scraping a program iteration ([blue]{key}[/blue]) of [cyan]\"{program_name}\"[/cyan]:\n\n{e}")
-                self.wait()
-                scrap_iteration_and_save(key, url, retry_count + 1)
-
-        # Scrap all program iterations
+        for row in document.rows:
+            if not row.in_tbody:
+                continue
+
+            cells = row.cells
+            iteration_url = cells[0].links[0].href
+            iteration_name = cells[1].text.strip()
+            iterations.append((iteration_name, f"{ITU_OBS_BASE_URL}{iteration_url}"))
+
+        return iterations
+
+    def handle_iterations_page(self, pipeline, programme_index: int, url_index: int, iterations) -> None:
+        plan = self.plans[programme_index]
+        if not iterations:
+            # Not a valid url, try the next plan type.
+            if url_index + 1 < len(COURSE_PLAN_URLS):
+                self.submit_iterations_page(pipeline, programme_index, url_index + 1)
+            return
+
         for iteration_name, iteration_url in iterations:
-            Logger.log_info(f"{log_prefix} Scraping the iteration: [link={iteration_url}][dark_magenta]{iteration_name}[/dark_magenta][/link].")
-            
+            Logger.log_info("Scraping the iteration: [link={}][dark_magenta]{}[/dark_magenta][/link].", iteration_url, iteration_name)
+
             # Trim the iteration name, up to the first 4 digid number.
             # This way we get "Fizik Mühendisliği Lisans Programı (%100 İngilizce) 2010-2011 / Güz Dönemi Sonrası" -> "2010-2011 / Güz Dönemi Sonrası"
             iteration_match = re.search(r'\d{4}', iteration_name)
             if iteration_match:
                 iteration_name = iteration_name[iteration_match.start():].strip()
-            
-            scrap_iteration_and_save(iteration_name, iteration_url)
 
-        return program_iterations
+            plan["iterations"].append([iteration_name, None])
+            plan["pending_count"] += 1
+            pipeline.submit(
+                iteration_url, CoursePlanScraper.parse_iteration_page, "iteration",
+                ("iteration", programme_index, len(plan["iterations"]) - 1)
+            )
+
+    def handle_iteration_page(self, pipeline, programme_index: int, iteration_index: int, url: str, semesters) -> None:
+        plan = self.plans[programme_index]
+        if semesters is None:
+            # Out of retries, the programme is left out and its plans are merged from the existing file.
+            Logger.log_error(f"Failed to load the url {url}, skipping the course plan of \"{plan['programme'][1]}\".")
+            plan["failed"] = True
+            return
+
+        plan["iterations"][iteration_index][1] = semesters
+        for semester_index, semester in enumerate(semesters):
+            for course_index, course in enumerate(semester):
+                if type(course) is not dict or "url" not in course:
+                    continue
+
+                # Filled in when the selective page is parsed. The same elective lists are in many plans,
+                # they are only fetched once.
+                plan["pending_count"] += 1
+                pipeline.submit(
+                    course["url"], CoursePlanScraper.parse_selective_page, "selective",
+                    ("selective", programme_index, iteration_index, semester_index, course_index), memoize=True
+                )
+
+    def handle_selective_page(self, programme_index: int, iteration_index: int, semester_index: int, course_index: int, selective_page) -> None:
+        semester = self.plans[programme_index]["iterations"][iteration_index][1][semester_index]
+        selective_courses_title = semester[course_index]["title"]
+
+        if selective_page is None:
+            semester[course_index] = None  # Left out of the plan.
+        elif selective_page["has_table"]:
+            # Copied, the memoized page is shared by the plans.
+            semester[course_index] = {selective_courses_title.replace("\n", "").strip(): list(selective_page["courses"])}
+        else:
+            # Because ITU changed their website, I have no fucking clue what the "selective courses like below" is
+            # but the new UI might have fixed that issue. I'm leaving this here just in case
+            # ---------------------------------------------------------------------------------------------------
+            # TODO: Add support for selective courses like this:
+            # https://www.sis.itu.edu.tr/TR/ogrenci/lisans/ders-planlari/plan/MAK/20031081.html
+            semester[course_index] = {selective_courses_title: []}
+
+    def handle_page(self, pipeline, task, parsed) -> None:
+        page_type, programme_index = task.context[0], task.context[1]
+        if page_type == "iterations":
+            self.handle_iterations_page(pipeline, programme_index, task.context[2], parsed)
+        elif page_type == "iteration":
+            self.handle_iteration_page(pipeline, programme_index, task.context[2], task.url, parsed)
+        else:
+            self.handle_selective_page(*task.context[1:], parsed)
+
+        plan = self.plans[programme_index]
+        plan["pending_count"] -= 1
+        if plan["pending_count"] == 0:
+            self.complete_programme(programme_index)
+
+    def submit_iterations_page(self, pipeline, programme_index: int, url_index: int) -> None:
+        programme_code, programme_name, faculty, _ = self.plans[programme_index]["programme"]
+        Logger.log_info("Scraping the course plan for [blue]{}[/blue] in [blue]{}[/blue].", programme_name, faculty)
+
+        self.plans[programme_index]["pending_count"] += 1
+        pipeline.submit(
+            COURSE_PLAN_URLS[url_index].format(programme_code), CoursePlanScraper.parse_iterations_page, "iterations",
+            ("iterations", programme_index, url_index)
+        )
+
+    def complete_programme(self, programme_index: int) -> None:
+        plan = self.plans[programme_index]
+        if len(plan["iterations"]) == 0 or plan["failed"]:
+            return  # None of the plan types had any iterations, or some of them couldn't be scraped.
+
+        plan["result"] = {
+            iteration_name: [[course for course in semester if course is not None] for semester in semesters]
+            for iteration_name, semesters in plan["iterations"]
+        }
+        if self.journal is not None:
+            self.journal.record(plan["programme"][0], plan["result"])
+
+    def scrap_course_plans(self, journal=None):
+        Logger.log_info("Scraping Course Programs")
+        t0 = perf_counter()  # Start the timer for logging.
+
+        with open(PROGRAMME_CODES_FILE_PATH, "r", encoding="utf-8") as ordered_faculty_names:
+            programme_codes = [line.strip().split("|") for line in ordered_faculty_names.readlines()]
 
-    def scrap_faculty_course_plans_routine(self, programme_codes: str, thread_no: int):
-        thread_prefix = f"[royal_blue1][Thread {str(thread_no).zfill(2)}][/royal_blue1]"
+        programmes_to_scrap = []
         for programme_code, programme_name, faculty, faculty_code in programme_codes:
             if "Yandal" in programme_name:
-                Logger.log_info(f"{thread_prefix} Skipping the course plan for [blue]{programme_name}[/blue] in [blue]{faculty}[/blue] as it is a \"Yandal\" program.")
+                Logger.log_info(f"Skipping the course plan for [blue]{programme_name}[/blue] in [blue]{faculty}[/blue] as it is a \"Yandal\" program.")
                 continue
-            
-            if faculty not in self.faculty_course_plans:
-                self.faculty_course_plans[faculty] = {}
-
-            for url in COURSE_PLAN_URLS:
-                Logger.log_info(f"{thread_prefix} Scraping the course plan for [blue]{programme_name}[/blue] in [blue]{faculty}[/blue].")
-                iters = self.scrap_iterations(programme_name, url.format(programme_code), thread_prefix)
-                if len(iters) != 0:
-                    self.faculty_course_plans[faculty][programme_name] = iters
-                    break
-
-    # While splitting, make sure to have the plans of the same faculty be in the same chunk.
-    def split_programme_codes_into_chunks(self, programme_codes, num_chunks):
-        # Calculate the average chunk size and remainder
-        target_chunk_size = len(programme_codes) // num_chunks
-        
-        chunks = []
-        current_chunk = []
-
-        for programme_code, programme_name, faculty, faculty_code in programme_codes:
-            is_chunk_full = len(current_chunk) >= target_chunk_size
-            belongs_to_same_faculty_with_last = len(current_chunk) > 0 and current_chunk[-1][2] == faculty
-
-            if is_chunk_full and not belongs_to_same_faculty_with_last:
-                chunks.append(current_chunk)
-                current_chunk = []
 
-            current_chunk.append((programme_code, programme_name, faculty, faculty_code))
+            programmes_to_scrap.append((programme_code, programme_name, faculty, faculty_code))
 
-        # If there are remaining items not added to chunks, add them.
-        if len(current_chunk) > 0 and len(chunks) > 0:
-            if len(chunks) < num_chunks:
-                chunks.append(current_chunk)
+        # The pages are fetched by a pool of threads and parsed by a pool of processes, the results are assembled
+        # here. The controller adjusts how many of the threads fetch at a time from the responses of the pages.
+        self.journal = journal
+        self.plans = [{"programme": programme, "iterations": [], "pending_count": 0, "result": None, "failed": False} for programme in programmes_to_scrap]
+        pipeline = FetchParsePipeline(self.handle_page)
+        for programme_index, programme in enumerate(programmes_to_scrap):
+            if journal is not None and journal.is_completed(programme[0]):
+                self.plans[programme_index]["result"] = journal.get(programme[0])
             else:
-                chunks[-1].extend(current_chunk)
-        
-        return chunks
+                self.submit_iterations_page(pipeline, programme_index, 0)
 
-    def scrap_course_plans(self):
-        Logger.log_info("Scraping Course Programs")
-        t0 = perf_counter()  # Start the timer for logging.
+        skipped_count = sum(plan["result"] is not None for plan in self.plans)
+        if skipped_count > 0:
+            Logger.log_info(f"Skipping {skipped_count} programmes completed by the previous run.")
 
-        with open(PROGRAMME_CODES_FILE_PATH, "r", encoding="utf-8") as ordered_faculty_names:
-            programme_codes = [line.strip().split("|") for line in ordered_faculty_names.readlines()]
-
-        thread_count = min(MAX_THREAD_COUNT, len(programme_codes))
-        programme_code_chunks = self.split_programme_codes_into_chunks(programme_codes, thread_count)
-        thread_count = len(programme_code_chunks)
+        pipeline.run()
+        course_plans = [plan["result"] for plan in self.plans]
 
-        # Create the threads
-        threads = []
-        for i in range(thread_count):
-            t = threading.Thread(target=self.scrap_faculty_course_plans_routine, args=(programme_code_chunks[i], i + 1))
-            threads.append(t)
-        
-        # Start and wait for the threads to finish.
-        for t in threads: t.start()
-        for t in threads: t.join()
-
-        # Faculties
-        ordered_faculty_names = []
-        for _, __, faculty, ___ in programme_codes:
-            if faculty not in ordered_faculty_names:
-                ordered_faculty_names.append(faculty)
+        # Assemble the plans in the order of the programmes file, regardless of which thread scraped them.
+        self.faculty_course_plans = {}
+        for (_, programme_name, faculty, __), iters in zip(programmes_to_scrap, course_plans):
+            self.faculty_course_plans.setdefault(faculty, {})
+            if iters is not None:
+                self.faculty_course_plans[faculty][programme_name] = iters
 
         # Log how long the process took.
         t1 = perf_counter()
         Logger.log_info(f"Scraping Course Plans Completed in [green]{round(t1 - t0, 2)}[/green] seconds.")
-        return {faculty:  self.faculty_course_plans[faculty] for faculty in ordered_faculty_names if faculty in self.faculty_course_plans}
+        return self.faculty_course_plans
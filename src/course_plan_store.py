@@ -0,0 +1,169 @@
+import hashlib
+import json
+import mmap
+import os
+
+from file_utils import write_atomically
+from logger import Logger
+from constants import *
+
+
+class CoursePlanStore:
+    """
+    Reads the plans of `course_plans.txt` without parsing the whole file. A sidecar JSON index keeps the byte
+    ranges of the faculties, programmes and iterations (the `#`, `##` and `###` sections, with their headings),
+    the file is memory-mapped and only the iterations that are asked for are decoded.
+
+    `save_course_plans` writes the index with the file. The index is used while the size and the modification time
+    of the file are the ones it was written with. A file of the same size that was only touched (e.g. a fresh clone
+    of the data repository, in CI) is hashed, and the index is still used if the contents are the same. If the file
+    was changed by something else or the index is missing, the index is built again with one scan of the file.
+    The text format doesn't change, the index is only an addition for this repository's own reads.
+    """
+
+    INDEX_VERSION = 2
+    MAX_SEMESTER_COUNT = 8
+
+    def __init__(self, path: str = COURSE_PLANS_FILE_PATH, index_path: str = COURSE_PLANS_INDEX_FILE_PATH) -> None:
+        self.path = path
+        self.index_path = index_path
+        self.file = None
+        self.data = b""  # The memory map of the file, or empty bytes if there is no file.
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, "rb")
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Faculty -> {"range": [start, end], "programmes": {programme -> {"range": [start, end], "iterations": {iteration -> [start, end]}}}}
+        self.faculties = self.load_index()
+
+    def __enter__(self) -> "CoursePlanStore":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+            self.file, self.data = None, b""
+
+    @staticmethod
+    def get_file_stat(path: str) -> list[int]:
+        file_stat = os.stat(path)
+        return [file_stat.st_size, file_stat.st_mtime_ns]
+
+    @staticmethod
+    def build_index(lines) -> dict:
+        """Returns the faculties of the index of the file with the `lines`, bytes with their line breaks."""
+        faculties = {}
+        faculty = programme = iteration = None
+        offset = 0
+        for line in lines:
+            end = offset + len(line)
+            if line.startswith(b"# "):
+                faculty = {"range": [offset, end], "programmes": {}}
+                faculties[line[2:].decode("utf-8").strip()] = faculty
+                programme = iteration = None
+            elif line.startswith(b"## ") and faculty is not None:
+                programme = {"range": [offset, end], "iterations": {}}
+                faculty["programmes"][line[3:].decode("utf-8").strip()] = programme
+                iteration = None
+            elif line.startswith(b"### ") and programme is not None:
+                iteration = [offset, end]
+                programme["iterations"][line[4:].decode("utf-8").strip()] = iteration
+
+            # The sections go on until the next heading of the same or a higher level.
+            for section_range in (faculty and faculty["range"], programme and programme["range"], iteration):
+                if section_range is not None:
+                    section_range[1] = end
+            offset = end
+
+        return faculties
+
+    def load_index(self) -> dict:
+        file_stat = self.get_file_stat(self.path) if self.file is not None else [0, 0]
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index["version"] == self.INDEX_VERSION:
+                if index["file_stat"] == file_stat:
+                    return index["faculties"]
+                if index["file_stat"][0] == file_stat[0] and index["sha1"] == self.get_sha1():
+                    # Only touched, the index is written with the new stat so that it isn't hashed again.
+                    self.try_write_index(index["faculties"], file_stat)
+                    return index["faculties"]
+        except (OSError, ValueError, KeyError):
+            pass  # Missing or from another version, built again below.
+
+        if self.file is None:
+            return {}
+
+        Logger.log_info(f"Indexing the course plans in \"{self.path}\"...")
+        faculties = self.build_index(iter(self.data.readline, b""))
+        self.data.seek(0)
+        self.try_write_index(faculties, file_stat)
+        return faculties
+
+    def get_sha1(self) -> str:
+        return hashlib.sha1(self.data).hexdigest()
+
+    def try_write_index(self, faculties: dict, file_stat: list[int]) -> None:
+        try:
+            self.write_index(self.index_path, faculties, file_stat, self.get_sha1())
+        except OSError as e:
+            Logger.log_error(f"Couldn't write the course plan index: {e}")
+
+    @staticmethod
+    def write_index(index_path: str, faculties: dict, file_stat: list[int], sha1: str) -> None:
+        index = {"version": CoursePlanStore.INDEX_VERSION, "file_stat": file_stat, "sha1": sha1, "faculties": faculties}
+        write_atomically(index_path, lambda f: f.write(json.dumps(index, ensure_ascii=False, separators=(",", ":"))))
+
+    @staticmethod
+    def save(lines, path: str = COURSE_PLANS_FILE_PATH, index_path: str = COURSE_PLANS_INDEX_FILE_PATH) -> None:
+        """
+        Writes the lines of `course_plans.txt` and their index. The lines are written as they come (e.g. from a
+        generator) to a temporary file that replaces the file at the end, an interrupted save keeps the old file.
+        """
+        sha1 = hashlib.sha1()
+
+        def write_lines(f):
+            for line in lines:
+                encoded_line = line.encode("utf-8")
+                f.write(encoded_line)
+                sha1.update(encoded_line)
+                yield encoded_line
+
+        faculties = {}
+        write_atomically(path, lambda f: faculties.update(CoursePlanStore.build_index(write_lines(f))), binary=True)
+        CoursePlanStore.write_index(index_path, faculties, CoursePlanStore.get_file_stat(path), sha1.hexdigest())
+
+    @staticmethod
+    def decode_semesters(section: bytes) -> list[list[str]]:
+        """Returns the semesters in the lines of an iteration, after its heading, like `save_course_plans` reads them."""
+        # The file was read in text mode, "\r\n" and "\r" are line breaks too (unlike `str.splitlines`, only them).
+        semesters = []
+        lines = section.partition(b"\n")[2].decode("utf-8").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        for line in lines:
+            if line.strip() and len(semesters) < CoursePlanStore.MAX_SEMESTER_COUNT:
+                semesters.append(line.strip().split("="))
+
+        return semesters
+
+    def get_programmes(self, faculty: str) -> list[str]:
+        return list(self.faculties[faculty]["programmes"].keys())
+
+    def get_iterations(self, faculty: str, programme: str) -> list[str]:
+        return list(self.faculties[faculty]["programmes"][programme]["iterations"].keys())
+
+    def get_section(self, start: int, end: int) -> bytes:
+        return self.data[start:end]
+
+    def get_plan(self, faculty: str, programme: str, iteration: str) -> list[list[str]]:
+        """Returns the semesters of the iteration, the elective lists are kept as they are in the file."""
+        return self.decode_semesters(self.get_section(*self.faculties[faculty]["programmes"][programme]["iterations"][iteration]))
+
+    def get_plans(self, faculty: str, programme: str) -> dict:
+        """Returns the iterations of the programme with their semesters."""
+        return {iteration: self.get_plan(faculty, programme, iteration) for iteration in self.get_iterations(faculty, programme)}
@@ -1,142 +1,145 @@
-from os import path
 import re
-from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from logger import Logger
 from constants import *
-from time import sleep
-import threading
+from time import perf_counter
 
 from scraper import Scraper
+from scheduler import WorkStealingScheduler
+from concurrency import ConcurrencyController
 from driver_manager import DriverManager
+from course_code_index import CourseCodeIndex
+from negative_cache import NegativeCache
+from records import Course
+from metrics import Metrics
 
 
 class CourseScraper(Scraper):
     def __init__(self, webdriver):
         super().__init__(webdriver)
         self.courses = []
+        self.scraped_count = 0
+        self.dead_course_codes = None  # The codes that don't have a course page, they are not probed every run.
 
     def get_course_codes(self):
-        course_codes = []
-
-        # Read the lessons file
-        if path.exists(LESSONS_FILE_PATH):
-            with open(LESSONS_FILE_PATH, "r") as file:
-                course_codes += [l.split("|")[1] for l in file.readlines() if "|" in l]
-
-        # Read the course plans file
-        if path.exists(COURSE_PLANS_FILE_PATH):
-            with open(COURSE_PLANS_FILE_PATH, "r") as file:
-                course_rows = [l.replace("\n", "") for l in file.readlines() if l[0] != "#"]
-                for cells in [row.split("=") for row in course_rows]:
-                    for cell in cells:
-                        # If elective course
-                        if "[" in cell:
-                            course_codes += cell.split("*")[-1].replace("(", "").replace(")", "").replace("]", "").split("|")
-                        else:
-                            course_codes.append(cell)
-
-        # Read the old courses files
-        if path.exists(COURSES_FILE_PATH):
-            with open(COURSES_FILE_PATH, "r", encoding="utf-8") as file:
-                course_codes += [l.split("|")[0] for l in file.readlines() if "|" in l]
-
-        return list(set([c for c in course_codes if len(c) > 0]))  # Remove duplicates and empty strings.
-
-    def scrap_current_table(self, driver, timeout_dur: float=3.0):
-        output = ""
-        
+        # The codes of the lessons, the course plans and the already scraped courses.
+        return CourseCodeIndex.get_course_codes()
+
+    def scrap_current_table(self, driver, timeout_dur: float=None):
         try:
-            all_rows = WebDriverWait(driver, timeout_dur).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "tbody tr"))
+            # Poll with the extraction script itself, so that the table is read in the same call it's found in.
+            all_rows = self.wait_until(
+                "course_table", lambda d: self.extract_rows("tbody tr", d)["rows"], driver, timeout_dur
             )
         except TimeoutException:
             return None
 
-        output += self.find_elements_by_css_selector("td", all_rows[2])[0].get_attribute("innerHTML") + "|"  # Course Code
-        output += self.find_elements_by_css_selector("td", all_rows[2])[1].get_attribute("innerHTML") + "|"  # Course Name
-        output += self.find_elements_by_css_selector("td", all_rows[2])[2].get_attribute("innerHTML") + "|"  # Course Language
-
-        output += self.find_elements_by_css_selector("td", all_rows[4])[0].get_attribute("innerHTML") + "|"  # Course Credits
-        output += self.find_elements_by_css_selector("td", all_rows[4])[1].get_attribute("innerHTML") + "|"  # Course ECTS
-
-        output += self.find_elements_by_css_selector("td", all_rows[6])[1].get_attribute("innerHTML") + "|"  # Course Prerequisites
-        output += self.find_elements_by_css_selector("td", all_rows[7])[1].get_attribute("innerHTML") + "|"  # Major Prerequisites
-
-        output += self.find_elements_by_css_selector("td", all_rows[9])[0].get_attribute("innerHTML").replace("\n", "") # Description
+        cells = [[cell["html"] for cell in row["cells"]] for row in all_rows]
 
-        return re.sub(r'[ \t]+', ' ', re.sub(r'<.*?>', '', output)).strip()  # Remove HTML tags and extra spaces.
-
-    def scrap_courses_thread_routine(self, course_codes: list[str], thread_prefix: str, log_interval_modulo: int=100) -> None:
-        driver = DriverManager.create_driver()
-        driver.get(COURSES_URL)
-        sleep(3)
-
-        self.switch_to_turkish(driver, thread_prefix)
+        output = ""
+        output += cells[2][0] + "|"  # Course Code
+        output += cells[2][1] + "|"  # Course Name
+        output += cells[2][2] + "|"  # Course Language
 
-        for name, number in [c.split(" ") for c in course_codes]:
-            course_code_name = self.find_elements_by_css_selector("input[name='subj']", driver)[0]
-            course_code_number = self.find_elements_by_css_selector("input[name='numb']", driver)[0]
-            submit_button = self.find_elements_by_css_selector("input[type='submit']", driver)[0]
-            
-            course_code_name.clear()
-            course_code_name.send_keys(name)
+        output += cells[4][0] + "|"  # Course Credits
+        output += cells[4][1] + "|"  # Course ECTS
 
-            course_code_number.clear()
-            course_code_number.send_keys(number)
+        output += cells[6][1] + "|"  # Course Prerequisites
+        output += cells[7][1] + "|"  # Major Prerequisites
 
-            submit_button.click()
-            self.wait()
+        output += cells[9][0].replace("\n", "") # Description
 
-            table_content = self.scrap_current_table(driver)
-            if table_content is not None:
-                self.courses.append(table_content)
+        return Course.from_psv(re.sub(r'[ \t]+', ' ', re.sub(r'<.*?>', '', output)).strip())  # Remove HTML tags and extra spaces.
 
-                if len(self.courses) % log_interval_modulo == 0:
-                    Logger.log_info(f"Scraped {len(self.courses)} courses in total.")
-            else:
-                Logger.log_error(f"{thread_prefix} Could not scrap {name} {number}, timed out while waiting for the table to load.")
+    def setup_thread(self):
+        t0 = perf_counter()
+        driver = DriverManager.lease()
+        try:
+            self.load_page(COURSES_URL, driver=driver)
+            self.switch_to_turkish(driver)
+        except Exception:
+            DriverManager.release(driver)
+            raise
+
+        Logger.log_info(f"Ready to scrap in [green]{round(perf_counter() - t0, 2)}[/green] seconds.")
+        return driver
+
+    def renew_thread(self, driver):
+        # Workers hold their drivers for the whole run, so they are recycled here instead of on release.
+        if not DriverManager.needs_recycling(driver):
+            return driver
+
+        new_driver = self.setup_thread()
+        DriverManager.release(driver)
+        return new_driver
+
+    def scrap_course(self, driver, course_code: str, log_interval_modulo: int=100):
+        name, number = course_code.split(" ")
+
+        course_code_name = self.find_elements_by_css_selector("input[name='subj']", driver)[0]
+        course_code_number = self.find_elements_by_css_selector("input[name='numb']", driver)[0]
+        submit_button = self.find_elements_by_css_selector("input[type='submit']", driver)[0]
+        
+        course_code_name.clear()
+        course_code_name.send_keys(name)
 
-        Logger.log(f"{thread_prefix} [bright_green]Operation completed.[/bright_green]")
-        DriverManager.kill_driver(driver)
+        course_code_number.clear()
+        course_code_number.send_keys(number)
 
-    def split_list_into_chunks(self, lst, num_chunks):
-        # Calculate the average chunk size and remainder
-        chunk_size = len(lst) // num_chunks
-        remainder = len(lst) % num_chunks
-        
-        # Initialize the chunks
-        chunks = []
-        start = 0
-        
-        for i in range(num_chunks):
-            # If there's remainder, increase the chunk size for this chunk
-            end = start + chunk_size + (1 if i < remainder else 0)
-            chunks.append(lst[start:end])
-            start = end
-        
-        return chunks
+        self.mark_page(driver)
+        t0 = perf_counter()
+        submit_button.click()
 
-    def scrap_courses(self):
+        try:
+            self.wait_for("page_loaded", driver)
+        except TimeoutException:
+            # The page didn't load, that says nothing about the course.
+            Logger.log_error(f"Could not scrap {name} {number}, timed out while waiting for the page to load.")
+            return None
+        finally:
+            DriverManager.record_page_load(driver, perf_counter() - t0)
+
+        t0 = perf_counter()
+        course = self.scrap_current_table(driver)
+        if course is not None:
+            self.dead_course_codes.record_hit(course_code)
+            self.scraped_count += 1
+            if self.scraped_count % log_interval_modulo == 0:
+                Logger.log_info(f"Scraped {self.scraped_count} courses in total.")
+        else:
+            self.dead_course_codes.record_miss(course_code, perf_counter() - t0)
+            Logger.log_warning(f"Could not scrap {name} {number}, there is no course table for it.")
+
+        return course
+
+    def teardown_thread(self, driver) -> None:
+        Logger.log("[bright_green]Operation completed.[/bright_green]")
+        DriverManager.release(driver)
+
+    def scrap_courses(self, journal=None):
         Logger.log_info("====== Scraping All Courses ======")
 
-        self.courses = []
+        self.scraped_count = 0
         Logger.log_info("Finding course codes to scrap.")
-        courses_to_scrap = sorted(self.get_course_codes())
-        Logger.log_info(f"Found {len(courses_to_scrap)} courses to scrap.")
-        
-        chunks = self.split_list_into_chunks(courses_to_scrap, MAX_THREAD_COUNT)
-        threads = []
-        for i in range(MAX_THREAD_COUNT):
-            prefix = f"[royal_blue1][Thread {str(i).zfill(2)}][/royal_blue1]"
-            t = threading.Thread(target=self.scrap_courses_thread_routine, args=(chunks[i], prefix))
-            threads.append(t)
-        
-        # Start and wait for the threads to finish.
-        for t in threads: t.start()
-        for t in threads: t.join()
+        course_codes = sorted(self.get_course_codes())
+        self.dead_course_codes = NegativeCache("course_codes")
+        courses_to_scrap = [code for code in course_codes if not self.dead_course_codes.should_skip(code)]
+        Logger.log_info(f"Found {len(courses_to_scrap)} courses to scrap, skipping {len(course_codes) - len(courses_to_scrap)} dead course codes.")
+
+        # The pages are loaded by the drivers, so the course durations are the controller's feedback.
+        scheduler = WorkStealingScheduler(
+            courses_to_scrap, DRIVER_MAX_THREAD_COUNT, self.scrap_course, self.setup_thread, self.teardown_thread, journal,
+            controller=ConcurrencyController.for_url(COURSES_URL), record_items=True, renew_worker=self.renew_thread
+        )
+        try:
+            self.courses = [course for course in scheduler.run() if course is not None]
+        finally:
+            # Also kept if the run is interrupted, the next run would wait for the same timeouts otherwise.
+            self.dead_course_codes.save()
+
+        self.dead_course_codes.log_stats()
+        Metrics.set_gauge("negative_cache_saved_seconds", self.dead_course_codes.saved_seconds, cache="course_codes")
+        Metrics.set_gauge("negative_cache_skipped", self.dead_course_codes.skipped_count, cache="course_codes")
 
         Logger.log_info("[bold green]Scraping all courses is completed.[/bold green]")
-        return self.courses        
+        return self.courses
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+
+class CronSchedule:
+    """
+    A cron expression, like the ones in the GitHub Actions workflows: "minute hour day month weekday".
+
+    The fields can be `*`, numbers, ranges (`2-23`) and steps (`*/5`, `4/5`, `0-30/10`), separated by commas.
+    Like cron, when both the day and the weekday are restricted, a time matches if either of them does.
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]  # Weekdays start from Sunday.
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"A cron expression must have 5 fields, \"{expression}\" has {len(fields)}.")
+
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            CronSchedule.parse_field(field, low, high) for field, (low, high) in zip(fields, CronSchedule.RANGES)
+        ]
+        self.is_day_restricted = fields[2] != "*"
+        self.is_weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def parse_field(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = map(int, value_range.split("-"))
+            else:
+                # "4/5" is from 4 to the end of the range.
+                start = int(value_range)
+                end = high if step else start
+
+            # 7 is also Sunday, at the start ("7", "7/2") or at the end ("5-7") of a range.
+            if high == 6 and start == 7:
+                start, end = 0, 0 if end == 7 else end
+            if high == 6 and end == 7:
+                values.add(0)
+                end = 6
+            if start < low or end > high or start > end:
+                raise ValueError(f"\"{part}\" is out of the range {low}-{high}.")
+
+            values.update(range(start, end + 1, int(step) if step else 1))
+
+        return values
+
+    def is_day_matching(self, time: datetime) -> bool:
+        day_matches = time.day in self.days
+        weekday_matches = (time.weekday() + 1) % 7 in self.weekdays
+        if self.is_day_restricted and self.is_weekday_restricted:
+            return day_matches or weekday_matches
+
+        return day_matches and weekday_matches
+
+    def get_next_time(self, after: datetime) -> datetime:
+        """Returns the first matching minute after `after`."""
+        time = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = time + timedelta(days=366 * 4)  # Enough for "0 0 29 2 *".
+        while time < limit:
+            if time.month not in self.months:
+                time = (time.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.is_day_matching(time):
+                time = time.replace(hour=0, minute=0) + timedelta(days=1)
+            elif time.hour not in self.hours:
+                time = time.replace(minute=0) + timedelta(hours=1)
+            elif time.minute not in self.minutes:
+                time += timedelta(minutes=1)
+            else:
+                return time
+
+        raise ValueError(f"\"{self.expression}\" never matches.")
@@ -1,18 +1,52 @@
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium import webdriver
+from time import perf_counter
+from queue import Queue, Empty
+import threading
 import atexit
-from tqdm import tqdm
+import os
 from logger import Logger
+from metrics import Metrics
+from constants import *
 
 
 class DriverManager:
     active_drivers = []
 
+    # Driver binary, resolved only once per process.
+    driver_path = None
+    driver_path_lock = threading.Lock()
+
+    # Pool of warm drivers, see `lease` and `release`.
+    pool_enabled = DRIVER_POOL_ENABLED
+    scrape_profile_enabled = DRIVER_SCRAPE_PROFILE_ENABLED
+    idle_drivers = Queue()
+    page_loads = {}
+    warming_count = 0
+    pool_lock = threading.Lock()
+    EMPTY_STATS = {
+        "created": 0, "creation_time": 0.0, "leased": 0, "lease_wait_time": 0.0, "recycled": 0, "unhealthy": 0, "commands": 0,
+        "page_loads": 0, "page_load_time": 0.0, "rss_samples": 0, "rss_total": 0.0, "max_rss": 0.0
+    }
+    stats = dict(EMPTY_STATS)
+
+    @staticmethod
+    def get_driver_path() -> str:
+        # Installing the driver from multiple threads at the same time may cause the downloads to conflict.
+        with DriverManager.driver_path_lock:
+            if DriverManager.driver_path is None:
+                from webdriver_manager.chrome import ChromeDriverManager
+                DriverManager.driver_path = ChromeDriverManager().install()
+
+        return DriverManager.driver_path
+
     @staticmethod
     def create_driver():
+        # Imported here, so that the targets that don't use a driver don't import selenium.
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from selenium import webdriver
+
         Logger.log_info("Creating a new web driver.")
+        t0 = perf_counter()
         chrome_options = Options()
 
         chrome_options.add_argument("--disable-extensions")
@@ -22,26 +56,263 @@ class DriverManager:
         chrome_options.add_argument("log-level=2")
         chrome_options.add_argument("--no-proxy-server")
         chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+        if DriverManager.scrape_profile_enabled:
+            chrome_options.page_load_strategy = DRIVER_PAGE_LOAD_STRATEGY
+            chrome_options.add_argument(f"--window-size={DRIVER_WINDOW_SIZE}")
+            for switch in DRIVER_MEMORY_SWITCHES:
+                chrome_options.add_argument(switch)
 
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        driver = webdriver.Chrome(service=Service(DriverManager.get_driver_path()), options=chrome_options)
+        if DriverManager.scrape_profile_enabled:
+            # Blocked in the network stack, so the blocked resources aren't even requested.
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": DriverManager.get_blocked_url_patterns()})
+        DriverManager.count_commands(driver)
         DriverManager.active_drivers.append(driver)
+
+        with DriverManager.pool_lock:
+            DriverManager.page_loads[driver] = 0
+            DriverManager.stats["created"] += 1
+            DriverManager.stats["creation_time"] += perf_counter() - t0
+
         return driver
 
+    @staticmethod
+    def get_blocked_url_patterns() -> list[str]:
+        patterns = []
+        for extension in DRIVER_BLOCKED_EXTENSIONS:
+            patterns += [f"*.{extension}", f"*.{extension}?*"]  # Also with query strings, like "site.css?v=3".
+
+        return patterns + [f"*{host}*" for host in DRIVER_BLOCKED_HOSTS]
+
+    @staticmethod
+    def get_loaded_ready_states() -> list[str]:
+        """The `document.readyState`s a page counts as loaded at, with the eager strategy the subresources aren't waited for."""
+        if DriverManager.scrape_profile_enabled and DRIVER_PAGE_LOAD_STRATEGY == "eager":
+            return ["interactive", "complete"]
+
+        return ["complete"]
+
+    @staticmethod
+    def count_commands(driver) -> None:
+        # WebElements send their commands through their parent driver, so this counts those too.
+        execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            with DriverManager.pool_lock:
+                DriverManager.stats["commands"] += 1
+            with Metrics.timer("webdriver_command_seconds", command=driver_command):
+                return execute(driver_command, params)
+
+        driver.execute = counting_execute
+
     @staticmethod
     def kill_driver(driver):
         driver.quit()
         if driver in DriverManager.active_drivers:
             DriverManager.active_drivers.remove(driver)
 
+        with DriverManager.pool_lock:
+            DriverManager.page_loads.pop(driver, None)
+
     @staticmethod
     def clear_drivers():
         if len(DriverManager.active_drivers) == 0:
             return
 
+        from tqdm import tqdm
         Logger.log_info("Clearing all existing web drivers")
         for driver in tqdm(DriverManager.active_drivers, desc="Clearing Web Drivers"):
             driver.quit()
 
+    @staticmethod
+    def warm_driver_routine():
+        try:
+            DriverManager.idle_drivers.put(DriverManager.create_driver())
+        except Exception as e:
+            Logger.log_error(f"Failed to pre-warm a web driver, error: {e}")
+        finally:
+            with DriverManager.pool_lock:
+                DriverManager.warming_count -= 1
+
+    @staticmethod
+    def prewarm(count: int) -> None:
+        """Creates drivers in the background until there are `count` idle or warming drivers in the pool."""
+        if not DriverManager.pool_enabled:
+            return
+
+        with DriverManager.pool_lock:
+            missing_count = count - DriverManager.idle_drivers.qsize() - DriverManager.warming_count
+            DriverManager.warming_count += max(missing_count, 0)
+
+        for _ in range(missing_count):
+            threading.Thread(target=DriverManager.warm_driver_routine, daemon=True).start()
+
+    @staticmethod
+    def get_idle_driver():
+        while True:
+            try:
+                return DriverManager.idle_drivers.get(timeout=.1)
+            except Empty:
+                # Only wait for the pool if there are drivers on the way.
+                with DriverManager.pool_lock:
+                    if DriverManager.warming_count == 0 and DriverManager.idle_drivers.empty():
+                        return None
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def lease():
+        """Returns a driver from the pool, or a new one if the pool is empty. Return it with `release` when done."""
+        if not DriverManager.pool_enabled:
+            return DriverManager.create_driver()
+
+        t0 = perf_counter()
+        while True:
+            driver = DriverManager.get_idle_driver()
+            if driver is None:
+                driver = DriverManager.create_driver()
+            elif not DriverManager.is_healthy(driver):
+                Logger.log_warning("Discarding an unhealthy web driver.")
+                with DriverManager.pool_lock:
+                    DriverManager.stats["unhealthy"] += 1
+                DriverManager.kill_driver(driver)
+                continue
+            break
+
+        with DriverManager.pool_lock:
+            DriverManager.stats["leased"] += 1
+            DriverManager.stats["lease_wait_time"] += perf_counter() - t0
+
+        return driver
+
+    @staticmethod
+    def release(driver) -> None:
+        """Returns a leased driver to the pool, drivers that served too many pages or use too much memory are recycled."""
+        DriverManager.record_rss(driver)
+        if not DriverManager.pool_enabled:
+            DriverManager.kill_driver(driver)
+            return
+
+        if DriverManager.needs_recycling(driver):
+            with DriverManager.pool_lock:
+                DriverManager.stats["recycled"] += 1
+            DriverManager.kill_driver(driver)
+            DriverManager.prewarm(DriverManager.idle_drivers.qsize() + 1)
+            return
+
+        DriverManager.idle_drivers.put(driver)
+
+    @staticmethod
+    def record_page_load(driver, duration: float) -> None:
+        with DriverManager.pool_lock:
+            DriverManager.page_loads[driver] = DriverManager.page_loads.get(driver, 0) + 1
+            DriverManager.stats["page_loads"] += 1
+            DriverManager.stats["page_load_time"] += duration
+        Metrics.observe("page_load_seconds", duration)
+
+    @staticmethod
+    def get_rss(driver) -> float:
+        """
+        Returns the RSS of the driver's chromedriver, browser and renderer processes in MBs, or 0 if it can't be read.
+        The processes are found through /proc, so it's only measured on Linux.
+        """
+        try:
+            root_pid = driver.service.process.pid
+            pids = [int(pid) for pid in os.listdir("/proc") if pid.isdigit()]
+        except (AttributeError, OSError):
+            return 0
+
+        children, rss_pages = {}, {}
+        for pid in pids:
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    parent_pid = int(f.read().rsplit(")", 1)[1].split()[1])  # The name in the parentheses may have spaces.
+                with open(f"/proc/{pid}/statm") as f:
+                    rss_pages[pid] = int(f.read().split()[1])
+            except (OSError, ValueError, IndexError):
+                continue  # The process exited in the meantime.
+
+            children.setdefault(parent_pid, []).append(pid)
+
+        tree, total_pages = [root_pid], 0
+        while len(tree) > 0:
+            pid = tree.pop()
+            total_pages += rss_pages.get(pid, 0)
+            tree += children.get(pid, [])
+
+        return total_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+    @staticmethod
+    def record_rss(driver) -> None:
+        rss = DriverManager.get_rss(driver)
+        if rss == 0:
+            return
+
+        with DriverManager.pool_lock:
+            DriverManager.stats["rss_samples"] += 1
+            DriverManager.stats["rss_total"] += rss
+            DriverManager.stats["max_rss"] = max(DriverManager.stats["max_rss"], rss)
+        Metrics.observe("driver_rss_mb", rss)
+
+    @staticmethod
+    def get_memory_usage(driver) -> float:
+        """Returns the used JS heap size of the driver's page in MBs, or 0 if it can't be read."""
+        try:
+            heap_size = driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : 0;")
+            return (heap_size or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    @staticmethod
+    def needs_recycling(driver) -> bool:
+        if DriverManager.page_loads.get(driver, 0) >= DRIVER_MAX_PAGE_LOADS:
+            return True
+
+        return DriverManager.get_memory_usage(driver) >= DRIVER_MAX_MEMORY_MB
+
+    @staticmethod
+    def reset_stats() -> None:
+        """Called before every run, the pooled drivers are kept."""
+        with DriverManager.pool_lock:
+            DriverManager.stats = dict(DriverManager.EMPTY_STATS)
+
+    @staticmethod
+    def log_stats() -> None:
+        stats = DriverManager.stats
+        if stats["created"] == 0 and stats["leased"] == 0:
+            return
+
+        # In daemon mode, the later runs may only lease the drivers created by the earlier ones.
+        creation_stats = "Created no web drivers, "
+        if stats["created"] > 0:
+            creation_stats = (
+                f"Created {stats['created']} web drivers in [green]{round(stats['creation_time'], 2)}[/green] seconds "
+                f"({round(stats['creation_time'] / stats['created'], 2)} seconds per driver), "
+            )
+
+        Logger.log_info(
+            f"{creation_stats}"
+            f"waited [green]{round(stats['lease_wait_time'], 2)}[/green] seconds for {stats['leased']} leases, "
+            f"recycled {stats['recycled']} and discarded {stats['unhealthy']} unhealthy drivers. "
+            f"Sent {stats['commands']} WebDriver commands."
+        )
+        if stats["page_loads"] > 0:
+            Logger.log_info(
+                f"Loaded {stats['page_loads']} pages in [green]{round(stats['page_load_time'] / stats['page_loads'], 3)}[/green] "
+                f"seconds on average."
+            )
+        if stats["rss_samples"] > 0:
+            Logger.log_info(
+                f"The drivers used [green]{round(stats['rss_total'] / stats['rss_samples'])}[/green] MB of RSS on average "
+                f"when they were released, at most {round(stats['max_rss'])} MB."
+            )
+
 
 # It's recommended to uncomment the following code when testing locally.
 
@@ -0,0 +1,42 @@
+import os
+import stat
+import tempfile
+
+
+def write_atomically(file_path: str, write, binary: bool = False) -> None:
+    """
+    Calls `write` with a temporary file opened next to `file_path`, then renames it over `file_path`.
+    Readers either see the old file or the new one, never a partially written file.
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    # Temporary files are only readable by their owner, keep the permissions of the file being replaced instead.
+    mode = stat.S_IMODE(os.stat(file_path).st_mode) if os.path.exists(file_path) else 0o644
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            write(f)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def write_lines_atomically(file_path: str, lines) -> None:
+    write_atomically(file_path, lambda f: f.writelines(lines))
+
+
+def write_bytes_atomically(file_path: str, data: bytes) -> None:
+    write_atomically(file_path, lambda f: f.write(data), binary=True)
+
+
+def read_lines(file_path: str) -> list[str]:
+    """Returns the lines of the file, or an empty list if it doesn't exist."""
+    if not os.path.exists(file_path):
+        return []
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.readlines()
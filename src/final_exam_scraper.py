@@ -1,13 +1,14 @@
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select, WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
 import re
-import threading
-from time import sleep
+from time import perf_counter
 
 from scraper import Scraper
+from scheduler import WorkStealingScheduler
+from concurrency import ConcurrencyController
+from records import FinalExam
 from logger import Logger
 from constants import *
 from driver_manager import DriverManager
@@ -23,11 +24,9 @@ class FinalExamScraper(Scraper):
         """Extract all available branch codes from the dropdown"""
         try:
             # Wait for the dropdown to load
-            dropdown = WebDriverWait(self.webdriver, 10).until(
-                EC.presence_of_element_located((By.ID, "DersBransKoduId"))
-            )
+            self.wait_for("dropdown_populated", selector="#DersBransKoduId")
             
-            select = Select(dropdown)
+            select = Select(self.webdriver.find_element(By.ID, "DersBransKoduId"))
             branch_codes = []
             
             for option in select.options:
@@ -46,90 +45,34 @@ class FinalExamScraper(Scraper):
 
     def scrape_exam_table(self, branch_code_info):
         """Scrape the exam table for a specific branch code"""
-        try:
-            # Select the branch code from dropdown
-            dropdown = self.webdriver.find_element(By.ID, "DersBransKoduId")
-            select = Select(dropdown)
-            select.select_by_value(branch_code_info['value'])
-            
-            # Click the submit button
-            submit_button = self.webdriver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-            submit_button.click()
-            
-            # Wait for the table to load
-            self.wait(2)
-            
-            # Check if table container is visible
-            table_container = self.webdriver.find_element(By.ID, "finalTakvimiTableContainer")
-            if table_container.get_attribute("style") and "display: none" in table_container.get_attribute("style"):
-                Logger.log_warning(f"No exam data found for branch code: {branch_code_info['text']}")
-                return []
-            
-            # Check if there's a "no data" message instead of a table
-            container_html = table_container.get_attribute("innerHTML")
-            if "yayınlanmamıştır" in container_html or "not published" in container_html:
-                Logger.log_warning(f"No exam data published for branch code: {branch_code_info['text']}")
-                return []
-            
-            # Try to find the table
-            try:
-                table = table_container.find_element(By.TAG_NAME, "table")
-                rows = table.find_elements(By.TAG_NAME, "tr")
-            except NoSuchElementException:
-                Logger.log_warning(f"No table found for branch code: {branch_code_info['text']}")
-                return []
-            
-            exam_data = []
-            
-            # Skip header row
-            for row in rows[1:]:
-                cells = row.find_elements(By.TAG_NAME, "td")
-                if len(cells) >= 10:  # Ensure we have all expected columns
-                    # Handle multiple exam locations properly
-                    exam_location_cell = cells[6]
-                    exam_location_html = exam_location_cell.get_attribute("innerHTML")
-                    
-                    # Split by <br> tags and clean up each location
-                    locations = []
-                    if "<br>" in exam_location_html:
-                        # Split by <br> tags and clean each location
-                        location_parts = exam_location_html.split("<br>")
-                        for part in location_parts:
-                            # Clean HTML tags and whitespace
-                            clean_location = re.sub(r'<[^>]+>', '', part).strip()
-                            if clean_location:
-                                locations.append(clean_location)
-                    else:
-                        # Single location
-                        locations = [exam_location_cell.text.strip()]
-                    
-                    # Join multiple locations with commas
-                    exam_location = ", ".join(locations)
-                    
-                    exam_row = {
-                        'crn': cells[0].text.strip(),
-                        'course_code': cells[1].text.strip(),
-                        'course_number': cells[2].text.strip(),
-                        'course_name': cells[3].text.strip(),
-                        'academician': cells[4].text.strip(),
-                        'exam_type': cells[5].text.strip(),
-                        'exam_location': exam_location,
-                        'day': cells[7].text.strip(),
-                        'time': cells[8].text.strip(),
-                        'date': cells[9].text.strip(),
-                        'branch_code': branch_code_info['text']
-                    }
-                    exam_data.append(exam_row)
-            
+        exam_data = self.scrape_exam_table_with_driver(self.webdriver, branch_code_info)
+        if exam_data is not None:
             Logger.log_info(f"Scraped {len(exam_data)} exams for branch code: {branch_code_info['text']}")
-            return exam_data
-            
-        except (TimeoutException, NoSuchElementException) as e:
-            Logger.log_error(f"Error scraping exams for branch code {branch_code_info['text']}: {str(e)}")
-            return []
+        return exam_data
+
+    def get_exam_location(self, exam_location_cell):
+        """Get the exam locations of a row, multiple locations are separated by <br> tags"""
+        exam_location_html = exam_location_cell["html"]
+
+        # Split by <br> tags and clean up each location
+        locations = []
+        if "<br>" in exam_location_html:
+            # Split by <br> tags and clean each location
+            location_parts = exam_location_html.split("<br>")
+            for part in location_parts:
+                # Clean HTML tags and whitespace
+                clean_location = re.sub(r'<[^>]+>', '', part).strip()
+                if clean_location:
+                    locations.append(clean_location)
+        else:
+            # Single location
+            locations = [exam_location_cell["text"].strip()]
+
+        # Join multiple locations with commas
+        return ", ".join(locations)
 
     def scrape_exam_table_with_driver(self, driver, branch_code_info):
-        """Scrape the exam table for a specific branch code using a specific driver"""
+        """Scrape the exam table for a specific branch code using a specific driver, returns None if it fails"""
         try:
             # Select the branch code from dropdown
             dropdown = driver.find_element(By.ID, "DersBransKoduId")
@@ -138,124 +81,114 @@ class FinalExamScraper(Scraper):
             
             # Click the submit button
             submit_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
+            ajax_count = self.get_ajax_count(driver)
             submit_button.click()
             
             # Wait for the table to load
-            sleep(2)
-            
+            self.wait_for("ajax_idle", driver, after=ajax_count)
+
+            # Read the table container and all of its rows at once
+            table_container = self.extract_rows("table tr", driver, "#finalTakvimiTableContainer")
+            if table_container is None:
+                raise NoSuchElementException("Could not find the final exam table container.")
+
             # Check if table container is visible
-            table_container = driver.find_element(By.ID, "finalTakvimiTableContainer")
-            if table_container.get_attribute("style") and "display: none" in table_container.get_attribute("style"):
+            if table_container["style"] and "display: none" in table_container["style"]:
                 Logger.log_warning(f"No exam data found for branch code: {branch_code_info['text']}")
                 return []
             
             # Check if there's a "no data" message instead of a table
-            container_html = table_container.get_attribute("innerHTML")
+            container_html = table_container["html"]
             if "yayınlanmamıştır" in container_html or "not published" in container_html:
                 Logger.log_warning(f"No exam data published for branch code: {branch_code_info['text']}")
                 return []
             
             # Try to find the table
-            try:
-                table = table_container.find_element(By.TAG_NAME, "table")
-                rows = table.find_elements(By.TAG_NAME, "tr")
-            except NoSuchElementException:
+            if "<table" not in container_html:
                 Logger.log_warning(f"No table found for branch code: {branch_code_info['text']}")
                 return []
             
             exam_data = []
             
             # Skip header row
-            for row in rows[1:]:
-                cells = row.find_elements(By.TAG_NAME, "td")
+            for row in table_container["rows"][1:]:
+                cells = row["cells"]
                 if len(cells) >= 10:  # Ensure we have all expected columns
-                    # Handle multiple exam locations properly
-                    exam_location_cell = cells[6]
-                    exam_location_html = exam_location_cell.get_attribute("innerHTML")
-                    
-                    # Split by <br> tags and clean up each location
-                    locations = []
-                    if "<br>" in exam_location_html:
-                        # Split by <br> tags and clean each location
-                        location_parts = exam_location_html.split("<br>")
-                        for part in location_parts:
-                            # Clean HTML tags and whitespace
-                            clean_location = re.sub(r'<[^>]+>', '', part).strip()
-                            if clean_location:
-                                locations.append(clean_location)
-                    else:
-                        # Single location
-                        locations = [exam_location_cell.text.strip()]
-                    
-                    # Join multiple locations with commas
-                    exam_location = ", ".join(locations)
-                    
-                    exam_row = {
-                        'crn': cells[0].text.strip(),
-                        'course_code': cells[1].text.strip(),
-                        'course_number': cells[2].text.strip(),
-                        'course_name': cells[3].text.strip(),
-                        'academician': cells[4].text.strip(),
-                        'exam_type': cells[5].text.strip(),
-                        'exam_location': exam_location,
-                        'day': cells[7].text.strip(),
-                        'time': cells[8].text.strip(),
-                        'date': cells[9].text.strip(),
-                        'branch_code': branch_code_info['text']
-                    }
-                    exam_data.append(exam_row)
+                    exam_data.append(FinalExam(
+                        crn=cells[0]["text"].strip(),
+                        course_code=cells[1]["text"].strip(),
+                        course_number=cells[2]["text"].strip(),
+                        course_name=cells[3]["text"].strip(),
+                        academician=cells[4]["text"].strip(),
+                        exam_type=cells[5]["text"].strip(),
+                        exam_location=self.get_exam_location(cells[6]),
+                        day=cells[7]["text"].strip(),
+                        time=cells[8]["text"].strip(),
+                        date=cells[9]["text"].strip(),
+                        branch_code=branch_code_info['text']
+                    ))
             
             return exam_data
             
         except (TimeoutException, NoSuchElementException) as e:
+            # Not an empty result, the branch code has to be scraped again.
             Logger.log_error(f"Error scraping exams for branch code {branch_code_info['text']}: {str(e)}")
-            return []
+            return None
 
-    def scrape_branch_codes_thread_routine(self, branch_codes, thread_prefix, log_interval_modulo=10):
-        """Thread routine for scraping multiple branch codes"""
-        driver = DriverManager.create_driver()
-        driver.get(FINAL_EXAM_URL)
-        sleep(3)
-        
-        # Switch to Turkish if needed
-        self.switch_to_turkish(driver, thread_prefix)
-        
-        thread_exams = []
-        
-        for i, branch_code in enumerate(branch_codes):
-            try:
-                # Use the same scraper methods but with the thread's driver
-                exams = self.scrape_exam_table_with_driver(driver, branch_code)
-                thread_exams.extend(exams)
-                
-                if (i + 1) % log_interval_modulo == 0:
-                    Logger.log_info(f"{thread_prefix} Scraped {len(thread_exams)} exams so far")
-                    
-            except Exception as e:
-                Logger.log_error(f"{thread_prefix} Error processing branch code {branch_code['text']}: {str(e)}")
-        
-        # Add thread results to main results
-        self.final_exams.extend(thread_exams)
-        
-        Logger.log_info(f"{thread_prefix} Completed. Total exams scraped: {len(thread_exams)}")
-        DriverManager.kill_driver(driver)
+    def lease_driver(self):
+        """Lease a driver and open the final exam page with it"""
+        t0 = perf_counter()
+        driver = DriverManager.lease()
+        try:
+            self.load_page(FINAL_EXAM_URL, driver=driver)
 
-    def split_list_into_chunks(self, lst, num_chunks):
-        """Split list into chunks for parallel processing"""
-        chunk_size = len(lst) // num_chunks
-        remainder = len(lst) % num_chunks
-        
-        chunks = []
-        start = 0
-        
-        for i in range(num_chunks):
-            end = start + chunk_size + (1 if i < remainder else 0)
-            chunks.append(lst[start:end])
-            start = end
-        
-        return chunks
+            # Switch to Turkish if needed
+            self.switch_to_turkish(driver)
+        except Exception:
+            DriverManager.release(driver)
+            raise
+
+        Logger.log_info(f"Ready to scrape in [green]{round(perf_counter() - t0, 2)}[/green] seconds.")
+        return driver
 
-    def scrape_final_exams(self):
+    def setup_thread(self):
+        """Lease a driver for a thread"""
+        return {"driver": self.lease_driver(), "branch_code_count": 0, "exam_count": 0}
+
+    def renew_thread(self, thread_state):
+        """Replace the thread's driver if it served too many pages or uses too much memory"""
+        driver = thread_state["driver"]
+        if DriverManager.needs_recycling(driver):
+            thread_state["driver"] = self.lease_driver()
+            DriverManager.release(driver)
+
+        return thread_state
+
+    def scrape_branch_code(self, thread_state, branch_code, log_interval_modulo=10):
+        """Scrape the exams of a branch code with the thread's driver"""
+        try:
+            # Use the same scraper methods but with the thread's driver
+            exams = self.scrape_exam_table_with_driver(thread_state["driver"], branch_code)
+        except Exception as e:
+            # Not an empty result, so that it's not recorded as completed to the progress journal.
+            Logger.log_error(f"Error processing branch code {branch_code['text']}: {str(e)}")
+            return None
+
+        if exams is None:
+            return None
+
+        thread_state["branch_code_count"] += 1
+        thread_state["exam_count"] += len(exams)
+        if thread_state["branch_code_count"] % log_interval_modulo == 0:
+            Logger.log_info(f"Scraped {thread_state['exam_count']} exams so far")
+
+        return exams
+
+    def teardown_thread(self, thread_state):
+        Logger.log_info(f"Completed. Total exams scraped: {thread_state['exam_count']}")
+        DriverManager.release(thread_state["driver"])
+
+    def scrape_final_exams(self, journal=None):
         """Main method to scrape all final exams"""
         Logger.log_info("====== Scraping Final Exam Schedule ======")
         
@@ -271,21 +204,16 @@ class FinalExamScraper(Scraper):
         
         Logger.log_info(f"Found {len(branch_codes)} branch codes to scrape")
         
-        # Split into chunks for parallel processing
-        chunks = self.split_list_into_chunks(branch_codes, MAX_THREAD_COUNT)
-        threads = []
-        
-        for i in range(MAX_THREAD_COUNT):
-            if chunks[i]:  # Only create thread if chunk has data
-                prefix = f"[royal_blue1][Thread {str(i).zfill(2)}][/royal_blue1]"
-                t = threading.Thread(target=self.scrape_branch_codes_thread_routine, args=(chunks[i], prefix))
-                threads.append(t)
-        
-        # Start and wait for threads to finish
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        # The threads take the branch codes one by one, and help the others when they run out of them
+        scheduler = WorkStealingScheduler(
+            branch_codes, DRIVER_MAX_THREAD_COUNT, self.scrape_branch_code, self.setup_thread, self.teardown_thread,
+            journal, lambda branch_code: branch_code['value'],
+            controller=ConcurrencyController.for_url(FINAL_EXAM_URL), record_items=True,
+            renew_worker=self.renew_thread
+        )
+        for exams in scheduler.run():
+            if exams is not None:
+                self.final_exams.extend(exams)
         
         Logger.log_info(f"[bold green]Final exam scraping completed. Total exams scraped: {len(self.final_exams)}[/bold green]")
         return self.final_exams
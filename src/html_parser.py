@@ -0,0 +1,280 @@
+from html.parser import HTMLParser
+
+from logger import Logger
+from constants import *
+
+
+class HtmlLink:
+    __slots__ = ("href", "text")
+
+    def __init__(self, href: str, text: str = "") -> None:
+        self.href = href
+        self.text = text
+
+    def __eq__(self, other) -> bool:
+        return (self.href, self.text) == (other.href, other.text)
+
+    def __repr__(self) -> str:
+        return f"HtmlLink({self.href!r}, {self.text!r})"
+
+
+class HtmlCell:
+    __slots__ = ("text", "links")
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.links = []
+
+    def __eq__(self, other) -> bool:
+        return (self.text, self.links) == (other.text, other.links)
+
+    def __repr__(self) -> str:
+        return f"HtmlCell({self.text!r}, {self.links!r})"
+
+
+class HtmlRow:
+    __slots__ = ("cells", "links", "in_tbody")
+
+    def __init__(self, in_tbody: bool) -> None:
+        self.cells = []  # Only the <td> cells, like `row.find_all("td")`.
+        self.links = []  # All links in the row, including the ones outside of the <td> cells.
+        self.in_tbody = in_tbody
+
+    def __eq__(self, other) -> bool:
+        return (self.cells, self.links, self.in_tbody) == (other.cells, other.links, other.in_tbody)
+
+    def __repr__(self) -> str:
+        return f"HtmlRow({self.cells!r}, in_tbody={self.in_tbody})"
+
+
+class HtmlTable:
+    __slots__ = ("rows", "has_tbody")
+
+    def __init__(self) -> None:
+        self.rows = []
+        self.has_tbody = False
+
+    @property
+    def body_rows(self) -> list:
+        return [row for row in self.rows if row.in_tbody]
+
+    def __eq__(self, other) -> bool:
+        return (self.rows, self.has_tbody) == (other.rows, other.has_tbody)
+
+
+class HtmlDocument:
+    """
+    The parts of a page the scrapers use: its tables, rows, cells, links and headings.
+    A row belongs to the innermost table it's in, `rows` has all the rows of the page in document order.
+    """
+    __slots__ = ("tables", "rows", "headings")
+
+    def __init__(self) -> None:
+        self.tables = []
+        self.rows = []
+        self.headings = []  # (tag, classes, text) tuples of the <h1>...<h6> elements.
+
+    def has_heading(self, tag: str, class_name: str) -> bool:
+        return any(t == tag and class_name in classes for t, classes, _ in self.headings)
+
+    def __eq__(self, other) -> bool:
+        return (self.tables, self.rows, self.headings) == (other.tables, other.rows, other.headings)
+
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def document_from_soup(soup: "BeautifulSoup") -> HtmlDocument:
+    document = HtmlDocument()
+    tables = {}
+
+    for table_tag in soup.find_all("table"):
+        table = HtmlTable()
+        table.has_tbody = any(tbody_tag.find_parent("table") is table_tag for tbody_tag in table_tag.find_all("tbody"))
+        tables[id(table_tag)] = table
+        document.tables.append(table)
+
+    for row_tag in soup.find_all("tr"):
+        tbody_tag, table_tag = row_tag.find_parent("tbody"), row_tag.find_parent("table")
+        row = HtmlRow(in_tbody=tbody_tag is not None and (table_tag is None or tbody_tag.find_parent("table") is table_tag))
+        row.links = [HtmlLink(a.get("href"), a.get_text()) for a in row_tag.find_all("a")]
+
+        for cell_tag in row_tag.find_all("td"):
+            if cell_tag.find_parent("tr") is not row_tag:
+                continue  # Cells of a nested table belong to the nested table's rows.
+
+            cell = HtmlCell()
+            cell.text = cell_tag.get_text()
+            cell.links = [HtmlLink(a.get("href"), a.get_text()) for a in cell_tag.find_all("a")]
+            row.cells.append(cell)
+
+        document.rows.append(row)
+        if table_tag is not None:
+            tables[id(table_tag)].rows.append(row)
+
+    for heading_tag in soup.find_all(HEADING_TAGS):
+        document.headings.append((heading_tag.name, heading_tag.get("class", []), heading_tag.get_text()))
+
+    return document
+
+
+class TableExtractor(HTMLParser):
+    """
+    Builds an `HtmlDocument` straight from the tokens of the page, without building the tree of the whole page.
+    Gives the same output as `document_from_soup` for well formed pages.
+    """
+
+    IGNORED_TEXT_TAGS = ("script", "style", "template")
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.document = HtmlDocument()
+        self.open_tags = []  # Only the tags that matter for the document.
+        self.open_tables = []
+        self.open_rows = []
+        self.open_cells = []
+        self.open_links = []
+        self.open_heading = None
+        self.ignored_text_depth = 0
+
+    def handle_starttag(self, tag, attrs) -> None:
+        if tag in self.IGNORED_TEXT_TAGS:
+            self.ignored_text_depth += 1
+        elif tag == "table":
+            table = HtmlTable()
+            self.document.tables.append(table)
+            self.open_tables.append(table)
+        elif tag == "tbody":
+            if len(self.open_tables) > 0:
+                self.open_tables[-1].has_tbody = True
+        elif tag == "tr":
+            row = HtmlRow(in_tbody=self.is_in_tbody())
+            self.document.rows.append(row)
+            if len(self.open_tables) > 0:
+                self.open_tables[-1].rows.append(row)
+            self.open_rows.append(row)
+        elif tag == "td":
+            cell = HtmlCell()
+            if len(self.open_rows) > 0:
+                self.open_rows[-1].cells.append(cell)
+            self.open_cells.append(cell)
+        elif tag == "a":
+            # Like the text, links of nested tables are also a part of the outer rows and cells.
+            link = HtmlLink(dict(attrs).get("href"))
+            for row in self.open_rows:
+                row.links.append(link)
+            for cell in self.open_cells:
+                cell.links.append(link)
+            self.open_links.append(link)
+        elif tag in HEADING_TAGS:
+            classes = (dict(attrs).get("class") or "").split()
+            self.open_heading = [tag, classes, ""]
+        else:
+            return
+
+        self.open_tags.append(tag)
+
+    def is_in_tbody(self) -> bool:
+        # The <tbody> must be inside the innermost table.
+        for tag in reversed(self.open_tags):
+            if tag == "tbody":
+                return True
+            if tag == "table":
+                return False
+        return False
+
+    def handle_endtag(self, tag) -> None:
+        if tag in self.IGNORED_TEXT_TAGS:
+            self.ignored_text_depth = max(self.ignored_text_depth - 1, 0)
+            return
+
+        if tag not in self.open_tags:
+            return
+
+        # Close everything that was left open inside of this tag.
+        while len(self.open_tags) > 0:
+            open_tag = self.open_tags.pop()
+            if open_tag == "table":
+                self.open_tables.pop()
+            elif open_tag == "tr":
+                self.open_rows.pop()
+            elif open_tag == "td":
+                self.open_cells.pop()
+            elif open_tag == "a":
+                self.open_links.pop()
+            elif open_tag in HEADING_TAGS and self.open_heading is not None:
+                self.document.headings.append(tuple(self.open_heading))
+                self.open_heading = None
+
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data) -> None:
+        if self.ignored_text_depth > 0:
+            return
+
+        for cell in self.open_cells:
+            cell.text += data
+        for link in self.open_links:
+            link.text += data
+        if self.open_heading is not None:
+            self.open_heading[2] += data
+
+
+def decode_markup(markup) -> str:
+    if isinstance(markup, str):
+        return markup
+
+    # Same encoding detection BeautifulSoup uses.
+    from bs4.dammit import UnicodeDammit
+    return UnicodeDammit(markup, is_html=True).unicode_markup
+
+
+def parse_with_stream(markup: str) -> HtmlDocument:
+    extractor = TableExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    return extractor.document
+
+
+def parse_with_soup(markup: str, features: str) -> HtmlDocument:
+    # Only imported for these backends, the stream backend doesn't need bs4.
+    from bs4 import BeautifulSoup
+    return document_from_soup(BeautifulSoup(markup, features))
+
+
+def is_lxml_available() -> bool:
+    try:
+        import lxml
+        return True
+    except ImportError:
+        return False
+
+
+lxml_warning_logged = False
+BACKENDS = {
+    "stream": parse_with_stream,
+    "html.parser": lambda markup: parse_with_soup(markup, "html.parser"),
+    "lxml": lambda markup: parse_with_soup(markup, "lxml"),
+}
+
+
+def get_backend(backend: str = None) -> str:
+    global lxml_warning_logged
+
+    backend = backend or HTML_PARSER_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend \"{backend}\", options: {list(BACKENDS.keys())}")
+
+    if backend == "lxml" and not is_lxml_available():
+        if not lxml_warning_logged:
+            Logger.log_warning("lxml is not installed, using the stream parser instead.")
+            lxml_warning_logged = True
+        return "stream"
+
+    return backend
+
+
+def parse_html(markup, backend: str = None) -> HtmlDocument:
+    """Parses the tables, rows, cells, links and headings of a page. `markup` can be `bytes` or `str`."""
+    return BACKENDS[get_backend(backend)](decode_markup(markup))
@@ -0,0 +1,182 @@
+from time import time
+import hashlib
+import json
+import os
+import threading
+
+from file_utils import write_bytes_atomically, write_lines_atomically
+from html_parser import get_backend
+from http_client import HttpClient
+from logger import Logger
+from constants import *
+
+
+class HttpCache:
+    """
+    Persistent, on-disk cache of HTTP responses and of the results parsed from them.
+
+    Responses are revalidated with conditional requests (ETag / Last-Modified). Parse results are keyed
+    by the hash of the body they were parsed from, so an unchanged page doesn't have to be parsed again
+    even if the server doesn't support conditional requests. The keys also have `PARSE_CACHE_VERSION` and
+    the parser backend, so the results of older parse functions aren't reused.
+    """
+
+    enabled = HTTP_CACHE_ENABLED
+    cache_dir = HTTP_CACHE_DIR
+    lock = threading.Lock()
+    EMPTY_STATS = {"not_modified": 0, "unchanged": 0, "changed": 0, "parse_hits": 0, "parse_misses": 0}
+    stats = dict(EMPTY_STATS)
+
+    @staticmethod
+    def increment_stat(name: str) -> None:
+        with HttpCache.lock:
+            HttpCache.stats[name] += 1
+
+    @staticmethod
+    def get_entry_path(url: str, extension: str) -> str:
+        return os.path.join(HttpCache.cache_dir, "responses", f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.{extension}")
+
+    @staticmethod
+    def get_parsed_path(page_type: str, body_hash: str) -> str:
+        # The results of another version of the parse functions or of another parser backend are not reused,
+        # they would be returned for the unchanged pages until they are evicted.
+        key = f"{page_type}-v{PARSE_CACHE_VERSION}-{get_backend()}-{body_hash}"
+        return os.path.join(HttpCache.cache_dir, "parsed", f"{key}.json")
+
+    @staticmethod
+    def read_entry(url: str):
+        """Returns the stored metadata and body of the url, or `(None, None)` if it's not cached."""
+        meta_path, body_path = HttpCache.get_entry_path(url, "json"), HttpCache.get_entry_path(url, "body")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+
+        # Used entries are kept fresh for the age based eviction.
+        os.utime(meta_path)
+        os.utime(body_path)
+        return meta, body
+
+    @staticmethod
+    def write_entry(url: str, response, body_hash: str) -> None:
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body_hash": body_hash,
+        }
+
+        write_bytes_atomically(HttpCache.get_entry_path(url, "body"), response.content)
+        write_lines_atomically(HttpCache.get_entry_path(url, "json"), [json.dumps(meta, ensure_ascii=False)])
+
+    @staticmethod
+    def get(url: str) -> tuple[bytes, str]:
+        """Returns the body of the url and its hash, the cached body is used if the server says it's not modified."""
+        if not HttpCache.enabled:
+            content = HttpClient.get(url).content
+            return content, hashlib.sha1(content).hexdigest()
+
+        meta, body = HttpCache.read_entry(url)
+
+        headers = {}
+        if meta is not None:
+            if meta["etag"]:
+                headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"]:
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = HttpClient.get(url, headers=headers)
+        if response.status_code == 304 and meta is not None:
+            HttpCache.increment_stat("not_modified")
+            return body, meta["body_hash"]
+
+        body_hash = hashlib.sha1(response.content).hexdigest()
+        if meta is not None and meta["body_hash"] == body_hash:
+            HttpCache.increment_stat("unchanged")
+        else:
+            HttpCache.increment_stat("changed")
+
+        if response.status_code == 200:
+            HttpCache.write_entry(url, response, body_hash)
+
+        return response.content, body_hash
+
+    @staticmethod
+    def get_parsed(page_type: str, body_hash: str):
+        """Returns the result that was parsed from a body with the given hash, or `None` if there is none."""
+        if not HttpCache.enabled:
+            return None
+
+        parsed_path = HttpCache.get_parsed_path(page_type, body_hash)
+        try:
+            with open(parsed_path, "r", encoding="utf-8") as f:
+                parsed = json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            HttpCache.increment_stat("parse_misses")
+            return None
+
+        os.utime(parsed_path)
+        HttpCache.increment_stat("parse_hits")
+        return parsed
+
+    @staticmethod
+    def set_parsed(page_type: str, body_hash: str, value) -> None:
+        if not HttpCache.enabled:
+            return
+
+        write_lines_atomically(
+            HttpCache.get_parsed_path(page_type, body_hash), [json.dumps({"value": value}, ensure_ascii=False)]
+        )
+
+    @staticmethod
+    def evict(max_size_mb: float = HTTP_CACHE_MAX_SIZE_MB, max_age_days: float = HTTP_CACHE_MAX_AGE_DAYS) -> None:
+        """Removes the files that weren't used in `max_age_days`, then the least recently used ones until the cache fits `max_size_mb`."""
+        files = []
+        for directory in ["responses", "parsed"]:
+            directory = os.path.join(HttpCache.cache_dir, directory)
+            if not os.path.isdir(directory):
+                continue
+
+            for file_name in os.listdir(directory):
+                file_path = os.path.join(directory, file_name)
+                file_stat = os.stat(file_path)
+                files.append((file_stat.st_mtime, file_stat.st_size, file_path))
+
+        files.sort()  # Least recently used first.
+        total_size = sum(size for _, size, _ in files)
+        min_mtime = time() - max_age_days * 24 * 60 * 60
+
+        evicted_count = 0
+        for mtime, size, file_path in files:
+            if mtime >= min_mtime and total_size <= max_size_mb * 1024 * 1024:
+                break
+
+            os.remove(file_path)
+            total_size -= size
+            evicted_count += 1
+
+        if evicted_count > 0:
+            Logger.log_info(f"Evicted {evicted_count} files from the HTTP cache.")
+
+    @staticmethod
+    def reset_stats() -> None:
+        with HttpCache.lock:
+            HttpCache.stats = dict(HttpCache.EMPTY_STATS)
+
+    @staticmethod
+    def log_stats() -> None:
+        stats = HttpCache.stats
+        request_count = stats["not_modified"] + stats["unchanged"] + stats["changed"]
+        parse_count = stats["parse_hits"] + stats["parse_misses"]
+        if request_count == 0:
+            return
+
+        Logger.log_info(
+            f"HTTP cache: {stats['not_modified']} not modified, {stats['unchanged']} unchanged and {stats['changed']} new or changed "
+            f"responses (hit ratio: [green]{(stats['not_modified'] + stats['unchanged']) / request_count:.1%}[/green]), "
+            f"{stats['parse_hits']} parse hits and {stats['parse_misses']} parse misses "
+            f"(hit ratio: [green]{stats['parse_hits'] / max(parse_count, 1):.1%}[/green])."
+        )
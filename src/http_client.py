@@ -0,0 +1,142 @@
+from time import perf_counter
+from urllib.parse import urlparse
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from concurrency import ConcurrencyController
+from logger import Logger
+from metrics import Metrics
+from constants import *
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client, every HTTP request of the scrapers goes through here.
+
+    All threads share one session and one adapter. The adapter keeps a keep-alive connection pool
+    per host, so the TCP and TLS handshakes are only done once per connection instead of once per request.
+    The pools are sized once, for the most threads any scraper runs, the adapter is never replaced while
+    other threads may be using it.
+    """
+
+    pool_size = HTTP_POOL_SIZE
+    session = None
+    baseline_stats = {}  # The counts of the pools when the run started, they can't be reset.
+    lock = threading.Lock()
+
+    @staticmethod
+    def create_adapter(pool_size: int) -> HTTPAdapter:
+        retry_strategy = Retry(
+            total=5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            method_whitelist=["HEAD", "GET", "OPTIONS"],
+            backoff_factor=1
+        )
+
+        # pool_connections is the number of hosts to keep pools for, pool_maxsize is the connection count per host.
+        return HTTPAdapter(max_retries=retry_strategy, pool_connections=HTTP_POOL_HOST_COUNT, pool_maxsize=pool_size)
+
+    @staticmethod
+    def get_session() -> requests.Session:
+        if HttpClient.session is not None:
+            return HttpClient.session
+
+        with HttpClient.lock:
+            if HttpClient.session is None:
+                adapter = HttpClient.create_adapter(HttpClient.pool_size)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                HttpClient.session = session
+
+        return HttpClient.session
+
+    @staticmethod
+    def is_throttled(response: requests.Response) -> bool:
+        """Whether the server answered with a 429 or a 5xx or timed out, including the attempts that were retried."""
+        statuses = [response.status_code]
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None:
+            if any(h.error is not None for h in retries.history):
+                return True
+            statuses += [h.status for h in retries.history if h.status is not None]
+
+        return any(s == 429 or s >= 500 for s in statuses)
+
+    @staticmethod
+    def get(url: str, headers: dict = None, timeout: float = HTTP_TIMEOUT) -> requests.Response:
+        # Every host has its own request rate, the controller lowers it when the host struggles.
+        controller = ConcurrencyController.for_url(url)
+        controller.wait_for_rate()
+
+        t0, status, failed = perf_counter(), "error", True
+        try:
+            response = HttpClient.get_session().get(url, headers=headers, timeout=timeout)
+            status, failed = response.status_code, HttpClient.is_throttled(response)
+            return response
+        finally:
+            # Includes the retries, it's the time the scrapers wait for the response.
+            duration = perf_counter() - t0
+            Metrics.observe("http_request_seconds", duration, host=urlparse(url).hostname, status=status)
+            controller.record(duration, failed)
+
+    @staticmethod
+    def get_adapter_stats(adapter: HTTPAdapter) -> dict:
+        stats = {}
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            HttpClient.add_stats(stats, {pool.host: {"requests": pool.num_requests, "connections": pool.num_connections}})
+
+        return stats
+
+    @staticmethod
+    def add_stats(stats: dict, other: dict) -> None:
+        for host, host_stats in other.items():
+            total = stats.setdefault(host, {"requests": 0, "connections": 0})
+            total["requests"] += host_stats["requests"]
+            total["connections"] += host_stats["connections"]
+
+    @staticmethod
+    def get_pool_stats() -> dict:
+        stats = {}
+        if HttpClient.session is not None:
+            HttpClient.add_stats(stats, HttpClient.get_adapter_stats(HttpClient.session.get_adapter("https://")))
+
+        return stats
+
+    @staticmethod
+    def reset_stats() -> None:
+        """Called before every run, the connections are kept."""
+        HttpClient.baseline_stats = HttpClient.get_pool_stats()
+
+    @staticmethod
+    def get_stats() -> dict:
+        """Returns the request count, opened connection count and reused connection count of each host in this run."""
+        stats = HttpClient.get_pool_stats()
+        for host, host_stats in stats.items():
+            baseline = HttpClient.baseline_stats.get(host, {"requests": 0, "connections": 0})
+            # A host whose pool was dropped (see HTTP_POOL_HOST_COUNT) starts over from zero.
+            if host_stats["requests"] >= baseline["requests"]:
+                host_stats["requests"] -= baseline["requests"]
+                host_stats["connections"] = max(host_stats["connections"] - baseline["connections"], 0)
+
+        for host_stats in stats.values():
+            host_stats["reused"] = max(host_stats["requests"] - host_stats["connections"], 0)
+
+        return stats
+
+    @staticmethod
+    def log_stats() -> None:
+        for host, stats in HttpClient.get_stats().items():
+            if stats["requests"] == 0:
+                continue
+
+            reuse_ratio = stats["reused"] / stats["requests"]
+            Logger.log_info(
+                f"[{host}] {stats['requests']} requests over {stats['connections']} connections, "
+                f"{stats['reused']} requests reused a connection ([green]{reuse_ratio:.1%}[/green])."
+            )
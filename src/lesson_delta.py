@@ -0,0 +1,57 @@
+from datetime import datetime
+import hashlib
+
+LESSON_FIELDS = [
+    "CRN", "Course Code", "Teaching Method", "Instructor", "Building", "Day",
+    "Time", "Room", "Capacity", "Enrolled", "Major Rest.",
+]
+
+
+def get_lines_hash(lines: list[str]) -> str:
+    return hashlib.sha1("".join(lines).encode("utf-8")).hexdigest()
+
+
+def create_lesson_index(lines: list[str]) -> dict[str, list[str]]:
+    """Returns the fields of each lesson line, keyed by their CRNs."""
+    index = {}
+    for line in lines:
+        fields = line.rstrip("\n").split("|")
+        if len(fields) > 1:
+            index[fields[0]] = fields
+
+    return index
+
+
+def compute_lesson_delta(old_lines: list[str], new_lines: list[str]) -> dict:
+    """
+    Returns the CRNs that are added, removed or changed between two versions of the lessons file.
+    Added lessons have their whole line, changed lessons only have the fields that changed as [old, new] pairs.
+    """
+    old_index, new_index = create_lesson_index(old_lines), create_lesson_index(new_lines)
+
+    added = {crn: "|".join(fields) for crn, fields in new_index.items() if crn not in old_index}
+    removed = sorted(crn for crn in old_index if crn not in new_index)
+
+    changed = {}
+    for crn, new_fields in new_index.items():
+        old_fields = old_index.get(crn)
+        if old_fields is None or old_fields == new_fields:
+            continue
+
+        field_changes = {}
+        for i in range(max(len(old_fields), len(new_fields))):
+            old_value = old_fields[i] if i < len(old_fields) else None
+            new_value = new_fields[i] if i < len(new_fields) else None
+            if old_value != new_value:
+                field_name = LESSON_FIELDS[i] if i < len(LESSON_FIELDS) else str(i)
+                field_changes[field_name] = [old_value, new_value]
+        changed[crn] = field_changes
+
+    return {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "base": get_lines_hash(old_lines),  # Hash of the snapshot this delta should be applied to.
+        "snapshot": get_lines_hash(new_lines),  # Hash of the snapshot after the delta is applied.
+        "added": dict(sorted(added.items())),
+        "removed": removed,
+        "changed": dict(sorted(changed.items())),
+    }
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from bs4 import BeautifulSoup
+from bs4.formatter import HTMLFormatter
+from tqdm import tqdm
+
+from concurrency import ConcurrencyController
+from http_client import HttpClient
+from metrics import Metrics
+from records import Lesson
+from logger import Logger
+from constants import *
+
+
+class ChromeOuterHTMLFormatter(HTMLFormatter):
+    """Serializes tags the same way Chrome's `outerHTML` does, so the rows read over HTTP
+    are identical to the rows `LessonScraper` reads from the browser."""
+
+    TEXT_ENTITIES = (("&", "&amp;"), ("\u00a0", "&nbsp;"), ("<", "&lt;"), (">", "&gt;"))
+    ATTRIBUTE_ENTITIES = (("&", "&amp;"), ("\u00a0", "&nbsp;"), ("\"", "&quot;"))
+
+    def __init__(self):
+        super().__init__(entity_substitution=self.escape_text, void_element_close_prefix=None)
+
+    @staticmethod
+    def escape(value: str, entities) -> str:
+        for char, entity in entities:
+            value = value.replace(char, entity)
+        return value
+
+    def escape_text(self, value: str) -> str:
+        return self.escape(value, self.TEXT_ENTITIES)
+
+    def attribute_value(self, value: str) -> str:
+        return self.escape(value, self.ATTRIBUTE_ENTITIES)
+
+
+class LessonHttpScraper:
+    """
+    Scraps the lessons without a browser, by sending the requests the `DersProgram` page's dropdowns send.
+
+    The rows are read from the same HTML as `LessonScraper.scrap_tables`'s, so both of them return the same
+    lessons. Unlike the other pages, the lesson tables aren't parsed with `html_parser.parse_html`: the rows are
+    serialized again like Chrome's `outerHTML` for `parse_lesson_rows`, which needs their markup, and an
+    `HtmlDocument` only keeps the texts and the links. So they are always parsed with bs4's "html.parser",
+    whatever `HTML_PARSER_BACKEND` is.
+    """
+
+    def __init__(self, thread_count: int = CONCURRENCY_MAX_LIMIT, base_url: str = None) -> None:
+        self.thread_count = thread_count
+        self.base_url = base_url
+        self.formatter = ChromeOuterHTMLFormatter()
+
+    def get_url(self, url: str) -> str:
+        # Used to point the scraper to another host (e.g. a local server serving recorded responses).
+        if self.base_url is None:
+            return url
+
+        return url.replace(ITU_OBS_BASE_URL, self.base_url.rstrip("/"))
+
+    def get(self, url: str) -> requests.Response:
+        response = HttpClient.get(self.get_url(url), headers={"X-Requested-With": "XMLHttpRequest"})
+        response.raise_for_status()
+        return response
+
+    def get_branch_codes(self) -> list[tuple[str, str]]:
+        # The response is the JSON the subject dropdown is populated with.
+        response = self.get(LESSON_BRANCH_CODES_URL.format(LESSON_PROGRAMME_LEVEL))
+        return [(str(b["bransKoduId"]), b["dersBransKodu"].strip()) for b in response.json()]
+
+    def get_lessons_from_html(self, html: str) -> list[Lesson]:
+        # Browsers normalize the line endings while parsing, do the same so that the outputs match.
+        soup = BeautifulSoup(html.replace("\r\n", "\n").replace("\r", "\n"), "html.parser")
+
+        return Lesson.from_html_rows([
+            row.decode(formatter=self.formatter) for row in soup.find_all("tr")
+            if "table-baslik" not in row.get("class", [])  # Filter out the header rows.
+        ])
+
+    def scrap_branch_code(self, branch_code_id: str) -> list[Lesson]:
+        url = self.get_url(LESSON_TABLE_URL.format(LESSON_PROGRAMME_LEVEL, branch_code_id))
+
+        # There are `thread_count` threads, the controller decides how many of them send requests at a time.
+        with ConcurrencyController.for_url(url).slot():
+            response = self.get(url)
+        response.encoding = "utf-8"
+        with Metrics.timer("parse_seconds", page_type="lesson_table"):
+            return self.get_lessons_from_html(response.text)
+
+    def scrap_tables(self) -> list[Lesson]:
+        """
+        Returns all lessons, or `None` if any of the course codes could not be scraped.
+        A partial result is never returned, so that the callers can fall back to `LessonScraper`.
+        """
+        try:
+            # Visit the page first, the endpoints below may need the session cookies it sets.
+            self.get(LESSONS_URL)
+            branch_codes = self.get_branch_codes()
+        except Exception as e:
+            Logger.log_error(f"Failed to load the course codes of the lessons page, error: {e}")
+            return None
+
+        if len(branch_codes) == 0:
+            Logger.log_error("No course codes were found in the lessons page.")
+            return None
+
+        lessons, failed_branch_codes = [], []
+        with ThreadPoolExecutor(max_workers=self.thread_count) as executor:
+            futures = {executor.submit(self.scrap_branch_code, i): code for i, code in branch_codes}
+
+            progress_tqdm = tqdm(as_completed(futures), total=len(futures))
+            for future in progress_tqdm:
+                code = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    Logger.log_error(f"Failed to scrap \"{code}\" lessons, error: {e}")
+                    failed_branch_codes.append(code)
+                    continue
+
+                lessons += rows
+                progress_tqdm.set_description(f"Scraped \"{code}\" lessons - current total: {len(lessons):04}")
+
+        if len(failed_branch_codes) != 0:
+            Logger.log_warning(f"Could not scrap the lessons of {len(failed_branch_codes)} course codes.")
+            return None
+
+        return lessons
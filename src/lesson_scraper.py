@@ -1,10 +1,10 @@
 from selenium.webdriver.common.by import By
 from tqdm import tqdm
 
-from selenium.common.exceptions import UnexpectedAlertPresentException
-from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException, UnexpectedAlertPresentException
 
 from scraper import Scraper
+from records import Lesson
 from logger import Logger
 from constants import *
 
@@ -14,52 +14,51 @@ class LessonScraper(Scraper):
         super().__init__(webdriver)
         self.load_page(LESSONS_URL)
 
-    def scrap_current_table(self) -> list[str]:
+    def scrap_current_table(self) -> list[Lesson]:
         try:
-            rows = self.find_elements_by_tag("tr")
-    
-            return [
-                row.get_attribute("outerHTML") for row in rows
-                if row.get_attribute("class") != "table-baslik"  # Filter out the header rows.
-            ]
-        
+            rows = self.extract_rows("tr")["rows"]
+
+            return Lesson.from_html_rows([
+                row["html"] for row in rows
+                if row["class"] != "table-baslik"  # Filter out the header rows.
+            ])
+
         # If a course has no lessons, an alert dialogue will be displayed. If that happens, return an empty row.
         except UnexpectedAlertPresentException:
             self.dismiss_alert()
             self.wait()
 
             return []
-        except StaleElementReferenceException:
-            self.wait(3)
-            return self.scrap_current_table()
 
     def generate_dropdown_options(self):
+        # The programme levels are populated by a script, a timeout here fails the run.
+        self.wait_for("dropdown_populated", value=LESSON_PROGRAMME_LEVEL)
+
         # Select undergraduate from the dropdown.
         for option in self.find_elements_by_tag("option"):
-            if option.get_attribute("value") == "LS":
+            if option.get_attribute("value") == LESSON_PROGRAMME_LEVEL:
                 option.click()
                 self.wait()
                 break
 
-    def scrap_tables(self) -> list[str]:
+    def scrap_tables(self) -> list[Lesson]:
         def update_dropdown_references():
             self.generate_dropdown_options()
-            dropdown_options = self.webdriver.find_elements(By.TAG_NAME, "option")
 
             # The options we want are course codes, they start after the initial value of
             # the dropdown which is "Ders Kodu Seçiniz"
+            try:
+                self.wait_for("dropdown_populated", placeholder="Ders Kodu Seçiniz")
+            except TimeoutException:
+                Logger.log_error("Course Dropdown did not load in time.")
+                raise
+
+            dropdown_options = self.webdriver.find_elements(By.TAG_NAME, "option")
             start_index = 0
-            for _ in range(20):
-                for i, o in enumerate(dropdown_options):
-                    if "Ders Kodu Seçiniz" in o.get_attribute("innerHTML"):
-                        start_index = i + 1
-                        break
-                else:
-                    Logger.log_warning("Course Dropdown is not loaded yet, waiting.")
-                    self.wait(5)
-                    dropdown_options = self.webdriver.find_elements(By.TAG_NAME, "option")
-                    continue
-                break
+            for i, o in enumerate(dropdown_options):
+                if "Ders Kodu Seçiniz" in o.get_attribute("innerHTML"):
+                    start_index = i + 1
+                    break
 
             submit_button = self.find_elements_by_tag("button")[0]
             return dropdown_options[start_index:], submit_button
@@ -68,38 +67,44 @@ class LessonScraper(Scraper):
         lessons, option_parent_tqdm = [], tqdm(range(0, len(dropdown_options)))
 
         for i in option_parent_tqdm:
-            for _ in range(20):
-                rows = []
+            rows, course_name = [], ""
+            # A skipped course would silently drop its lessons, so it's retried and the run fails if it never loads.
+            for attempt in range(LESSON_COURSE_RETRY_COUNT + 1):
                 try:
                     # Check if the dropdown option is valid.
                     dropdown_option = dropdown_options[i]
                     if dropdown_option is None: return []
-        
+
                     # Update the tqdm.
                     course_name = dropdown_option.get_attribute("innerHTML").strip()
                     option_parent_tqdm.set_description(f"Scraping \"{course_name}\" lessons - current total: {len(lessons):04}")
-        
+
                     self.wait_until_loaded(dropdown_option)  # Wait for the dropdown option to load.
                     dropdown_option.click()  # Choose the current course from the dropdown.
-        
+
+                    ajax_count = self.get_ajax_count()
                     submit_button.click()  # Click Submit.
-        
-                    # Wait for the "Kayıt bulunamadı." alert, if it occurs, skip this course.
-                    alert_dismissed = self.wait_for_and_dismiss_alert(20)
-                    if alert_dismissed:
+
+                    # Wait for either the "Kayıt bulunamadı." alert, if it occurs, skip this course,
+                    # or for the request of the lessons to complete.
+                    if self.wait_for(["alert_shown", "ajax_idle"], after=ajax_count) == "alert_shown":
+                        self.dismiss_alert()
                         break
-        
-                    # Scrap the lessons. Because the script is fast, sometimes the lessons don't load,
-                    # take that into account and wait a bit if lesson count is 0.
-                    for _ in range(20):
+
+                    rows = self.scrap_current_table()
+                    if len(rows) == 0:
+                        # The table may be rendered after the request completes, give it a moment.
+                        self.wait_for("table_rendered", selector="tr:not(.table-baslik)")
                         rows = self.scrap_current_table()
-                        if len(rows) != 0:
-                            break
-                        self.wait()
-                except UnexpectedAlertPresentException:
                     break
-                
-                lessons += rows
-                break
-        
+                except (UnexpectedAlertPresentException, TimeoutException):
+                    if attempt == LESSON_COURSE_RETRY_COUNT:
+                        Logger.log_error(f"Could not scrap the lessons of \"{course_name}\" after {attempt + 1} tries.")
+                        raise
+
+                    Logger.log_warning(f"Could not scrap the lessons of \"{course_name}\", retrying.")
+                    self.dismiss_alert()
+
+            lessons += rows
+
         return lessons
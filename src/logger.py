@@ -1,38 +1,156 @@
 from datetime import datetime
+from queue import Queue, Full
 from rich import print as rprint
+from rich.errors import MarkupError
+from rich.markup import escape, render
+import atexit
+import json
+import os
+import threading
 
 
 class Logger:
+    """
+    Logs are put in a bounded queue and written by a background thread, so the scraper threads don't wait
+    for the console. Messages can be formatted lazily, `Logger.log_info("Scraped {} courses", count)` only
+    formats the message in the writer thread.
+
+    Every message goes to the rich sink (the console), and to the JSON-lines sink if `add_json_sink` is called.
+    The context of a thread (see `set_context`) is added to its messages, e.g. its thread number.
+    """
+
     log_level = 3  # 0 = nothing, 1 = only errors, 2 = errors + warnings, 3 = all
     time_stamp_color_code = "#999999"
-    
+    context_color_code = "royal_blue1"
+
+    queue_size = 10000
+    put_timeout = 5  # Seconds an info message waits for room in the queue before it's dropped.
+    queue = Queue(maxsize=queue_size)
+    writer_thread = None
+    writer_lock = threading.Lock()
+    json_sink = None
+    context = threading.local()
+    dropped_count = 0
+
     @staticmethod
-    def create_message(message: str, log_type: str, color: str) -> str:
-        time_stamp = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}"
-        return f"[{Logger.time_stamp_color_code}][{time_stamp}][{log_type.upper()}][/{Logger.time_stamp_color_code}][{color}] {message}[/{color}]"
+    def set_context(**fields) -> None:
+        """Sets the context of the current thread, e.g. `Logger.set_context(thread="01")`."""
+        Logger.context.fields = fields
+
+    @staticmethod
+    def get_context() -> dict:
+        return getattr(Logger.context, "fields", {})
+
+    @staticmethod
+    def add_json_sink(file_path: str) -> None:
+        """Also writes every message to `file_path` as a JSON line, with its time, level, context and plain text."""
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        Logger.json_sink = open(file_path, "a", encoding="utf-8")
 
     @staticmethod
-    def log(message: str, log_type: str="INFO", color: str = "white") -> None:
-        msg = Logger.create_message(message, log_type, color)
-        rprint(msg)
+    def create_message(message: str, log_type: str, color: str, time_stamp: datetime = None, context: dict = None) -> str:
+        time_stamp = f"{(time_stamp or datetime.now()).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}"
+        context = "".join(
+            f"[{Logger.context_color_code}][{key.title()} {value}][/{Logger.context_color_code}] " for key, value in (context or {}).items()
+        )
+        return f"[{Logger.time_stamp_color_code}][{time_stamp}][{log_type.upper()}][/{Logger.time_stamp_color_code}][{color}] {context}{message}[/{color}]"
+
+    @staticmethod
+    def write(record: tuple) -> None:
+        time_stamp, message, args, log_type, color, context = record
+        if len(args) > 0:
+            message = message.format(*args)
+
+        try:
+            text = render(message)
+        except MarkupError:
+            text = render(escape(message))  # Not valid markup, e.g. an error message with brackets in it.
+            message = escape(message)
+
+        rprint(Logger.create_message(message, log_type, color, time_stamp, context))
+
+        if Logger.json_sink is not None:
+            entry = {"time": time_stamp.isoformat(timespec="milliseconds"), "level": log_type.lower(), **context, "message": text.plain}
+            Logger.json_sink.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def writer_routine() -> None:
+        while True:
+            record = Logger.queue.get()
+            try:
+                Logger.write(record)
+            except Exception:
+                pass  # A broken message must not stop the logging.
+            finally:
+                Logger.queue.task_done()
+
+            if Logger.json_sink is not None and Logger.queue.empty():
+                Logger.json_sink.flush()
 
     @staticmethod
-    def log_info(message: str) -> None:
+    def start_writer() -> None:
+        with Logger.writer_lock:
+            if Logger.writer_thread is None:
+                Logger.writer_thread = threading.Thread(target=Logger.writer_routine, name="logger", daemon=True)
+                Logger.writer_thread.start()
+
+    @staticmethod
+    def log(message: str, log_type: str="INFO", color: str = "white", *args) -> None:
+        record = (datetime.now(), message, args, log_type, color, Logger.get_context())
+        if Logger.writer_thread is None:
+            Logger.start_writer()
+
+        try:
+            # When the console can't keep up, the scrapers wait for it. Only an info message that waited too long
+            # is dropped, so a stuck console can't stop the scrapers. Warnings and errors wait as long as it takes.
+            Logger.queue.put(record, timeout=Logger.put_timeout if log_type.upper() == "INFO" else None)
+        except Full:
+            with Logger.writer_lock:
+                Logger.dropped_count += 1
+
+    @staticmethod
+    def flush() -> None:
+        """Waits until all queued messages are written, then warns about the messages dropped since the last flush."""
+        if Logger.writer_thread is not None and Logger.writer_thread.is_alive():
+            Logger.queue.join()
+
+        with Logger.writer_lock:
+            dropped_count, Logger.dropped_count = Logger.dropped_count, 0
+        if dropped_count > 0:
+            Logger.write((datetime.now(), f"Dropped {dropped_count} log messages, the console was too slow.", (), "WARNING", "yellow", {}))
+
+        if Logger.json_sink is not None:
+            Logger.json_sink.flush()
+
+    @staticmethod
+    def shutdown() -> None:
+        Logger.flush()
+
+    @staticmethod
+    def log_info(message: str, *args) -> None:
         if Logger.log_level < 3:
             return
-        
-        Logger.log(message, "INFO")
+
+        Logger.log(message, "INFO", "white", *args)
 
     @staticmethod
-    def log_warning(message: str) -> None:
+    def log_warning(message: str, *args) -> None:
         if Logger.log_level < 2:
             return
-    
-        Logger.log(message, "WARNING", "yellow")
+
+        Logger.log(message, "WARNING", "yellow", *args)
 
     @staticmethod
-    def log_error(message: str) -> None:
+    def log_error(message: str, *args) -> None:
         if Logger.log_level < 1:
             return
-        
-        Logger.log(message, "ERROR", "red")
+
+        Logger.log(message, "ERROR", "red", *args)
+
+
+# The other modules register their exit handlers after importing this one, and the handlers run in reverse order,
+# so the messages they log while exiting are written too.
+atexit.register(Logger.shutdown)
@@ -0,0 +1,131 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+import json
+import threading
+
+from file_utils import write_lines_atomically
+
+
+class Metrics:
+    """
+    Process-wide counters, gauges and histograms, exported at the end of a run as JSON and as a Prometheus textfile.
+
+    A metric is identified by its name and its labels, e.g. `Metrics.observe("http_request_seconds", 0.2, host="obs.itu.edu.tr", status=200)`.
+    Histograms only keep their bucket counts, their sum and their count, so they don't grow with the number of observations.
+    """
+
+    PREFIX = "itu_scraper_"
+    BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+    lock = threading.Lock()
+    counters = {}
+    gauges = {}
+    histograms = {}
+    default_labels = {}  # Added to every exported metric, e.g. the scrap target.
+
+    @staticmethod
+    def get_key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def increment(name: str, value: float = 1, **labels) -> None:
+        key = Metrics.get_key(name, labels)
+        with Metrics.lock:
+            Metrics.counters[key] = Metrics.counters.get(key, 0) + value
+
+    @staticmethod
+    def set_gauge(name: str, value: float, **labels) -> None:
+        with Metrics.lock:
+            Metrics.gauges[Metrics.get_key(name, labels)] = value
+
+    @staticmethod
+    def observe(name: str, value: float, **labels) -> None:
+        key = Metrics.get_key(name, labels)
+        with Metrics.lock:
+            histogram = Metrics.histograms.get(key)
+            if histogram is None:
+                histogram = Metrics.histograms[key] = {"buckets": [0] * len(Metrics.BUCKETS), "sum": 0.0, "count": 0}
+
+            # Only the first bucket that fits is incremented, the counts are made cumulative on export.
+            bucket_index = bisect_left(Metrics.BUCKETS, value)
+            if bucket_index < len(Metrics.BUCKETS):
+                histogram["buckets"][bucket_index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @staticmethod
+    @contextmanager
+    def timer(name: str, **labels):
+        """Observes the duration of the `with` block in seconds, even if it raises."""
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            Metrics.observe(name, perf_counter() - t0, **labels)
+
+    @staticmethod
+    def reset() -> None:
+        """Removes all the metrics, called before every run so the exports only have the run's own."""
+        with Metrics.lock:
+            Metrics.counters, Metrics.gauges, Metrics.histograms = {}, {}, {}
+
+    @staticmethod
+    def get_snapshot() -> dict:
+        def to_entry(key, **values):
+            name, labels = key
+            return {"name": name, "labels": dict(Metrics.default_labels, **dict(labels)), **values}
+
+        with Metrics.lock:
+            return {
+                "counters": [to_entry(k, value=v) for k, v in sorted(Metrics.counters.items())],
+                "gauges": [to_entry(k, value=v) for k, v in sorted(Metrics.gauges.items())],
+                "histograms": [
+                    to_entry(k, buckets=dict(zip(Metrics.BUCKETS, h["buckets"])), sum=h["sum"], count=h["count"])
+                    for k, h in sorted(Metrics.histograms.items())
+                ],
+            }
+
+    @staticmethod
+    def export_json(file_path: str) -> None:
+        write_lines_atomically(file_path, [json.dumps(Metrics.get_snapshot(), indent=4) + "\n"])
+
+    @staticmethod
+    def format_labels(labels: dict) -> str:
+        if len(labels) == 0:
+            return ""
+
+        escape = lambda v: str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "{" + ",".join(f"{k}=\"{escape(v)}\"" for k, v in labels.items()) + "}"
+
+    @staticmethod
+    def export_prometheus(file_path: str) -> None:
+        """Writes the metrics in Prometheus' text format, e.g. for node_exporter's textfile collector."""
+        snapshot = Metrics.get_snapshot()
+        lines, typed_names = [], set()
+
+        def add_type(name, metric_type):
+            if name not in typed_names:
+                lines.append(f"# TYPE {name} {metric_type}\n")
+                typed_names.add(name)
+
+        for metric_type in ["counters", "gauges"]:
+            for entry in snapshot[metric_type]:
+                name = Metrics.PREFIX + entry["name"]
+                add_type(name, "counter" if metric_type == "counters" else "gauge")
+                lines.append(f"{name}{Metrics.format_labels(entry['labels'])} {entry['value']}\n")
+
+        for entry in snapshot["histograms"]:
+            name = Metrics.PREFIX + entry["name"]
+            add_type(name, "histogram")
+
+            cumulative_count = 0
+            for upper_bound, count in entry["buckets"].items():
+                cumulative_count += count
+                lines.append(f"{name}_bucket{Metrics.format_labels(dict(entry['labels'], le=upper_bound))} {cumulative_count}\n")
+            lines.append(f"{name}_bucket{Metrics.format_labels(dict(entry['labels'], le='+Inf'))} {entry['count']}\n")
+            lines.append(f"{name}_sum{Metrics.format_labels(entry['labels'])} {entry['sum']}\n")
+            lines.append(f"{name}_count{Metrics.format_labels(entry['labels'])} {entry['count']}\n")
+
+        # The textfile collector reads the file at any time, so it's replaced atomically.
+        write_lines_atomically(file_path, lines)
@@ -1,5 +1,7 @@
-from bs4 import BeautifulSoup
-from requests import get
+from html_parser import parse_html
+from http_client import HttpClient
+from metrics import Metrics
+from records import Building, Programme
 from constants import *
 from logger import Logger
 
@@ -14,13 +16,16 @@ class MiscScraper:
     def scrap_building_codes(self, url):
         Logger.log_info("Scraping building codes...")
 
-        r = get(url)
+        r = HttpClient.get(url)
         r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, "html.parser")
+        with Metrics.timer("parse_seconds", page_type="building_codes"):
+            return self.parse_building_codes(parse_html(r.text))
 
-        output = ""
-        for row in soup.find_all("tr"):
-            cells = [d.get_text().strip() for d in row.find_all("td")]
+    @staticmethod
+    def parse_building_codes(document) -> list[Building]:
+        buildings = []
+        for row in document.rows:
+            cells = [d.text.strip() for d in row.cells]
 
             if "(" not in cells[1]:
                 cells[1] += u" (Ayazağa)"
@@ -32,21 +37,24 @@ class MiscScraper:
                 splitted_name) - 1].strip().replace(")", "")
             building_name = cells[1].replace(f"({campus_name})", "").strip()
 
-            output += f"{code}|{building_name}|{campus_name}\n"
+            buildings.append(Building(code, building_name, campus_name))
 
-        return output
+        return buildings
 
     def scrap_programme_codes(self, url):
         Logger.log_info("Scraping programme codes...")
 
-        r = get(url)
+        r = HttpClient.get(url)
         r.encoding = r.apparent_encoding
-        soup = BeautifulSoup(r.text, "html.parser")
+        with Metrics.timer("parse_seconds", page_type="programme_codes"):
+            return self.parse_programme_codes(parse_html(r.text))
 
-        output = ""
+    @staticmethod
+    def parse_programme_codes(document) -> list[Programme]:
+        programmes = []
         current_faculty_code, current_faculty = "", ""
-        for row in soup.find_all("tr"):
-            cells = [d.get_text().strip() for d in row.find_all("td")]
+        for row in document.rows:
+            cells = [d.text.strip() for d in row.cells]
             
             # There are some empty rows in the table, skip them.
             if not cells:
@@ -59,6 +67,6 @@ class MiscScraper:
                 current_faculty = faculty.replace(f"{current_faculty_code}-", "").strip()
                 continue
 
-            output += f"{cells[0].strip()}|{cells[1].strip()}|{current_faculty}|{current_faculty_code}\n"
+            programmes.append(Programme(cells[0].strip(), cells[1].strip(), current_faculty, current_faculty_code))
 
-        return output
+        return programmes
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import os
+import threading
+
+from file_utils import read_lines, write_lines_atomically
+from logger import Logger
+from constants import *
+
+
+class NegativeCache:
+    """
+    Persistent set of the keys that had nothing to scrap, e.g. the course codes that don't have a course page.
+
+    A key is skipped once it had nothing `min_misses` times in a row (once could be a slow page), for `ttl_days`
+    after it was last probed. Then it's probed again, so a key that comes back (e.g. a course that is opened again)
+    is only missed for a while. Every key keeps how long its last probe took, which is the time saved every time
+    it's skipped.
+    """
+
+    def __init__(self, name: str, ttl_days: float = NEGATIVE_CACHE_TTL_DAYS, min_misses: int = NEGATIVE_CACHE_MIN_MISSES,
+                 cache_dir: str = NEGATIVE_CACHE_DIR) -> None:
+        self.name = name
+        self.ttl = timedelta(days=ttl_days)
+        self.min_misses = min_misses
+        self.path = os.path.join(cache_dir, f"{name}.psv")
+        self.lock = threading.Lock()
+        self.entries = self.read()  # Key -> {"probed_at": datetime, "miss_count": int, "probe_seconds": float}
+        self.skipped_count = 0
+        self.saved_seconds = 0.0
+
+    def read(self) -> dict:
+        entries = {}
+        for line in read_lines(self.path):
+            try:
+                key, probed_at, miss_count, probe_seconds = line.rstrip("\n").split("|")
+                entries[key] = {
+                    "probed_at": datetime.fromisoformat(probed_at), "miss_count": int(miss_count), "probe_seconds": float(probe_seconds)
+                }
+            except ValueError:
+                continue  # Not a line of this version of the cache.
+
+        return entries
+
+    def save(self) -> None:
+        with self.lock:
+            lines = [
+                f"{key}|{e['probed_at'].isoformat(timespec='seconds')}|{e['miss_count']}|{round(e['probe_seconds'], 3)}\n"
+                for key, e in sorted(self.entries.items())
+            ]
+
+        write_lines_atomically(self.path, lines)
+
+    def should_skip(self, key: str) -> bool:
+        """Whether the key had nothing recently, counts the skipped keys and the time saved by skipping them."""
+        entry = self.entries.get(key)
+        if entry is None or entry["miss_count"] < self.min_misses or datetime.now() - entry["probed_at"] > self.ttl:
+            return False
+
+        with self.lock:
+            self.skipped_count += 1
+            self.saved_seconds += entry["probe_seconds"]
+        return True
+
+    def record_miss(self, key: str, probe_seconds: float) -> None:
+        with self.lock:
+            miss_count = self.entries[key]["miss_count"] + 1 if key in self.entries else 1
+            self.entries[key] = {"probed_at": datetime.now(), "miss_count": miss_count, "probe_seconds": probe_seconds}
+
+    def record_hit(self, key: str) -> None:
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                Logger.log_info(f"\"{key}\" has something to scrap again, removed it from the {self.name} negative cache.")
+
+    def log_stats(self) -> None:
+        if self.skipped_count == 0:
+            return
+
+        Logger.log_info(
+            f"Skipped {self.skipped_count} keys of the {self.name} negative cache, "
+            f"saved [green]{round(self.saved_seconds, 2)}[/green] seconds of probing."
+        )
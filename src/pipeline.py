@@ -0,0 +1,241 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from queue import Queue
+from time import perf_counter
+import threading
+
+from concurrency import ConcurrencyController
+from html_parser import parse_html
+from http_cache import HttpCache
+from logger import Logger
+from metrics import Metrics
+from constants import *
+
+
+def parse_page(parse, content: bytes) -> tuple:
+    """Runs in the parse processes, returns `parse(document)` of the page and how long it took."""
+    t0 = perf_counter()
+    parsed = parse(parse_html(content))
+    return parsed, perf_counter() - t0
+
+
+class PageTask:
+    def __init__(self, url: str, parse, page_type: str, context, retry_count: int = 0) -> None:
+        self.url = url
+        self.parse = parse  # Must be picklable, e.g. a static method, it's sent to the parse processes.
+        self.page_type = page_type
+        self.context = context  # Anything the aggregator needs to know where the result goes.
+        self.body_hash = None
+        self.holds_page = False  # Whether it was fetched, rather than given the result of another task.
+        self.memo_key = None
+        self.retry_count = retry_count  # Times it's fetched again if it can't be loaded or parsed.
+
+
+class FetchParsePipeline:
+    """
+    Fetches and parses pages in stages, so that parsing doesn't compete with the fetching threads for the GIL:
+
+    1. `fetch_worker_count` threads fetch the pages through `HttpCache`, the parse results of unchanged pages are reused.
+    2. `parse_process_count` processes parse the others with `parse(document)`, like `Scraper.get_parsed_from_url`.
+       With 0 processes, the pages are parsed in the fetch threads.
+    3. The thread that calls `run` aggregates, it passes the results to `handle_result(pipeline, task, parsed)`,
+       which can `submit` more pages. A page that can't be loaded or parsed is fetched again up to `retry_count`
+       times, then `parsed` is `None`.
+
+    At most `max_pending_pages` pages are between the fetch and the aggregation stages, the fetch threads wait for
+    the parse processes and the aggregator when they fall behind. The queue of the pages to fetch isn't bounded,
+    it only holds urls, and the aggregator must never wait for the fetch threads or they could wait for each other.
+
+    The pages submitted with `memoize=True` are fetched once per run: their results are kept in an LRU memo of
+    `memo_size` pages, and a page submitted while it's being fetched waits for that fetch instead of starting another.
+    """
+
+    STAGES = ["fetch", "parse", "aggregate"]
+
+    def __init__(self, handle_result, fetch_worker_count: int = CONCURRENCY_MAX_LIMIT,
+                 parse_process_count: int = PARSE_PROCESS_COUNT, max_pending_pages: int = PIPELINE_MAX_PENDING_PAGES,
+                 memo_size: int = PIPELINE_MEMO_SIZE):
+        self.handle_result = handle_result
+        self.fetch_worker_count = fetch_worker_count
+        self.parse_process_count = parse_process_count
+
+        self.fetch_queue = Queue()
+        self.result_queue = Queue()
+        self.pending_pages = threading.BoundedSemaphore(max_pending_pages)
+        self.executor = None
+
+        self.lock = threading.Lock()
+        self.unfinished_count = 0  # Submitted pages whose results weren't handled yet.
+        self.stats = {stage: {"count": 0, "busy": 0.0} for stage in FetchParsePipeline.STAGES}
+        self.parse_cache_hit_count = 0
+
+        self.memo_size = memo_size
+        self.memo = OrderedDict()
+        self.in_flight = {}  # The tasks waiting for the fetch of each memoized page.
+        self.memo_hit_count = 0
+        self.joined_count = 0
+
+    def submit(self, url: str, parse, page_type: str, context=None, memoize: bool = False,
+               retry_count: int = PIPELINE_RETRY_COUNT) -> None:
+        task = PageTask(url, parse, page_type, context, retry_count)
+        with self.lock:
+            self.unfinished_count += 1
+            if memoize:
+                task.memo_key = (page_type, url)
+                if task.memo_key in self.memo:
+                    self.memo.move_to_end(task.memo_key)
+                    self.memo_hit_count += 1
+                    self.result_queue.put((task, self.memo[task.memo_key]))
+                    return
+
+                if task.memo_key in self.in_flight:
+                    self.joined_count += 1
+                    self.in_flight[task.memo_key].append(task)
+                    return
+
+                self.in_flight[task.memo_key] = []
+
+        self.fetch_queue.put(task)
+
+    def complete_memoized(self, task: PageTask, parsed) -> None:
+        """Memoizes the result of a fetched page, and gives it to the tasks that waited for it."""
+        with self.lock:
+            waiting_tasks = self.in_flight.pop(task.memo_key)
+            if parsed is not None:
+                self.memo[task.memo_key] = parsed
+                if len(self.memo) > self.memo_size:
+                    self.memo.popitem(last=False)
+
+        # The failures are shared too, the page would most likely fail again.
+        for waiting_task in waiting_tasks:
+            self.result_queue.put((waiting_task, parsed))
+
+    def add_stat(self, stage: str, duration: float) -> None:
+        with self.lock:
+            self.stats[stage]["count"] += 1
+            self.stats[stage]["busy"] += duration
+
+        Metrics.observe("pipeline_stage_seconds", duration, stage=stage)
+
+    def fetch(self, task: PageTask) -> None:
+        t0 = perf_counter()
+        try:
+            with ConcurrencyController.for_url(task.url).slot():
+                content, task.body_hash = HttpCache.get(task.url)
+        except Exception as e:
+            self.fail(task, f"Failed to load the url {task.url}, error: {e}")
+            return
+        finally:
+            self.add_stat("fetch", perf_counter() - t0)
+
+        parsed = HttpCache.get_parsed(task.page_type, task.body_hash)
+        if parsed is not None:
+            with self.lock:
+                self.parse_cache_hit_count += 1
+            self.result_queue.put((task, parsed))
+        elif self.executor is None:
+            self.on_parsed(task, lambda: parse_page(task.parse, content))
+        else:
+            future = self.executor.submit(parse_page, task.parse, content)
+            future.add_done_callback(lambda f: self.on_parsed(task, f.result))
+
+    def on_parsed(self, task: PageTask, get_result) -> None:
+        try:
+            parsed, duration = get_result()
+        except Exception as e:
+            self.fail(task, f"Failed to parse the url {task.url}, error: {e}")
+            return
+
+        self.add_stat("parse", duration)
+        Metrics.observe("parse_seconds", duration, page_type=task.page_type)  # Like `Scraper.get_parsed_from_url`.
+        HttpCache.set_parsed(task.page_type, task.body_hash, parsed)
+        self.result_queue.put((task, parsed))
+
+    def fail(self, task: PageTask, message: str) -> None:
+        """Fetches the page of a task that failed again, or passes `None` to the aggregator when it's out of retries."""
+        if task.retry_count <= 0:
+            Logger.log_error(message)
+            self.result_queue.put((task, None))
+            return
+
+        Logger.log_warning(f"{message}, retrying.")
+        task.retry_count -= 1
+        if task.holds_page:
+            # The page leaves the pipeline until it's fetched again, the aggregator won't release it.
+            task.holds_page = False
+            self.pending_pages.release()
+        self.fetch_queue.put(task)
+
+    def fetch_routine(self, worker_index: int) -> None:
+        Logger.set_context(thread=str(worker_index + 1).zfill(2))
+        while (task := self.fetch_queue.get()) is not None:
+            self.pending_pages.acquire()  # Released by the aggregator, when the page is out of the pipeline.
+            task.holds_page = True
+            try:
+                self.fetch(task)
+            except Exception as e:
+                # E.g. the parse processes couldn't be started, the aggregator still has to get a result.
+                Logger.log_error(f"Failed to process the url {task.url}, error: {e}")
+                self.result_queue.put((task, None))
+
+    def run(self) -> None:
+        """Processes the submitted pages and the pages they lead to, returns when all of them are handled."""
+        t0 = perf_counter()
+        if self.parse_process_count > 0:
+            # Not forked, the fetch threads may be holding locks when a process is started.
+            self.executor = ProcessPoolExecutor(self.parse_process_count, mp_context=get_context("spawn"))
+
+        threads = [threading.Thread(target=self.fetch_routine, args=(i,), daemon=True) for i in range(self.fetch_worker_count)]
+        for t in threads: t.start()
+
+        try:
+            while self.unfinished_count > 0:
+                task, parsed = self.result_queue.get()
+                if task.holds_page:
+                    self.pending_pages.release()
+                    if task.memo_key is not None:
+                        self.complete_memoized(task, parsed)
+
+                t1 = perf_counter()
+                try:
+                    self.handle_result(self, task, parsed)
+                except Exception as e:
+                    Logger.log_error(f"Failed to handle the result of {task.url}, error: {e}")
+                finally:
+                    self.add_stat("aggregate", perf_counter() - t1)
+                    with self.lock:
+                        self.unfinished_count -= 1
+        finally:
+            for _ in threads: self.fetch_queue.put(None)
+            for t in threads: t.join()
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+
+        self.log_stats(perf_counter() - t0)
+
+    def log_stats(self, wall_time: float) -> None:
+        worker_counts = {"fetch": self.fetch_worker_count, "parse": max(self.parse_process_count, 1), "aggregate": 1}
+        for stage in FetchParsePipeline.STAGES:
+            count, busy = self.stats[stage]["count"], self.stats[stage]["busy"]
+            Metrics.increment("pipeline_pages_total", count, stage=stage)
+            if count == 0:
+                continue
+
+            # Utilization near 1 means the stage is the bottleneck, adding workers to the others won't help.
+            Logger.log_info(
+                f"{stage.title()} stage: {count} pages, [green]{count / wall_time:.1f}[/green] pages/s, "
+                f"{busy / count * 1000:.1f}ms per page, utilization {busy / (wall_time * worker_counts[stage]):.0%}."
+            )
+
+        avoided_count = self.memo_hit_count + self.joined_count
+        Metrics.increment("pipeline_avoided_fetches_total", self.memo_hit_count, reason="memo")
+        Metrics.increment("pipeline_avoided_fetches_total", self.joined_count, reason="in_flight")
+        if avoided_count > 0:
+            Logger.log_info(
+                f"Avoided [green]{avoided_count}[/green] fetches of pages already fetched in this run "
+                f"({self.memo_hit_count} memoized, {self.joined_count} waited for an ongoing fetch)."
+            )
+
+        if self.parse_cache_hit_count > 0:
+            Logger.log_info(f"Reused the parse results of {self.parse_cache_hit_count} unchanged pages.")
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+
+from logger import Logger
+from constants import *
+
+
+class ProgressJournal:
+    """
+    Append-only journal of the completed work items of a scrap target, one JSON line per item.
+
+    Every result is written and flushed as soon as its item is done, so when a run is killed (a timed out
+    job, a crashed browser) the next run can resume from the journal instead of starting from zero.
+    Once the output of the target is saved, the journal is cleared.
+    """
+
+    def __init__(self, target: str, resume: bool = False, journal_dir: str = PROGRESS_JOURNAL_DIR, record_type=None) -> None:
+        self.target = target
+        self.record_type = record_type  # The results are records of this type or lists of them, kept as their PSV lines.
+        self.path = os.path.join(journal_dir, f"{target}.jsonl")
+        self.lock = threading.Lock()
+        self.results = self.read() if resume else {}
+
+        os.makedirs(journal_dir, exist_ok=True)
+        if len(self.results) == 0:
+            # Start a new journal, the first line tells when the run started.
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"started_at": datetime.now().isoformat(timespec="seconds")}) + "\n")
+
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.is_last_line_cut():
+            self.file.write("\n")  # Don't let the next result continue the half written line.
+
+    def read(self) -> dict:
+        """Returns the results in the journal by their keys, or an empty dictionary if there is no recent journal."""
+        if not os.path.exists(self.path):
+            Logger.log_info(f"No progress journal found for \"{self.target}\", starting from zero.")
+            return {}
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+        try:
+            started_at = datetime.fromisoformat(json.loads(lines[0])["started_at"])
+        except (IndexError, ValueError, KeyError):
+            Logger.log_warning(f"The progress journal of \"{self.target}\" is corrupted, starting from zero.")
+            return {}
+
+        if datetime.now() - started_at > timedelta(hours=PROGRESS_JOURNAL_MAX_AGE_HOURS):
+            Logger.log_warning(f"The progress journal of \"{self.target}\" is from {started_at}, too old to resume.")
+            return {}
+
+        results = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # The run was killed while writing this line.
+
+            results[entry["key"]] = self.decode(entry["result"])
+
+        Logger.log_info(f"Resuming \"{self.target}\" from its journal with {len(results)} completed items.")
+        return results
+
+    def is_last_line_cut(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def is_completed(self, key: str) -> bool:
+        return key in self.results
+
+    def get(self, key: str):
+        return self.results.get(key)
+
+    def encode(self, result):
+        if self.record_type is None or result is None:
+            return result
+        if isinstance(result, list):
+            return [record.to_psv() for record in result]
+        return result.to_psv()
+
+    def decode(self, result):
+        if self.record_type is None or result is None:
+            return result
+        if isinstance(result, list):
+            return [self.record_type.from_psv(line) for line in result]
+        return self.record_type.from_psv(result)
+
+    def record(self, key: str, result) -> None:
+        """Appends the result of a completed item, `result` must be JSON serializable or of `record_type`."""
+        line = json.dumps({"key": key, "result": self.encode(result)}, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.results[key] = result
+            self.file.write(line)
+            self.file.flush()
+
+    def clear(self) -> None:
+        """Removes the journal, called after the output of the target is saved."""
+        with self.lock:
+            self.file.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
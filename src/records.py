@@ -0,0 +1,163 @@
+from operator import attrgetter
+import re
+
+
+class Record:
+    """
+    A row of the scraped data. The fields are the `__slots__` of the subclasses in the order of their PSV columns,
+    all of them are strings. `to_psv` and `from_psv` are the only place the rows are joined and split.
+    """
+
+    __slots__ = ()
+    get_values = None  # Returns the fields as a tuple, set for each subclass.
+    max_split = 0
+
+    def __init_subclass__(cls) -> None:
+        cls.get_values = attrgetter(*cls.__slots__)
+        cls.max_split = len(cls.__slots__) - 1
+
+    def to_psv(self) -> str:
+        return "|".join(self.get_values(self))
+
+    @classmethod
+    def from_psv(cls, line: str) -> "Record":
+        # The last field keeps the extra "|"s, if there are any, so `to_psv` gives back the same line.
+        return cls(*line.rstrip("\n").split("|", cls.max_split))
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.get_values(self) == other.get_values(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_psv()!r})"
+
+
+def to_psv_lines(records) -> list[str]:
+    return [record.to_psv() + "\n" for record in records]
+
+
+# `<a ...>text</a>` cells: the text after the first ">", up to the next tag.
+A_TEXT_PATTERN = re.compile(r"[^>]*>([^<>]*)")
+ROW_SEPARATOR = "\x00"  # Can't be in HTML, so the rows are processed as one string with it between them.
+
+
+def parse_lesson_rows(rows: list[str]) -> list[str]:
+    """
+    Returns the PSV lines of the `outerHTML`s of the rows of the `DersProgram` tables. The tags are removed and
+    the whitespace around the fields is normalized for all rows at once, only the cells are picked row by row.
+    """
+    if len(rows) == 0:
+        return []
+
+    joined = ROW_SEPARATOR.join(rows)
+    if joined.count(ROW_SEPARATOR) != len(rows) - 1:
+        raise ValueError("The lesson rows can't contain NUL characters.")
+
+    joined = joined.replace("<tr>", "").replace("</tr>", "").replace("</td>", "").replace("<br>", " ").replace("</br>", "")
+    match_a_text = A_TEXT_PATTERN.match
+
+    lines = []
+    for row in joined.split(ROW_SEPARATOR):
+        # The first part is before the first cell, so the cells start from 1.
+        cells = row.split("<td>")
+        code, building, major_restriction = match_a_text(cells[2]), match_a_text(cells[6]), match_a_text(cells[13])
+        lines.append("|".join((
+            cells[1],  # CRN
+            code[1].strip() if code else cells[2],  # Course Code
+            cells[4],  # Teaching Method
+            cells[5],  # Instructor
+            building[1].strip() if building else cells[6],  # Building
+            cells[7],  # Day
+            cells[8],  # Time
+            cells[9],  # Room
+            cells[10],  # Capacity
+            cells[11],  # Enrolled
+            major_restriction[1].strip() if major_restriction else cells[13],  # Major Rest.
+        )))
+
+    # Remove the line breaks and tabs, and the spaces around the "|"s. Stripping the parts between the "|"s is the
+    # same as replacing `\s*\|\s*` with "|", but much faster. The parts don't go over the rows' ends since the
+    # separator isn't whitespace, so the rows' ends are stripped on their own.
+    output = ROW_SEPARATOR.join(lines).replace("\n", "").replace("\t", "")
+    output = "|".join(map(str.strip, output.split("|")))
+    return [line.strip() for line in output.split(ROW_SEPARATOR)]
+
+
+class Lesson(Record):
+    __slots__ = (
+        "crn", "course_code", "teaching_method", "instructor", "building", "day", "time", "room", "capacity", "enrolled",
+        "major_restriction",
+    )
+
+    def __init__(self, crn, course_code, teaching_method, instructor, building, day, time, room, capacity, enrolled,
+                 major_restriction) -> None:
+        self.crn = crn
+        self.course_code = course_code
+        self.teaching_method = teaching_method
+        self.instructor = instructor
+        self.building = building
+        self.day = day
+        self.time = time
+        self.room = room
+        self.capacity = capacity
+        self.enrolled = enrolled
+        self.major_restriction = major_restriction
+
+    @staticmethod
+    def from_html_rows(rows: list[str]) -> list["Lesson"]:
+        """Reads the `outerHTML`s of the rows of the `DersProgram` tables."""
+        return [Lesson.from_psv(line) for line in parse_lesson_rows(rows)]
+
+
+class Course(Record):
+    __slots__ = ("code", "name", "language", "credits", "ects", "prerequisites", "major_prerequisites", "description")
+
+    def __init__(self, code, name, language, credits, ects, prerequisites, major_prerequisites, description) -> None:
+        self.code = code
+        self.name = name
+        self.language = language
+        self.credits = credits
+        self.ects = ects
+        self.prerequisites = prerequisites
+        self.major_prerequisites = major_prerequisites
+        self.description = description
+
+
+class FinalExam(Record):
+    __slots__ = (
+        "crn", "course_code", "course_number", "course_name", "academician", "exam_type", "exam_location", "day", "time",
+        "date", "branch_code",
+    )
+    HEADER = "CRN|Course Code|Course Number|Course Name|Academician|Exam Type|Exam Location|Day|Time|Date|Branch Code"
+
+    def __init__(self, crn, course_code, course_number, course_name, academician, exam_type, exam_location, day, time,
+                 date, branch_code) -> None:
+        self.crn = crn
+        self.course_code = course_code
+        self.course_number = course_number
+        self.course_name = course_name
+        self.academician = academician
+        self.exam_type = exam_type
+        self.exam_location = exam_location
+        self.day = day
+        self.time = time
+        self.date = date
+        self.branch_code = branch_code
+
+
+class Building(Record):
+    __slots__ = ("code", "name", "campus")
+
+    def __init__(self, code, name, campus) -> None:
+        self.code = code
+        self.name = name
+        self.campus = campus
+
+
+class Programme(Record):
+    __slots__ = ("code", "name", "faculty", "faculty_code")
+
+    def __init__(self, code, name, faculty, faculty_code) -> None:
+        self.code = code
+        self.name = name
+        self.faculty = faculty
+        self.faculty_code = faculty_code
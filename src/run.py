@@ -1,83 +1,120 @@
-from time import perf_counter
-from tqdm import tqdm
+from datetime import datetime, timezone
+from time import perf_counter, sleep, time
 import argparse
+import importlib
+import json
 import os
-import re
+import sys
 
-from course_scraper import CourseScraper
+from course_code_index import CourseCodeIndex
+from course_plan_store import CoursePlanStore
+from cron_schedule import CronSchedule
 from driver_manager import DriverManager
-from lesson_scraper import LessonScraper
-from misc_scraper import MiscScraper
-from course_plan_scraper import CoursePlanScraper
-from final_exam_scraper import FinalExamScraper
+from http_cache import HttpCache
+from http_client import HttpClient
+from file_utils import read_lines, write_lines_atomically
+from lesson_delta import compute_lesson_delta
+from progress_journal import ProgressJournal
+from records import Course, FinalExam, to_psv_lines
 from logger import Logger
+from metrics import Metrics
 from constants import *
 
-def extract_from_a(a):
-    if ">" not in a:
-        return a
-    return a.split(">")[1].split("<")[0].strip()
+# The scrapers are imported only when their targets run, selenium, webdriver_manager and bs4 take longer to import
+# than the misc target takes to run. "module:class" of each target's scraper.
+SCRAPERS = {
+    "lesson": "lesson_http_scraper:LessonHttpScraper",
+    "lesson_chrome": "lesson_scraper:LessonScraper",
+    "course": "course_scraper:CourseScraper",
+    "course_plan": "course_plan_scraper:CoursePlanScraper",
+    "misc": "misc_scraper:MiscScraper",
+    "final_exam": "final_exam_scraper:FinalExamScraper",
+}
 
+last_outputs = {}  # File path -> the stat and the lines of the outputs this process wrote, reused in daemon mode.
 
-def split_lesson_row(row):
-    return row.replace("<tr>", "").replace(
-        "</tr>", "").replace("</td>", "").replace("<br>", " ").replace("</br>", "").split("<td>")[1:]
 
+def get_scraper(name):
+    """Imports and returns the scraper class in `SCRAPERS`, the import time is recorded to the metrics."""
+    module_name, class_name = SCRAPERS[name].split(":")
+    t0 = perf_counter()
+    scraper = getattr(importlib.import_module(module_name), class_name)
+    Metrics.set_gauge("import_seconds", perf_counter() - t0, scraper=name)
+    return scraper
 
-def process_lesson_row(row):
-    data = split_lesson_row(row)
 
-    processed_row = data[0] + "|"  # CRN
-    processed_row += extract_from_a(data[1]) + "|"  # Course Code
-    processed_row += data[3] + "|"  # Teaching Method
-    processed_row += data[4] + "|"  # Instructor
-    processed_row += extract_from_a(data[5]) + "|"  # Building
-    processed_row += data[6] + "|"  # Day
-    processed_row += data[7] + "|"  # Time
-    processed_row += data[8] + "|"  # Room
-    processed_row += data[9] + "|"  # Capacity
-    processed_row += data[10] + "|"  # Enrolled
-    processed_row += extract_from_a(data[12])  # Major Rest.
+def read_output_lines(file_path):
+    """Returns the lines of an output file, from memory if this process wrote it last and it hasn't changed since."""
+    if file_path in last_outputs and os.path.exists(file_path):
+        file_stat, lines = last_outputs[file_path]
+        if (os.stat(file_path).st_size, os.stat(file_path).st_mtime_ns) == file_stat:
+            return lines
 
-    # Remove multiple spaces and tabs.
-    return re.sub(r'\s*\|\s*', '|', processed_row.replace("\n", "").replace("\t", "")).strip()
+    return read_lines(file_path)
 
 
-def save_lesson_rows(rows):
-    Logger.log_info("Saving Lesson Rows...")
+def remember_output_lines(file_path, lines):
+    last_outputs[file_path] = ((os.stat(file_path).st_size, os.stat(file_path).st_mtime_ns), lines)
 
-    # Save each row to a different line.
-    lines = [process_lesson_row(row) + "\n" for row in rows]
-    lines.sort()
-    with open(LESSONS_FILE_PATH, "w", encoding="utf-8") as f:
-        f.writelines(lines)
 
+def set_step_output(name, value):
+    """Sets an output of the GitHub Actions step running the script, nothing is set outside of the workflows."""
+    output_path = os.environ.get("GITHUB_OUTPUT")
+    if output_path:
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(f"{name}={value}\n")
 
-def save_course_rows(rows):
-    Logger.log_info("Saving Course Rows...")
 
-    # Save each row to a different line.
-    lines = [f"{row}\n" for row in sorted(rows)]
+def save_lessons(lessons, incremental=False):
+    Logger.log_info("Saving Lessons...")
+
+    # Save each lesson to a different line.
+    lines = to_psv_lines(lessons)
+    lines.sort()
+
+    if not incremental:
+        with open(LESSONS_FILE_PATH, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        remember_output_lines(LESSONS_FILE_PATH, lines)
+        CourseCodeIndex.update("lessons", lines)
+        return
+
+    # Only write when something changed, and write a delta next to the snapshot for the consumers to poll.
+    old_lines = read_output_lines(LESSONS_FILE_PATH)
+    if old_lines == lines:
+        Logger.log_info("No lessons have changed, skipping the write.")
+        return
+
+    delta = compute_lesson_delta(old_lines, lines)
+    write_lines_atomically(LESSONS_FILE_PATH, lines)
+    remember_output_lines(LESSONS_FILE_PATH, lines)
+    CourseCodeIndex.update("lessons", lines)
+    write_lines_atomically(LESSONS_DELTA_FILE_PATH, [json.dumps(delta, ensure_ascii=False, separators=(",", ":")) + "\n"])
+    # The data repo may already have the delta of an earlier run, the workflow only pushes the one written now.
+    set_step_output("lessons_delta_written", "true")
+    Logger.log_info(
+        f"Lessons delta: [green]{len(delta['added'])}[/green] added, [red]{len(delta['removed'])}[/red] removed, "
+        f"[yellow]{len(delta['changed'])}[/yellow] changed."
+    )
+
+
+def save_courses(courses):
+    Logger.log_info("Saving Courses...")
+
+    # Save each course to a different line.
+    lines = sorted(to_psv_lines(courses))
 
     with open(COURSES_FILE_PATH, "w", encoding="utf-8") as f:
         f.writelines(lines)
+    CourseCodeIndex.update("courses", lines)
 
 
 def save_final_exams(exam_data):
     """Save final exam data to PSV file"""
     Logger.log_info("Saving Final Exam Data...")
     
-    # Create header
-    header = "CRN|Course Code|Course Number|Course Name|Academician|Exam Type|Exam Location|Day|Time|Date|Branch Code\n"
-    
-    # Create data lines
-    lines = [header]
-    for exam in exam_data:
-        line = f"{exam['crn']}|{exam['course_code']}|{exam['course_number']}|{exam['course_name']}|{exam['academician']}|{exam['exam_type']}|{exam['exam_location']}|{exam['day']}|{exam['time']}|{exam['date']}|{exam['branch_code']}\n"
-        lines.append(line)
-    
-    # Sort lines (skip header)
-    lines[1:] = sorted(lines[1:])
+    # Header, then the sorted exams
+    lines = [FinalExam.HEADER + "\n"] + sorted(to_psv_lines(exam_data))
     
     with open(FINAL_EXAMS_FILE_PATH, "w", encoding="utf-8") as f:
         f.writelines(lines)
@@ -85,6 +122,70 @@ def save_final_exams(exam_data):
     Logger.log_info(f"Saved {len(exam_data)} final exam records to {FINAL_EXAMS_FILE_PATH}")
 
 
+def get_semester_line(semester, location):
+    courses = []
+    for course in semester:
+        if type(course) is dict:
+            selective_course_title = list(course.keys())[0]
+            selective_course_codes = course[selective_course_title]
+            selective_course_title = selective_course_title.replace("\n", "")
+
+            if len(selective_course_codes) <= 0:
+                Logger.log_info(f"Empty selective course list found in {location}.")
+
+            selective_course_codes = "|".join(code.replace("\n", "") for code in selective_course_codes)
+            courses.append(f"[{selective_course_title}*({selective_course_codes})]")
+        else:
+            courses.append(course)
+
+    return "=".join(courses) + "\n"
+
+
+def get_course_plan_lines(faculty_course_plans, store):
+    """
+    Yields the lines of `course_plans.txt` in one pass: the scraped faculties and programmes, with the ones that
+    weren't scraped this time merged from the existing file in `store` (`None` if there is none) as they come.
+    Only one iteration of the existing plans is read at a time, and `store` is closed after the last one.
+    """
+    existing_faculties = store.faculties if store is not None else {}
+    faculties = list(faculty_course_plans.keys()) + [f for f in existing_faculties if f not in faculty_course_plans]
+
+    from tqdm import tqdm
+    faculties_tqdm = tqdm(faculties)
+    for faculty in faculties_tqdm:
+        faculties_tqdm.set_description(f"Saving Course Plans of \"{faculty}\"")
+        if faculty not in faculty_course_plans:
+            Logger.log_info(f"Merging faculty from local data: \"{faculty}\"")
+
+        scraped_plans = faculty_course_plans.get(faculty, {})
+        existing_plans = store.get_programmes(faculty) if faculty in existing_faculties else []
+        yield f"# {faculty}\n"
+        for faculty_plan in list(scraped_plans.keys()) + [p for p in existing_plans if p not in scraped_plans]:
+            if faculty_plan in scraped_plans:
+                plan_iters = scraped_plans[faculty_plan].items()
+            else:
+                Logger.log_info(f"Merging faculty plan from local data: \"{faculty}/{faculty_plan}\"")
+                plan_iters = (
+                    (plan_iter, store.get_plan(faculty, faculty_plan, plan_iter))
+                    for plan_iter in store.get_iterations(faculty, faculty_plan)
+                )
+
+            yield f"## {faculty_plan}\n"
+            for faculty_plan_iter, semesters in plan_iters:
+                if semesters is None:
+                    continue  # Couldn't be scraped.
+
+                yield f"### {faculty_plan_iter}\n"
+                for i, semester in enumerate(semesters):
+                    yield get_semester_line(semester, f"{faculty} - {faculty_plan} - {faculty_plan_iter} - {i + 1}. semester")
+                if len(semesters) < 8:
+                    yield "\n" * (8 - len(semesters))
+
+    # Everything is read, the existing file is unmapped before the new one replaces it (Windows can't replace a mapped file).
+    if store is not None:
+        store.close()
+
+
 def save_course_plans(faculty_course_plans):
     # faculty_course_plans dictionary is structure example:
 
@@ -94,139 +195,240 @@ def save_course_plans(faculty_course_plans):
     #        ['MST 221', 'MST 201', ..., {'Selective': ['HSS 201', 'MST 261', ...]}, ... ]
     #   ]
 
-    # Read existing course plans
+    # The existing file stays mapped while the new one is written next to it, and is closed before it's replaced.
     try:
-        existing_data = {}
-        if os.path.exists(COURSE_PLANS_FILE_PATH):
-            Logger.log_info("Reading existing course plans...")
-            current_faculty = None
-            current_plan = None
-            current_iter = None
-            
-            with open(COURSE_PLANS_FILE_PATH, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                
-                for line in lines:
-                    if line.startswith("# "):  # Faculty
-                        current_faculty = line[2:].strip()
-                        existing_data[current_faculty] = {}
-                    elif line.startswith("## "):  # Plan
-                        current_plan = line[3:].strip()
-                        existing_data[current_faculty][current_plan] = {}
-                    elif line.startswith("### "):  # Iteration
-                        current_iter = line[4:].strip()
-                        existing_data[current_faculty][current_plan][current_iter] = []
-                    elif not line.strip():  # Empty line
-                        continue
-                    else:  # Semester data
-                        if current_faculty and current_plan and current_iter:
-                            if not line.strip():  # Skip completely empty lines
-                                continue
-                            current_semester = existing_data[current_faculty][current_plan][current_iter]
-                            if len(current_semester) < 8:  # Only add if we haven't reached 8 semesters
-                                courses = line.strip().split("=")
-                                current_semester.append(courses)
-        
-        # Merge new data with existing data
-        for existing_faculty in existing_data:
-            if existing_faculty not in faculty_course_plans:
-                Logger.log_info(f"Merging faculty from local data: \"{existing_faculty}\"")
-                faculty_course_plans[existing_faculty] = {}
-            
-            for existing_faculty_plan in existing_data[existing_faculty]:
-                if existing_faculty_plan not in faculty_course_plans[existing_faculty]:
-                    Logger.log_info(f"Merging faculty plan from local data: \"{existing_faculty}/{existing_faculty_plan}\"")
-                    faculty_course_plans[existing_faculty][existing_faculty_plan] = existing_data[existing_faculty][existing_faculty_plan]
+        store = CoursePlanStore()
     except Exception as e:
         Logger.log_error(f"Error while reading existing course plans: {e}")
-    
-    # Generate Lines
-    lines = []
-    faculties_tqdm = tqdm(faculty_course_plans.keys())
-    for faculty in faculties_tqdm:
-        faculties_tqdm.set_description(f"Saving Course Plans of \"{faculty}\"")
-        lines.append(f"# {faculty}\n")
-        for faculty_plan in faculty_course_plans[faculty].keys():
-            lines.append(f"## {faculty_plan}\n")
-            for faculty_plan_iter in faculty_course_plans[faculty][faculty_plan]:
-                lines.append(f"### {faculty_plan_iter}\n")
+        store = None
 
-                semesters = faculty_course_plans[faculty][faculty_plan][faculty_plan_iter]
-                for i, semester in enumerate(semesters):
-                    line = ""
-                    for j, course in enumerate(semester):
-                        if type(course) is dict:
-                            selective_course_title = list(course.keys())[0]
-                            selective_course_codes = course[selective_course_title]
-                            selective_course_title = selective_course_title.replace("\n", "")
-
-                            if len(selective_course_codes) <= 0:
-                                Logger.log_info(f"Empty selective course list found in {faculty} - {faculty_plan} - {faculty_plan_iter} - {i + 1}. semester.")
-                                line += f"[{selective_course_title}*()]"
-                            else:
-                                line += f"[{selective_course_title}*("
-                                for k, course in enumerate(selective_course_codes):
-                                    line += course.replace("\n", "")
-
-                                    if k != len(selective_course_codes) - 1:
-                                        line += "|"
-                                    else:
-                                        line += ")]"
-                        else:
-                            line += course
-
-                        if j != len(semester) - 1:
-                            line += "="
-
-                    lines.append(line + "\n")
-                if len(semesters) < 8:
-                    lines.append("\n" * (8 - len(semesters)))
+    try:
+        CoursePlanStore.save(get_course_plan_lines(faculty_course_plans, store))
+    finally:
+        if store is not None:
+            store.close()
 
-    # Save lines.
-    with open(COURSE_PLANS_FILE_PATH, "w", encoding="utf-8") as f:
-        f.writelines(lines)
+    with open(COURSE_PLANS_FILE_PATH, "r", encoding="utf-8") as f:
+        CourseCodeIndex.update("course_plans", f)
 
 
 def save_misc_data(data):
     # BUILDING DATA
     with open(BUILDING_CODES_FILE_PATH, "w", encoding="utf-8") as f:
-        f.writelines(data[0])
+        f.writelines(to_psv_lines(data[0]))
 
     # PROGRAMME DATA
     with open(PROGRAMME_CODES_FILE_PATH, "w", encoding="utf-8") as f:
-        f.writelines(data[1])
+        f.writelines(to_psv_lines(data[1]))
+
+
+def write_run_stats(file_path, target, item_count, wall_time):
+    """Writes the stats of the run as JSON, used by the benchmarks to compare runs."""
+    http_stats = HttpClient.get_stats().values()
+    stats = {
+        "target": target,
+        "wall_time": wall_time,
+        "item_count": item_count,
+        "items_per_second": item_count / wall_time if wall_time > 0 else 0,
+        "webdriver_commands": DriverManager.stats["commands"],
+        "drivers_created": DriverManager.stats["created"],
+        "mean_page_load_seconds": None,
+        "mean_driver_rss_mb": None,
+        "http_requests": sum(s["requests"] for s in http_stats),
+        "http_connections": sum(s["connections"] for s in http_stats),
+        "peak_rss_mb": None,
+    }
+
+    driver_stats = DriverManager.stats
+    if driver_stats["page_loads"] > 0:
+        stats["mean_page_load_seconds"] = driver_stats["page_load_time"] / driver_stats["page_loads"]
+    if driver_stats["rss_samples"] > 0:
+        stats["mean_driver_rss_mb"] = driver_stats["rss_total"] / driver_stats["rss_samples"]
+
+    try:
+        import resource  # Not available on Windows.
+        stats["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+
+    write_lines_atomically(file_path, [json.dumps(stats, indent=4) + "\n"])
+
+
+def scrap_lessons(engine):
+    if engine == "http":
+        lessons = get_scraper("lesson")().scrap_tables()
+        if lessons is not None:
+            return lessons
+
+        Logger.log_warning("Scraping the lessons over HTTP failed, falling back to the web driver.")
+
+    driver = DriverManager.lease()
+    try:
+        return get_scraper("lesson_chrome")(driver).scrap_tables()
+    finally:
+        DriverManager.release(driver)
 
 
 parser = argparse.ArgumentParser(description="Scraps data from ITU's website.")
 parser.add_argument('-scrap_target', type=str,
                     help="options: [lesson, course, course_plan, misc, final_exam]")
+parser.add_argument('-lesson_engine', type=str, default="http", choices=["http", "chrome"],
+                    help="engine used to scrap the lessons, http falls back to chrome if it fails. (default: http)")
+parser.add_argument('-incremental', action="store_true",
+                    help="only write the lessons when they changed, and write the changes to a delta file.")
+parser.add_argument('-no_http_cache', action="store_true",
+                    help="don't use or update the on-disk HTTP cache.")
+parser.add_argument('-resume', '--resume', action="store_true",
+                    help="continue the course, course_plan or final_exam target from where the last run stopped.")
+parser.add_argument('-stats_output', type=str,
+                    help="write the wall time, item count, WebDriver command count, HTTP request count and peak RSS of the run to this JSON file.")
+parser.add_argument('-metrics_dir', type=str, default=METRICS_DIR,
+                    help=f"directory to export the metrics of the run to, as <target>.json and <target>.prom. (default: {METRICS_DIR})")
+parser.add_argument('-log_json', type=str,
+                    help="also write the logs to this file as JSON lines.")
+parser.add_argument('-no_driver_pool', action="store_true",
+                    help="create a new web driver for every thread instead of leasing them from a warm pool.")
+parser.add_argument('-no_scrape_profile', action="store_true",
+                    help="load the pages with all their resources, instead of the lightweight scrape profile of the web drivers.")
+parser.add_argument('-daemon', '--daemon', action="store_true",
+                    help="keep running and scrap the targets on their schedules, instead of scraping -scrap_target once.")
+parser.add_argument('-daemon_targets', nargs="+", choices=["lesson", "course", "course_plan", "misc", "final_exam"],
+                    help=f"targets to run in daemon mode. (default: {', '.join(DAEMON_SCHEDULES.keys())})")
+parser.add_argument('-schedule', nargs="+", metavar="TARGET=CRON",
+                    help="cron expressions (UTC) of the targets in daemon mode, e.g. \"final_exam=0 3 * * *\". (default: the schedules of the workflows)")
+
+def run_target(target, args):
+    """Scraps and saves the target, returns the number of items saved."""
+    # Only the targets that use them lease drivers. The driver binary is installed once, by the first driver that
+    # is created, so the drivers created by multiple threads don't download it at the same time.
+    item_count = 0
+    if target == "course":
+        # The threads lease their own drivers, the controller lets MAX_THREAD_COUNT of them in at first.
+        DriverManager.prewarm(MAX_THREAD_COUNT)
+
+        journal = ProgressJournal("course", args.resume, record_type=Course)
+        courses = get_scraper("course")(None).scrap_courses(journal)
+        with Metrics.timer("save_seconds", file="courses"):
+            save_courses(courses)
+        journal.clear()
+        item_count = len(courses)
+    elif target == "course_plan":
+        journal = ProgressJournal("course_plan", args.resume)
+        faculty_course_plans = get_scraper("course_plan")().scrap_course_plans(journal)
+        with Metrics.timer("save_seconds", file="course_plans"):
+            save_course_plans(faculty_course_plans)
+        journal.clear()
+        item_count = sum(len(plans) for plans in faculty_course_plans.values())
+    elif target == "misc":  # Scrap Building Codes and Programme Codes
+        data = get_scraper("misc")().scrap_data()
+        with Metrics.timer("save_seconds", file="misc"):
+            save_misc_data(data)
+        item_count = len(data[0]) + len(data[1])
+    elif target == "lesson":
+        lessons = scrap_lessons(args.lesson_engine)
+        with Metrics.timer("save_seconds", file="lessons"):
+            save_lessons(lessons, args.incremental)
+        item_count = len(lessons)
+    elif target == "final_exam":
+        final_exam_scraper = get_scraper("final_exam")
+        driver = DriverManager.lease()
+        # Warm the drivers of the threads while the branch codes are read with the main driver.
+        DriverManager.prewarm(MAX_THREAD_COUNT)
+
+        journal = ProgressJournal("final_exam", args.resume, record_type=FinalExam)
+        try:
+            final_exam_data = final_exam_scraper(driver).scrape_final_exams(journal)
+        finally:
+            DriverManager.release(driver)
+        with Metrics.timer("save_seconds", file="final_exams"):
+            save_final_exams(final_exam_data)
+        journal.clear()
+        item_count = len(final_exam_data)
+
+    return item_count
+
+
+def run_cycle(target, args):
+    """Runs the target, then logs and exports the stats of the run."""
+    # In daemon mode the process runs many times, the stats and metrics of a run only count its own work.
+    Metrics.reset()
+    DriverManager.reset_stats()
+    if "scraper" in sys.modules:
+        sys.modules["scraper"].Scraper.reset_wait_stats()
+    HttpClient.reset_stats()
+    HttpCache.reset_stats()
 
-if __name__ == "__main__":
-    args = parser.parse_args()
     t0 = perf_counter()
+    item_count = run_target(target, args)
 
-    # Even though some scrappers don't use the given driver, not creating this sometimes throws issues, especially on GitHub Actions.
-    # When creating a driver, we install the Chrome WebDriver. When we create multiple drivers on different threads, the downloads
-    # may conflict and cause issues. So, we create the driver here. This way, even if we don't use it, the WebDriver is installed.
-    driver = DriverManager.create_driver()
-
-    if args.scrap_target == "course":
-        course_rows = CourseScraper(None).scrap_courses()
-        save_course_rows(course_rows)
-    elif args.scrap_target == "course_plan":
-        faculty_course_plans = CoursePlanScraper(driver).scrap_course_plans()
-        save_course_plans(faculty_course_plans)
-    elif args.scrap_target == "misc":  # Scrap Building Codes and Programme Codes
-        data = MiscScraper().scrap_data()
-        save_misc_data(data)
-    elif args.scrap_target == "lesson":
-        lesson_rows = LessonScraper(driver).scrap_tables()
-        save_lesson_rows(lesson_rows)
-    elif args.scrap_target == "final_exam":
-        final_exam_data = FinalExamScraper(driver).scrape_final_exams()
-        save_final_exams(final_exam_data)
-
-    DriverManager.kill_driver(driver)
+    DriverManager.log_stats()
+    if "scraper" in sys.modules:  # Only imported by the targets that use the drivers.
+        sys.modules["scraper"].Scraper.log_wait_stats()
+    HttpClient.log_stats()
+    HttpCache.log_stats()
+    if HttpCache.enabled:
+        HttpCache.evict()
 
     t1 = perf_counter()
     Logger.log_info(f"Scraping & Saving Completed in [green]{round(t1 - t0, 2)}[/green] seconds")
+    if args.stats_output:
+        write_run_stats(args.stats_output, target, item_count, t1 - t0)
+
+    Metrics.default_labels["target"] = target
+    Metrics.set_gauge("run_duration_seconds", t1 - t0)
+    Metrics.set_gauge("run_items", item_count)
+    Metrics.set_gauge("last_run_timestamp_seconds", time())
+    Metrics.export_json(os.path.join(args.metrics_dir, f"{target}.json"))
+    Metrics.export_prometheus(os.path.join(args.metrics_dir, f"{target}.prom"))
+
+
+def run_daemon(args):
+    """
+    Runs the targets on their schedules until the process is stopped. The web drivers, the HTTP connections and the
+    indexes of the last outputs are kept between the runs, so a run only takes as long as its scraping.
+    """
+    schedules = dict(DAEMON_SCHEDULES)
+    for entry in args.schedule or []:
+        target, _, expression = entry.partition("=")
+        schedules[target] = expression
+
+    targets = args.daemon_targets or list(schedules.keys())
+    crons = {target: CronSchedule(schedules[target]) for target in targets}
+    next_times = {target: cron.get_next_time(datetime.now(timezone.utc)) for target, cron in crons.items()}
+    for target, next_time in next_times.items():
+        Logger.log_info(f"Scheduled [blue]{target}[/blue] at \"{crons[target].expression}\", next run at {next_time}.")
+
+    while True:
+        # A target that was due while another one was running runs right after it.
+        target = min(next_times, key=next_times.get)
+        wait_dur = (next_times[target] - datetime.now(timezone.utc)).total_seconds()
+        if wait_dur > 0:
+            sleep(wait_dur)
+
+        Logger.set_context(target=target)
+        try:
+            run_cycle(target, args)
+        except Exception as e:
+            Logger.log_error(f"Failed to run {target}, error: {e}")
+        Logger.set_context()
+
+        next_times[target] = crons[target].get_next_time(datetime.now(timezone.utc))
+        Logger.log_info(f"Next [blue]{target}[/blue] run at {next_times[target]}.")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    if args.no_driver_pool:
+        DriverManager.pool_enabled = False
+    if args.no_scrape_profile:
+        DriverManager.scrape_profile_enabled = False
+    if args.no_http_cache:
+        HttpCache.enabled = False
+    if args.log_json:
+        Logger.add_json_sink(args.log_json)
+
+    if args.daemon:
+        run_daemon(args)
+    else:
+        run_cycle(args.scrap_target, args)
@@ -0,0 +1,168 @@
+from collections import deque
+from time import perf_counter
+import threading
+
+from logger import Logger
+from metrics import Metrics
+
+
+class WorkStealingScheduler:
+    """
+    Processes a list of items over multiple threads.
+
+    Every worker starts with its own contiguous share of the items. When a worker runs out of items, it steals
+    one from the end of the busiest worker's queue. This way, a worker that got slow items doesn't hold back
+    the whole run: the run ends at most one item after the others go idle.
+
+    `setup_worker()` is called once per worker and returns its state (e.g. its web driver),
+    `process_item(state, item)` is called for every item and `teardown_worker(state)` when the worker is done.
+    `renew_worker(state)` is called before every item and returns the state to continue with, e.g. a worker whose web
+    driver served too many pages continues with a new one.
+
+    If a `ProgressJournal` is given, the items already in it are not processed again, their results come from
+    the journal. The other items are recorded to it as they complete, under `get_key(item)`.
+
+    If a `ConcurrencyController` is given, only `controller.worker_limit` workers process items at a time, the
+    others wait for a slot, so `worker_count` is the most workers the controller can let in. The workers are set up
+    when they get a slot and torn down while they wait for one, so the web drivers are only held by the workers
+    the limit lets in. With `record_items`, the item durations and failures are the controller's feedback, for the
+    scrapers whose requests are made by a web driver instead of `HttpClient`.
+    """
+
+    def __init__(self, items: list, worker_count: int, process_item, setup_worker=None, teardown_worker=None,
+                 journal=None, get_key=str, controller=None, record_items=False, renew_worker=None):
+        self.items = list(items)
+        self.process_item = process_item
+        self.setup_worker = setup_worker
+        self.teardown_worker = teardown_worker
+        self.renew_worker = renew_worker
+        self.journal = journal
+        self.get_key = get_key
+        self.controller = controller
+        self.record_items = record_items
+
+        self.results = [None] * len(self.items)
+        pending = []
+        for index, item in enumerate(self.items):
+            if journal is not None and journal.is_completed(get_key(item)):
+                self.results[index] = journal.get(get_key(item))
+            else:
+                pending.append(index)
+
+        if len(pending) < len(self.items):
+            Logger.log_info(f"Skipping {len(self.items) - len(pending)} items completed by the previous run.")
+
+        self.worker_count = min(worker_count, len(pending))
+        self.lock = threading.Lock()
+        self.queues = [deque() for _ in range(self.worker_count)]
+        for i, queue in enumerate(self.queues):
+            queue.extend(pending[len(pending) * i // self.worker_count:len(pending) * (i + 1) // self.worker_count])
+
+        self.item_durations = [None] * len(self.items)
+        self.steal_count = 0
+
+    def get_next_index(self, worker_index: int):
+        with self.lock:
+            if len(self.queues[worker_index]) > 0:
+                return self.queues[worker_index].popleft()
+
+            # Steal from the end of the longest queue, the items at its start will be processed by its owner soon.
+            victim = max(self.queues, key=len)
+            if len(victim) == 0:
+                return None
+
+            self.steal_count += 1
+            return victim.pop()
+
+    def has_pending_items(self) -> bool:
+        with self.lock:
+            return any(len(queue) > 0 for queue in self.queues)
+
+    def process(self, thread_no: str, state, index: int) -> None:
+        t0, result = perf_counter(), "failed"
+        try:
+            self.results[index] = self.process_item(state, self.items[index])
+            if self.journal is not None and self.results[index] is not None:
+                self.journal.record(self.get_key(self.items[index]), self.results[index])
+            result = "empty" if self.results[index] is None else "ok"
+        except Exception as e:
+            Logger.log_error(f"Failed to process {self.items[index]}, error: {e}")
+        self.item_durations[index] = perf_counter() - t0
+        Metrics.increment("items_total", thread=thread_no, result=result)
+
+        if self.controller is not None and self.record_items:
+            # Empty results are not failures, e.g. the course codes that don't exist anymore.
+            self.controller.record(self.item_durations[index], result == "failed")
+
+    def worker_routine(self, worker_index: int) -> None:
+        thread_no = str(worker_index + 1).zfill(2)
+        Logger.set_context(thread=thread_no)  # Shown in front of the messages the worker logs.
+
+        state, is_set_up = None, False
+        while True:
+            if self.controller is not None and not self.controller.try_acquire_slot():
+                if is_set_up and self.setup_worker is not None:
+                    # Park the worker while it waits, so that it doesn't hold its web driver idle.
+                    if self.teardown_worker is not None:
+                        self.teardown_worker(state)
+                    state, is_set_up = None, False
+
+                self.controller.acquire_slot()
+
+            try:
+                if not is_set_up:
+                    if not self.has_pending_items():
+                        break
+
+                    try:
+                        state = self.setup_worker() if self.setup_worker is not None else None
+                        is_set_up = True
+                    except Exception as e:
+                        # The items of this worker will be stolen by the others.
+                        Logger.log_error(f"Failed to set up the worker, error: {e}")
+                        return
+
+                index = self.get_next_index(worker_index)
+                if index is None:
+                    break
+
+                if self.renew_worker is not None:
+                    try:
+                        state = self.renew_worker(state)
+                    except Exception as e:
+                        # The worker continues with its old state.
+                        Logger.log_error(f"Failed to renew the worker, error: {e}")
+
+                self.process(thread_no, state, index)
+            finally:
+                if self.controller is not None:
+                    self.controller.release_slot()
+
+        if is_set_up and self.teardown_worker is not None:
+            self.teardown_worker(state)
+
+    def run(self) -> list:
+        """Returns the results of the items, in the same order as the items. Failed items have `None` results."""
+        t0 = perf_counter()
+
+        threads = [threading.Thread(target=self.worker_routine, args=(i,)) for i in range(self.worker_count)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        self.log_timing_stats(perf_counter() - t0)
+        return self.results
+
+    def get_slowest_items(self, count: int = 3) -> list[tuple]:
+        timed_items = [(d, item) for d, item in zip(self.item_durations, self.items) if d is not None]
+        return sorted(timed_items, key=lambda x: x[0], reverse=True)[:count]
+
+    def log_timing_stats(self, wall_time: float) -> None:
+        durations = [d for d in self.item_durations if d is not None]
+        if len(durations) == 0:
+            return
+
+        slowest = ", ".join(f"{item} ({round(d, 2)}s)" for d, item in self.get_slowest_items())
+        Logger.log_info(
+            f"Processed {len(durations)} items over {self.worker_count} threads in [green]{round(wall_time, 2)}[/green] seconds "
+            f"(mean: {round(sum(durations) / len(durations), 2)}s per item, {self.steal_count} items stolen). Slowest items: {slowest}"
+        )
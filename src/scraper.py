@@ -2,20 +2,101 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from requests.adapters import HTTPAdapter
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, UnexpectedAlertPresentException
 
-import requests
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
-from time import sleep
+from collections import deque
+from time import sleep, perf_counter
+import threading
 
+from driver_manager import DriverManager
+from html_parser import parse_html
+from http_cache import HttpCache
 from logger import Logger
+from metrics import Metrics
+from constants import *
 
 
 class Scraper:
     SLEEP_DUR = .05
 
+    # Waits that often time out for valid reasons (no alert for a course with lessons, no table for a dead
+    # course code) take their whole timeout every time. Their timeouts start at these values, and then adapt
+    # to how long they take when they succeed. The other waits can take up to `READINESS_TIMEOUT`.
+    ADAPTIVE_TIMEOUTS = {"alert_shown": 1.0, "course_table": 3.0}
+
+    # Durations of the waits by their names, shared by all threads so that the timeouts adapt faster.
+    wait_lock = threading.Lock()
+    wait_stats = {}
+
+    # Collects the rows matching `rowSelector` (searched inside `containerSelector` if given) and their cells
+    # in one go, instead of sending a WebDriver command for every element and attribute.
+    EXTRACT_ROWS_SCRIPT = """
+        const [containerSelector, rowSelector] = arguments;
+        const container = containerSelector ? document.querySelector(containerSelector) : document.documentElement;
+        if (container === null) return null;
+
+        return {
+            style: container.getAttribute("style"),
+            html: container.innerHTML,
+            rows: Array.from(container.querySelectorAll(rowSelector)).map(row => ({
+                class: row.getAttribute("class"),
+                html: row.outerHTML,
+                cells: Array.from(row.querySelectorAll("td")).map(cell => ({
+                    text: cell.innerText,
+                    html: cell.innerHTML,
+                })),
+            })),
+        };
+    """
+
+    # Counts the XHR and fetch requests of the page. Installed by `get_ajax_count`, it returns the number of
+    # completed requests so that `ajax_idle` can tell the requests of an action apart from the older ones.
+    AJAX_HOOK_SCRIPT = """
+        if (window.__scraperAjaxHook === undefined) {
+            const hook = window.__scraperAjaxHook = {pending: 0, completed: 0};
+            const done = () => { hook.pending--; hook.completed++; };
+
+            const send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function () {
+                hook.pending++;
+                this.addEventListener("loadend", done);
+                return send.apply(this, arguments);
+            };
+
+            if (window.fetch) {
+                const fetch = window.fetch;
+                window.fetch = function () {
+                    hook.pending++;
+                    return fetch.apply(this, arguments).finally(done);
+                };
+            }
+        }
+        return window.__scraperAjaxHook.completed;
+    """
+
+    # If the action navigated to a new page instead, the hook is gone and the new page only has to be loaded.
+    AJAX_IDLE_SCRIPT = """
+        const hook = window.__scraperAjaxHook;
+        if (hook === undefined) return arguments[1].includes(document.readyState);
+        if (window.jQuery && window.jQuery.active > 0) return false;
+        return hook.pending === 0 && hook.completed > arguments[0];
+    """
+
+    # `mark_page` marks the current document, so a form submit is done when the page is replaced and loaded.
+    # A page is loaded at one of the ready states in `arguments[0]`, the pages with jQuery once its ready handlers ran.
+    PAGE_LOADED_SCRIPT = """
+        if (!arguments[0].includes(document.readyState) || window.__scraperPageMark !== undefined) return false;
+        return window.jQuery === undefined || window.jQuery.isReady === true;
+    """
+
+    DROPDOWN_POPULATED_SCRIPT = """
+        const [selector, placeholder, value] = arguments;
+        return Array.from(document.querySelectorAll(selector)).some(select =>
+            select.options.length > 1 && (!placeholder || Array.from(select.options).some(o => o.textContent.includes(placeholder)))
+                && (!value || Array.from(select.options).some(o => o.value === value))
+        );
+    """
+
     def __init__(self, driver: webdriver.Chrome) -> None:
         self.webdriver = driver
         self.webdriver_wait = WebDriverWait(self.webdriver, 10)
@@ -30,17 +111,24 @@ class Scraper:
     def get_attribute_element_pairs(self, elements: list, attribute: str) -> list[tuple]:
         return zip(elements, [e.get_attribute(attribute) for e in elements])
 
-    def load_page(self, url: str, wait_dur: float=3):
-        self.webdriver.get(url)
-        sleep(wait_dur)
+    def load_page(self, url: str, driver=None):
+        if driver is None:
+            driver = self.webdriver
 
-    def switch_to_turkish(self, driver=None, log_prefix: str=""):
+        t0 = perf_counter()
+        driver.get(url)
+        try:
+            self.wait_for("page_loaded", driver)
+        finally:
+            DriverManager.record_page_load(driver, perf_counter() - t0)
+
+    def switch_to_turkish(self, driver=None):
         if driver is None:
             driver = self.webdriver
 
         lang_button = driver.find_element(By.CSS_SELECTOR, 'a.menu-lang')
         if "TÜRKÇE" in lang_button.get_attribute("innerHTML"):
-            Logger.log_info(f"{log_prefix + ' ' if len(log_prefix) > 0 else ''}Switching to Turkish")
+            Logger.log_info("Switching to Turkish")
             lang_button.click()
             self.wait()
 
@@ -60,28 +148,39 @@ class Scraper:
 
         driver.execute_script("window.scrollTo({top: document.body.scrollHeight, behavior: 'smooth'});")
 
-    def get_soup_from_url(self, url):
+    def get_parsed_from_url(self, url, parse, page_type: str):
+        """
+        Returns `parse(document)` of the url, `document` being its `HtmlDocument`, or `None` if the url could not be loaded.
+        The result must be JSON serializable, it's cached with the hash of the page, and reused without parsing
+        the page again while the page doesn't change.
+        """
         try:
-            # Retry strategy
-            retry_strategy = Retry(
-                total=5,
-                status_forcelist=[429, 500, 502, 503, 504],
-                method_whitelist=["HEAD", "GET", "OPTIONS"],
-                backoff_factor=1
-            )
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            http = requests.Session()
-            http.mount("https://", adapter)
-            http.mount("http://", adapter)
-    
-            page = http.get(url, timeout=25)  # Adding a timeout for good measure, ITU's network is usually shit.
-            soup = BeautifulSoup(page.content, "html.parser")
-            return soup
-    
+            content, body_hash = HttpCache.get(url)
         except Exception as e:
             Logger.log_error(f"Failed to load the url {url}, error: {e}")
             return None
 
+        parsed = HttpCache.get_parsed(page_type, body_hash)
+        if parsed is None:
+            with Metrics.timer("parse_seconds", page_type=page_type):
+                parsed = parse(parse_html(content))
+            HttpCache.set_parsed(page_type, body_hash, parsed)
+
+        return parsed
+
+    def extract_rows(self, row_selector: str = "tr", driver=None, container_selector: str = None) -> dict:
+        """
+        Extracts the rows of the current page with a single `execute_script` call.
+
+        Returns `None` if `container_selector` matches nothing, otherwise a dictionary with the container's
+        `style` and `html`, and its `rows`. Each row has its `class`, its `html` (outerHTML) and its `cells`,
+        each cell has its `text` (innerText) and its `html` (innerHTML).
+        """
+        if driver is None:
+            driver = self.webdriver
+
+        return driver.execute_script(self.EXTRACT_ROWS_SCRIPT, container_selector, row_selector)
+
     def find_elements_by_class(self, class_name: str) -> list:
         return self.webdriver.find_elements(By.CLASS_NAME, class_name)
     
@@ -96,13 +195,145 @@ class Scraper:
 
     def wait(self, multiplier: int = 1):
         sleep(self.SLEEP_DUR * multiplier)
+        Scraper.record_wait("sleep", self.SLEEP_DUR * multiplier)
+
+    def get_ajax_count(self, driver=None) -> int:
+        """Installs the AJAX hook if needed, and returns the number of completed requests to pass to `ajax_idle`."""
+        if driver is None:
+            driver = self.webdriver
+
+        return driver.execute_script(self.AJAX_HOOK_SCRIPT)
+
+    def mark_page(self, driver=None) -> None:
+        """Marks the current page before a navigation, so that `page_loaded` waits for the next page."""
+        if driver is None:
+            driver = self.webdriver
+
+        driver.execute_script("window.__scraperPageMark = true;")
+
+    def is_ready(self, name: str, driver, **kwargs) -> bool:
+        """
+        Readiness predicates, the unused keyword arguments are ignored:
+        - `page_loaded`: the page is loaded, and it's not the one marked by `mark_page`.
+        - `table_rendered`: an element matches `selector` (default: "tbody tr").
+        - `alert_shown`: an alert dialogue is open.
+        - `dropdown_populated`: a dropdown matching `selector` (default: "select") has options besides its
+          initial one, one of them contains `placeholder` if it's given, and one has the value `value` if it's given.
+        - `ajax_idle`: there are no pending AJAX requests and more than `after` requests were completed.
+        """
+        if name == "page_loaded":
+            return driver.execute_script(self.PAGE_LOADED_SCRIPT, DriverManager.get_loaded_ready_states())
+        if name == "table_rendered":
+            return driver.execute_script("return document.querySelector(arguments[0]) !== null;", kwargs.get("selector", "tbody tr"))
+        if name == "alert_shown":
+            return EC.alert_is_present()(driver) is not False
+        if name == "dropdown_populated":
+            return driver.execute_script(
+                self.DROPDOWN_POPULATED_SCRIPT, kwargs.get("selector", "select"), kwargs.get("placeholder"), kwargs.get("value")
+            )
+        if name == "ajax_idle":
+            return driver.execute_script(self.AJAX_IDLE_SCRIPT, kwargs.get("after", -1), DriverManager.get_loaded_ready_states())
+
+        raise ValueError(f"Unknown readiness predicate \"{name}\"")
+
+    def wait_for(self, names, driver=None, timeout: float=None, **kwargs) -> str:
+        """
+        Waits until one of the named predicates (see `is_ready`) holds, and returns its name.
+        Raises `TimeoutException` if none of them holds in time.
+        """
+        names = [names] if isinstance(names, str) else names
+
+        def condition(d):
+            for name in names:
+                if self.is_ready(name, d, **kwargs):
+                    return name
+            return False
+
+        return self.wait_until("|".join(names), condition, driver, timeout)
+
+    def wait_until(self, name: str, condition, driver=None, timeout: float=None):
+        """
+        Polls `condition(driver)` until it returns a truthy value, and returns it. The duration of the wait
+        is recorded under `name`, which also picks the timeout if `timeout` isn't given.
+        """
+        if driver is None:
+            driver = self.webdriver
+        if timeout is None:
+            timeout = Scraper.get_timeout(name)
+
+        # An alert may show up while polling, the `alert_shown` predicate takes care of it on the next poll.
+        driver_wait = WebDriverWait(driver, timeout, READINESS_POLL_INTERVAL, ignored_exceptions=[UnexpectedAlertPresentException])
+
+        t0 = perf_counter()
+        try:
+            result = driver_wait.until(condition)
+        except TimeoutException:
+            Scraper.record_wait(name, perf_counter() - t0, timed_out=True)
+            raise
+
+        Scraper.record_wait(name, perf_counter() - t0)
+        return result
+
+    @staticmethod
+    def get_timeout(name: str) -> float:
+        if name not in Scraper.ADAPTIVE_TIMEOUTS:
+            return READINESS_TIMEOUT
+
+        max_timeout = Scraper.ADAPTIVE_TIMEOUTS[name]
+        with Scraper.wait_lock:
+            stats = Scraper.wait_stats.get(name)
+            durations = sorted(stats["durations"]) if stats is not None else []
+
+        if len(durations) < READINESS_MIN_SAMPLES:
+            return max_timeout
+
+        p95 = durations[int((len(durations) - 1) * .95)]
+        return min(max(p95 * READINESS_TIMEOUT_MULTIPLIER, READINESS_MIN_TIMEOUT), max_timeout)
+
+    @staticmethod
+    def record_wait(name: str, duration: float, timed_out: bool=False) -> None:
+        Metrics.observe("wait_seconds", duration, name=name, timed_out=timed_out)
+        with Scraper.wait_lock:
+            stats = Scraper.wait_stats.setdefault(
+                name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0, "durations": deque(maxlen=200)}
+            )
+            stats["count"] += 1
+            stats["total"] += duration
+            stats["max"] = max(stats["max"], duration)
+            if timed_out:
+                stats["timeouts"] += 1
+            else:
+                stats["durations"].append(duration)
+
+    @staticmethod
+    def reset_wait_stats() -> None:
+        """Called before every run. The durations are kept, the adaptive timeouts are based on them."""
+        with Scraper.wait_lock:
+            for stats in Scraper.wait_stats.values():
+                stats.update(count=0, total=0.0, max=0.0, timeouts=0)
+
+    @staticmethod
+    def log_wait_stats() -> None:
+        if all(stats["count"] == 0 for stats in Scraper.wait_stats.values()):
+            return
+
+        Logger.log_info("Time spent waiting:")
+        for name, stats in sorted(Scraper.wait_stats.items(), key=lambda x: x[1]["total"], reverse=True):
+            if stats["count"] == 0:
+                continue
+
+            Logger.log_info(
+                f"    {name}: [green]{round(stats['total'], 2)}[/green] seconds over {stats['count']} waits "
+                f"(mean: {round(stats['total'] / stats['count'], 3)}s, max: {round(stats['max'], 2)}s, "
+                f"{stats['timeouts']} timeouts, current timeout: {round(Scraper.get_timeout(name), 2)}s)"
+            )
 
     def wait_until_loaded(self, element):
         self.webdriver_wait.until(EC.visibility_of(element))
 
-    def wait_for_and_dismiss_alert(self, multiplier: int = 1) -> bool:
+    def wait_for_and_dismiss_alert(self, timeout: float = None) -> bool:
         try:
-            WebDriverWait(self.webdriver, self.SLEEP_DUR * multiplier).until(EC.alert_is_present())
+            self.wait_for("alert_shown", timeout=timeout)
             return self.dismiss_alert()
         except TimeoutException:
             return False
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules of `src` import each other by their names, like when `run.py` is run from there.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+# The benchmarks keep the old implementations, the tests use them as oracles.
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
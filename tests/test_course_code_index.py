@@ -0,0 +1,43 @@
+import os
+
+import course_code_index
+from course_code_index import CourseCodeIndex
+from constants import *
+
+
+def test_only_changed_data_files_are_read(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    with open(COURSES_FILE_PATH, "w", encoding="utf-8") as f:
+        f.write("BLG 102E|Programlama|İngilizce|4|6|||\n")
+
+    read_paths = []
+    read_lines = course_code_index.read_lines
+    monkeypatch.setattr(course_code_index, "read_lines", lambda path: read_paths.append(path) or read_lines(path))
+
+    def get_course_codes():
+        # A new process, the index is loaded from its file.
+        CourseCodeIndex.entries = None
+        return CourseCodeIndex.get_course_codes()
+
+    monkeypatch.setattr(CourseCodeIndex, "entries", None)
+    monkeypatch.setattr(CourseCodeIndex, "fingerprints", None)
+    assert get_course_codes() == ["BLG 102E"]
+    assert COURSES_FILE_PATH in read_paths
+
+    read_paths.clear()
+    assert get_course_codes() == ["BLG 102E"]
+    assert COURSES_FILE_PATH not in read_paths
+
+    # Touched, like a fresh clone of the data repository, it's only hashed.
+    file_stat = os.stat(COURSES_FILE_PATH)
+    os.utime(COURSES_FILE_PATH, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+    assert get_course_codes() == ["BLG 102E"]
+    assert COURSES_FILE_PATH not in read_paths
+    with open(COURSE_CODE_INDEX_FILE_PATH, "r", encoding="utf-8") as f:
+        assert f"-{file_stat.st_mtime_ns + 10 ** 9}-" in f.read()
+
+    with open(COURSES_FILE_PATH, "w", encoding="utf-8") as f:
+        f.write("BLG 103E|Programlama|İngilizce|4|6|||\n")
+    assert get_course_codes() == ["BLG 103E"]
+    assert COURSES_FILE_PATH in read_paths
@@ -0,0 +1,21 @@
+from course_plan_scraper import CoursePlanScraper
+from progress_journal import ProgressJournal
+
+
+def test_programmes_with_failed_iterations_are_left_out(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    scraper = CoursePlanScraper()
+    scraper.journal = ProgressJournal("course_plan_test", False)
+    scraper.plans = [{
+        "programme": ("INS_LS", "İnşaat Mühendisliği", "İnşaat Fakültesi", "INS"),
+        "iterations": [["2020-2021 Güz Dönemi Sonrası", None], ["2021-2022 Güz Dönemi Sonrası", None]],
+        "pending_count": 2, "result": None, "failed": False,
+    }]
+
+    scraper.handle_iteration_page(None, 0, 0, "http://test/2020", None)
+    scraper.handle_iteration_page(None, 0, 1, "http://test/2021", [["MAT 103", "FIZ 101"]])
+    scraper.complete_programme(0)
+
+    # Not an empty plan, the existing plans of the programme are merged instead and --resume scrapes it again.
+    assert scraper.plans[0]["result"] is None
+    assert not scraper.journal.is_completed("INS_LS")
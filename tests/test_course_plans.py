@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+import file_utils
+import run
+from course_plan_store import CoursePlanStore
+from constants import *
+
+PLANS = {
+    "İnşaat Fakültesi": {
+        "İnşaat Mühendisliği": {"2021-2022 Güz Dönemi Sonrası": [["MAT 103", "FIZ 101"], ["MAT 104", {"Seçmeli Ders": ["INS 201"]}]]},
+    },
+    "Maden Fakültesi": {
+        "Maden Mühendisliği": {"2019-2020 Güz Dönemi Sonrası": [["KIM 101"]]},
+    },
+}
+
+
+def test_saving_merges_the_existing_plans_after_closing_the_store(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    run.save_course_plans(PLANS)
+
+    class OpenedStore(CoursePlanStore):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened_stores.append(self)
+
+    # Windows can't replace a file that is still mapped.
+    replace, opened_stores = os.replace, []
+    monkeypatch.setattr(run, "CoursePlanStore", OpenedStore)
+
+    def checked_replace(src, dst):
+        if dst == COURSE_PLANS_FILE_PATH:
+            assert len(opened_stores) == 1 and opened_stores[0].file is None
+        replace(src, dst)
+
+    monkeypatch.setattr(file_utils.os, "replace", checked_replace)
+    run.save_course_plans({"Maden Fakültesi": PLANS["Maden Fakültesi"]})
+
+    with CoursePlanStore() as store:
+        assert list(store.faculties) == ["Maden Fakültesi", "İnşaat Fakültesi"]
+        assert store.get_plans("İnşaat Fakültesi", "İnşaat Mühendisliği") == {
+            "2021-2022 Güz Dönemi Sonrası": [["MAT 103", "FIZ 101"], ["MAT 104", "[Seçmeli Ders*(INS 201)]"]]
+        }
+
+
+def test_the_index_of_a_touched_file_is_reused(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    run.save_course_plans(PLANS)
+
+    # Like a fresh clone of the data repository, the contents are the same but the modification time isn't.
+    file_stat = os.stat(COURSE_PLANS_FILE_PATH)
+    os.utime(COURSE_PLANS_FILE_PATH, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+    monkeypatch.setattr(CoursePlanStore, "build_index", lambda lines: pytest.fail("The file was indexed again."))
+    with CoursePlanStore() as store:
+        assert list(store.faculties) == list(PLANS)
+
+    with open(COURSE_PLANS_INDEX_FILE_PATH, "r", encoding="utf-8") as f:
+        assert json.load(f)["file_stat"] == CoursePlanStore.get_file_stat(COURSE_PLANS_FILE_PATH)
+
+
+def test_changed_files_are_indexed_again(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    run.save_course_plans(PLANS)
+
+    # The same size, but another faculty.
+    with open(COURSE_PLANS_FILE_PATH, "r+", encoding="utf-8") as f:
+        contents = f.read()
+        f.seek(0)
+        f.write(contents.replace("# Maden", "# Kaden"))
+
+    with CoursePlanStore() as store:
+        assert list(store.faculties) == ["İnşaat Fakültesi", "Kaden Fakültesi"]
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from cron_schedule import CronSchedule
+from constants import DAEMON_SCHEDULES
+
+
+@pytest.mark.parametrize("field, expected", [
+    ("7", {0}),
+    ("0", {0}),
+    ("5-7", {5, 6, 0}),
+    ("0-7", {0, 1, 2, 3, 4, 5, 6}),
+    ("7/2", {0, 2, 4, 6}),
+    ("1,7", {1, 0}),
+])
+def test_sunday_is_0_and_7(field, expected):
+    assert CronSchedule(f"*/15 * * * {field}").weekdays == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * * 8", "60 * * * *", "* * 0 * *", "* * * * 6-5", "* * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_next_time_on_sunday():
+    # 2026-10-17 is a Saturday.
+    assert CronSchedule("*/15 * * * 7").get_next_time(datetime(2026, 10, 17, 23, 50)) == datetime(2026, 10, 18, 0, 0)
+
+
+def test_steps_from_a_start():
+    assert CronSchedule("4/5 2/1 * * *").get_next_time(datetime(2026, 10, 18, 2, 4)) == datetime(2026, 10, 18, 2, 9)
+
+
+def test_day_or_weekday():
+    # When both are restricted, either of them matches: the 1st of the month or a Monday.
+    schedule = CronSchedule("0 0 1 * 1")
+    assert schedule.get_next_time(datetime(2026, 10, 18, 12, 0)) == datetime(2026, 10, 19, 0, 0)
+    assert schedule.get_next_time(datetime(2026, 10, 26, 12, 0)) == datetime(2026, 11, 1, 0, 0)
+
+
+def test_daemon_schedules_are_valid():
+    for expression in DAEMON_SCHEDULES.values():
+        CronSchedule(expression)
@@ -0,0 +1,20 @@
+from bs4 import BeautifulSoup
+import pytest
+
+from html_parser import BACKENDS, get_backend, is_lxml_available, parse_html
+from parser_benchmark import PAGE_TYPES
+
+
+@pytest.mark.parametrize("backend", BACKENDS.keys())
+@pytest.mark.parametrize("name, html, legacy, parse", PAGE_TYPES, ids=[page_type[0] for page_type in PAGE_TYPES])
+def test_backends_parse_like_the_legacy_scrapers(backend, name, html, legacy, parse):
+    if backend == "lxml" and not is_lxml_available():
+        pytest.skip("lxml is not installed.")
+
+    markup = html.encode("utf-8")
+    assert parse(parse_html(markup, backend)) == legacy(BeautifulSoup(markup, "html.parser"))
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError):
+        get_backend("html5lib")
@@ -0,0 +1,77 @@
+import os
+
+from bs4 import BeautifulSoup
+import pytest
+
+import run
+from driver_manager import DriverManager
+from lesson_http_scraper import ChromeOuterHTMLFormatter, LessonHttpScraper
+from mock_itu_site import MockItuServer, MockItuSite
+from records import Lesson
+from constants import *
+
+
+class FailingSubjectSite(MockItuSite):
+    """The lessons of one subject can't be loaded."""
+
+    def get_response(self, path: str, query: dict) -> tuple[int, str, str]:
+        if path == "/public/DersProgram/DersProgramSearch" and query.get("dersBransKoduId") == ["3"]:
+            return 404, "text/html", "<h1>404</h1>"
+        return super().get_response(path, query)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(site):
+        servers.append(MockItuServer(site))
+        servers[-1].start()
+        return servers[-1]
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rows_are_serialized_like_chrome():
+    html = "<tr><td class='x'>A &amp; B&nbsp;</td><td><a href='/x?a=1&amp;b=\"2\"'>C &lt; D</a><br/></td></tr>"
+    row = BeautifulSoup(html, "html.parser").tr
+    assert row.decode(formatter=ChromeOuterHTMLFormatter()) == (
+        "<tr><td class=\"x\">A &amp; B&nbsp;</td><td><a href=\"/x?a=1&amp;b=&quot;2&quot;\">C &lt; D</a><br></td></tr>"
+    )
+
+
+def test_saved_lessons_are_the_ones_read_from_the_browser(monkeypatch, tmp_path, serve):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    site = MockItuSite()
+    server = serve(site)
+
+    lessons = LessonHttpScraper(base_url=server.base_url).scrap_tables()
+    run.save_lessons(lessons)
+
+    # The rows of the mock site are what `LessonScraper` reads from the tables' `outerHTML`s.
+    expected_lessons = Lesson.from_html_rows([row for rows in site.lessons.values() for row in rows])
+    with open(LESSONS_FILE_PATH, "r", encoding="utf-8") as f:
+        assert f.read() == "".join(sorted(run.to_psv_lines(expected_lessons)))
+
+
+def test_failed_subjects_fall_back_to_the_browser(monkeypatch, serve):
+    server = serve(FailingSubjectSite())
+    assert LessonHttpScraper(base_url=server.base_url).scrap_tables() is None
+
+    # A partial result is never saved, the lessons are scraped with the browser instead.
+    class BrowserScraper:
+        def __init__(self, driver):
+            pass
+
+        def scrap_tables(self):
+            return ["browser lessons"]
+
+    scrapers = {"lesson": lambda: LessonHttpScraper(base_url=server.base_url), "lesson_chrome": BrowserScraper}
+    monkeypatch.setattr(run, "get_scraper", scrapers.get)
+    monkeypatch.setattr(DriverManager, "lease", lambda: None)
+    monkeypatch.setattr(DriverManager, "release", lambda driver: None)
+    assert run.scrap_lessons("http") == ["browser lessons"]
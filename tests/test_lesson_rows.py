@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from lesson_row_benchmark import batch_parse, check_equivalence, get_semester_rows, legacy_parse
+from records import parse_lesson_rows
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_rows_are_parsed_like_the_row_by_row_parser(seed):
+    check_equivalence(random.Random(seed), 2000)
+
+
+def test_mock_site_rows_are_parsed_like_the_row_by_row_parser():
+    rows = get_semester_rows(500)
+    assert batch_parse(rows) == legacy_parse(rows)
+
+
+def test_rows_with_nul_characters_are_rejected():
+    with pytest.raises(ValueError):
+        parse_lesson_rows(["<tr><td>1\x00</td></tr>", "<tr><td>2</td></tr>"])
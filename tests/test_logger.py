@@ -0,0 +1,20 @@
+from queue import Queue
+import threading
+
+from logger import Logger
+
+
+def test_info_messages_wait_then_drops_are_reported_at_flush(monkeypatch, capsys):
+    # A writer that never writes, the queue stays full after the first message.
+    monkeypatch.setattr(Logger, "writer_thread", threading.Thread(target=lambda: None))
+    monkeypatch.setattr(Logger, "queue", Queue(maxsize=1))
+    monkeypatch.setattr(Logger, "put_timeout", .01)
+    monkeypatch.setattr(Logger, "dropped_count", 0)
+
+    Logger.log_info("written")
+    Logger.log_info("dropped")
+    assert Logger.queue.qsize() == 1 and Logger.dropped_count == 1
+
+    Logger.flush()
+    assert "Dropped 1 log messages" in capsys.readouterr().out
+    assert Logger.dropped_count == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from http_cache import HttpCache
+from metrics import Metrics
+from pipeline import FetchParsePipeline
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """The pages served to the pipeline, a page that is an exception fails to load."""
+    pages, fetch_counts = {}, {}
+
+    def get(url):
+        fetch_counts[url] = fetch_counts.get(url, 0) + 1
+        page = pages[url]
+        content = page.pop(0) if type(page) is list else page
+        if isinstance(content, Exception):
+            raise content
+        return content, f"{url}-{fetch_counts[url]}"
+
+    monkeypatch.setattr(HttpCache, "get", get)
+    monkeypatch.setattr(HttpCache, "get_parsed", lambda page_type, body_hash: None)
+    monkeypatch.setattr(HttpCache, "set_parsed", lambda page_type, body_hash, parsed: None)
+    return pages, fetch_counts
+
+
+def run_pipeline(url, parse, retry_count):
+    results = []
+    pipeline = FetchParsePipeline(lambda pipeline, task, parsed: results.append(parsed), 2, 0)
+    pipeline.submit(url, parse, "test", retry_count=retry_count)
+    pipeline.run()
+    return results
+
+
+def test_pages_that_fail_to_load_are_fetched_again(pages):
+    pages, fetch_counts = pages
+    pages["http://test/a"] = [OSError("reset"), OSError("reset"), b"<h1>ok</h1>"]
+
+    assert run_pipeline("http://test/a", lambda document: "parsed", 4) == ["parsed"]
+    assert fetch_counts["http://test/a"] == 3
+
+
+def test_pages_that_never_parse_are_given_up_on(pages):
+    pages, fetch_counts = pages
+    pages["http://test/b"] = b"<table></table>"
+
+    def parse(document):
+        raise ValueError("Found a semester table without a body.")
+
+    assert run_pipeline("http://test/b", parse, 2) == [None]
+    assert fetch_counts["http://test/b"] == 3
+
+
+def test_parse_times_are_recorded_by_page_type(pages, monkeypatch):
+    pages, _ = pages
+    pages["http://test/c"] = b"<h1>ok</h1>"
+    monkeypatch.setattr(Metrics, "histograms", {})
+
+    run_pipeline("http://test/c", lambda document: "parsed", 0)
+    assert Metrics.histograms[Metrics.get_key("parse_seconds", {"page_type": "test"})]["count"] == 1
@@ -0,0 +1,59 @@
+import argparse
+import json
+
+import run
+from driver_manager import DriverManager
+from http_cache import HttpCache
+from metrics import Metrics
+
+
+def run_fake_cycle(monkeypatch, tmp_path, target, work):
+    def run_target(target, args):
+        work()
+        return 1
+
+    monkeypatch.setattr(run, "run_target", run_target)
+    args = argparse.Namespace(stats_output=str(tmp_path / f"{target}_stats.json"), metrics_dir=str(tmp_path))
+    run.run_cycle(target, args)
+
+    with open(tmp_path / f"{target}.json", "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+    with open(tmp_path / f"{target}_stats.json", "r", encoding="utf-8") as f:
+        return metrics, json.load(f)
+
+
+def test_cycles_only_export_their_own_stats(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(HttpCache, "enabled", False)
+
+    def misc_work():
+        Metrics.increment("misc_only_total")
+        DriverManager.stats["commands"] += 5
+        HttpCache.stats["changed"] += 1
+
+    def lesson_work():
+        Metrics.increment("lesson_only_total")
+
+    run_fake_cycle(monkeypatch, tmp_path, "misc", misc_work)
+    metrics, stats = run_fake_cycle(monkeypatch, tmp_path, "lesson", lesson_work)
+
+    names = {entry["name"] for entry in metrics["counters"]}
+    assert names == {"lesson_only_total"}
+    assert all(entry["labels"]["target"] == "lesson" for entry in metrics["counters"] + metrics["gauges"])
+    assert stats["webdriver_commands"] == 0
+    assert HttpCache.stats["changed"] == 0
+
+
+def test_driver_stats_are_logged_without_new_drivers(monkeypatch):
+    messages = []
+    monkeypatch.setattr(run.Logger, "log_info", lambda message, *args: messages.append(message))
+    monkeypatch.setattr(DriverManager, "stats", dict(DriverManager.EMPTY_STATS, leased=2, commands=40, page_loads=4, page_load_time=2.0))
+
+    DriverManager.log_stats()
+    assert messages[0].startswith("Created no web drivers, ") and "2 leases" in messages[0] and "40 WebDriver commands" in messages[0]
+    assert "Loaded 4 pages" in messages[1]
+
+    messages.clear()
+    monkeypatch.setattr(DriverManager, "stats", dict(DriverManager.EMPTY_STATS))
+    DriverManager.log_stats()
+    assert messages == []
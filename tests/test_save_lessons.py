@@ -0,0 +1,24 @@
+import os
+
+import run
+from lesson_row_benchmark import get_semester_rows
+from records import Lesson
+
+
+def test_only_written_deltas_are_reported_to_the_workflow(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    output_path = tmp_path / "github_output"
+    monkeypatch.setenv("GITHUB_OUTPUT", str(output_path))
+
+    lessons = Lesson.from_html_rows(get_semester_rows(20))
+    run.save_lessons(lessons[:10], incremental=True)
+    assert output_path.read_text() == "lessons_delta_written=true\n"
+
+    # Nothing changed, the delta of the previous run is still there but it's not written again.
+    output_path.unlink()
+    run.save_lessons(lessons[:10], incremental=True)
+    assert os.path.exists("data/lessons_delta.json") and not output_path.exists()
+
+    run.save_lessons(lessons, incremental=True)
+    assert output_path.read_text() == "lessons_delta_written=true\n"
@@ -0,0 +1,54 @@
+import threading
+
+from concurrency import ConcurrencyController
+from scheduler import WorkStealingScheduler
+
+
+def test_workers_continue_with_the_renewed_state():
+    def renew_worker(state):
+        # The state wears out after every three items.
+        return state + 1 if len(seen) > 0 and len(seen) % 3 == 0 else state
+
+    seen = []
+    scheduler = WorkStealingScheduler(
+        list(range(9)), 1, lambda state, item: seen.append(state) or item,
+        setup_worker=lambda: 0, teardown_worker=seen.append, renew_worker=renew_worker
+    )
+
+    assert scheduler.run() == list(range(9))
+    assert seen == [0, 0, 0, 1, 1, 1, 2, 2, 2, 2]  # The last one is from the teardown.
+
+
+def test_failed_renewals_keep_the_old_state():
+    def renew_worker(state):
+        raise RuntimeError("no driver")
+
+    states = []
+    scheduler = WorkStealingScheduler(
+        ["a", "b"], 1, lambda state, item: states.append(state) or item,
+        setup_worker=lambda: "driver", renew_worker=renew_worker
+    )
+
+    assert scheduler.run() == ["a", "b"]
+    assert states == ["driver", "driver"]
+
+
+def test_workers_waiting_for_a_slot_are_parked():
+    controller = ConcurrencyController("parking.test")
+    controller.limit = 1
+    calls = []
+
+    def process_item(state, item):
+        if item == 0:
+            # Another worker takes the only slot until the first item is done.
+            controller.active_count += 1
+            threading.Timer(.1, controller.release_slot).start()
+        return item
+
+    scheduler = WorkStealingScheduler(
+        [0, 1], 1, process_item, setup_worker=lambda: calls.append("setup"),
+        teardown_worker=lambda state: calls.append("teardown"), controller=controller
+    )
+
+    assert scheduler.run() == [0, 1]
+    assert calls == ["setup", "teardown", "setup", "teardown"]